@@ -1,5 +1,6 @@
 from django.core.management.base import BaseCommand
 from bookshelf.models import Book
+from bookshelf.seeding import seed
 from datetime import date
 
 class Command(BaseCommand):
@@ -59,14 +60,10 @@ class Command(BaseCommand):
             },
         ]
 
-        for book_data in sample_books:
-            book, created = Book.objects.get_or_create(
-                title=book_data['title'],
-                defaults=book_data
-            )
-            if created:
-                self.stdout.write(
-                    self.style.SUCCESS(f'Successfully created book: {book.title}')
-                )
-            else:
-                self.stdout.write(f'Book already exists: {book.title}')
\ No newline at end of file
+        # titles are not unique in the database: one lookup of the existing
+        # titles and one INSERT for the rest, instead of a get_or_create per book
+        stats = seed(Book, sample_books, key='title')
+        self.stdout.write(self.style.SUCCESS(
+            f"Created {stats['written']} sample books, {stats['skipped']} already existed"
+        ))
+        self.stdout.write('Use "manage.py bulk_seed bookshelf.Book --synthetic N" for load-test data')
@@ -0,0 +1,53 @@
+from django.db import migrations
+
+TRIGRAM_INDEXES = [
+    ('Author', 'name', 'author_name_trgm_idx'),
+    ('Book', 'title', 'book_title_trgm_idx'),
+]
+
+
+def create_search_indexes(apps, schema_editor):
+    """
+    ?search= runs icontains on title and author__name, and
+    ?author__name__istartswith= a prefix match. PostgreSQL gets trigram
+    indexes over UPPER(column), the expression its case-insensitive LIKE
+    compares, which serve both. SQLite has no trigrams, so author names
+    get a NOCASE index, which its LIKE uses for prefix matches.
+    """
+    vendor = schema_editor.connection.vendor
+    if vendor == 'postgresql':
+        from django.contrib.postgres.indexes import GinIndex, OpClass
+        from django.db.models.functions import Upper
+
+        schema_editor.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+        for model_name, field, index_name in TRIGRAM_INDEXES:
+            model = apps.get_model('api', model_name)
+            index = GinIndex(OpClass(Upper(field), name='gin_trgm_ops'), name=index_name)
+            schema_editor.execute(index.create_sql(model, schema_editor))
+    elif vendor == 'sqlite':
+        from django.db.models import Index
+        from django.db.models.functions import Collate
+
+        Author = apps.get_model('api', 'Author')
+        index = Index(Collate('name', 'NOCASE'), name='author_name_nocase_idx')
+        schema_editor.execute(index.create_sql(Author, schema_editor))
+
+
+def drop_search_indexes(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'postgresql':
+        for _, _, index_name in TRIGRAM_INDEXES:
+            schema_editor.execute(f'DROP INDEX IF EXISTS {index_name}')
+    elif vendor == 'sqlite':
+        schema_editor.execute('DROP INDEX IF EXISTS author_name_nocase_idx')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0002_book_list_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_indexes, drop_search_indexes),
+    ]
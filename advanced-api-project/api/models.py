@@ -18,6 +18,12 @@ class Author(models.Model):
     
     class Meta:
         ordering = ['name']
+        indexes = [
+            # default ordering and exact ?author__name= lookups; prefix and
+            # substring searches use the vendor-specific indexes created in
+            # migration 0003_search_indexes
+            models.Index(fields=['name'], name='author_name_idx'),
+        ]
 
 
 class Book(models.Model):
@@ -39,11 +45,22 @@ class Book(models.Model):
         Author,
         on_delete=models.CASCADE,
         related_name='books',
-        help_text="The author who wrote this book"
+        help_text="The author who wrote this book",
+        db_index=False,  # covered by book_author_title_idx
     )
     
     def __str__(self):
         return f"{self.title} ({self.publication_year})"
     
     class Meta:
-        ordering = ['-publication_year', 'title']
\ No newline at end of file
+        ordering = ['-publication_year', 'title']
+        # Matched to BookListView's filters and orderings:
+        indexes = [
+            # ?title= and the view's default ordering by title
+            models.Index(fields=['title'], name='book_title_idx'),
+            # the model ordering, ?ordering=-publication_year and
+            # ?publication_year= ordered by title
+            models.Index(fields=['-publication_year', 'title'], name='book_year_title_idx'),
+            # ?author= ordered by title; also serves the author foreign key
+            models.Index(fields=['author', 'title'], name='book_author_title_idx'),
+        ]
\ No newline at end of file
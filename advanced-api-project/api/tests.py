@@ -1,3 +1,105 @@
+import json
+import os
+import tempfile
+from io import StringIO
+
+from unittest import skipUnless
+
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from .benchmarking import compare_reports, measure, percentile
+from .management.commands.benchmark_books import Command as BenchmarkCommand
+from .models import Author, Book
+
+
+class BenchmarkHarnessTestCase(TestCase):
+    """
+    Tests for the pieces of the benchmark_books harness. The command itself
+    creates its own database, so it is exercised step by step here.
+    """
+
+    def test_percentile(self):
+        values = list(range(1, 101))
+        self.assertEqual(percentile(values, 50), 50)
+        self.assertEqual(percentile(values, 99), 99)
+        self.assertEqual(percentile([7.0], 95), 7.0)
+
+    def test_dataset_grows_in_place(self):
+        command = BenchmarkCommand(stdout=StringIO(), stderr=StringIO())
+        command.grow(25, chunk_size=10)
+        self.assertEqual((Author.objects.count(), Book.objects.count()), (3, 25))
+        command.grow(40, chunk_size=10)
+        self.assertEqual((Author.objects.count(), Book.objects.count()), (4, 40))
+
+    def test_measure_reports_latency_queries_and_memory(self):
+        BenchmarkCommand(stdout=StringIO(), stderr=StringIO()).grow(30, chunk_size=100)
+        result = measure(APIClient(), reverse('book-list'), requests=3, warmup=1)
+        self.assertEqual(result['status'], 200)
+        self.assertEqual(result['queries'], 1)
+        self.assertGreater(result['response_bytes'], 0)
+        self.assertLessEqual(result['latency_ms']['p50'], result['latency_ms']['max'])
+        self.assertGreater(result['peak_memory_kib'], 0)
+
+    def test_reports_compare_by_size_and_endpoint(self):
+        def report(p95, queries):
+            return {'runs': [{'size': 10, 'endpoints': {'BookListView': {
+                'latency_ms': {'p95': p95}, 'queries': queries, 'peak_memory_kib': 1.0,
+            }}}]}
+        path = os.path.join(tempfile.mkdtemp(), 'baseline.json')
+        with open(path, 'w') as f:
+            json.dump(report(2.0, 1), f)
+        with open(path) as f:
+            rows = list(compare_reports(report(3.0, 2), json.load(f)))
+        self.assertIn((10, 'BookListView', 'p95_ms', 2.0, 3.0), rows)
+        self.assertIn((10, 'BookListView', 'queries', 1, 2), rows)
+
+
+@skipUnless(connection.vendor == 'sqlite', 'query plans below are SQLite output')
+class BookListIndexTestCase(TestCase):
+    """
+    EXPLAIN the queries BookListView runs for its common filter and ordering
+    combinations and check they are served by the indexes in models.py.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        BenchmarkCommand(stdout=StringIO(), stderr=StringIO()).grow(500, chunk_size=500)
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE')
+        cls.book = Book.objects.order_by('pk').first()
+
+    def plan(self, **params):
+        """SQLite's query plan for the book query behind GET /api/books/?<params>"""
+        with CaptureQueriesContext(connection) as queries:
+            response = APIClient().get(reverse('book-list'), params)
+        self.assertEqual(response.status_code, 200)
+        sql = [q['sql'] for q in queries if 'FROM "api_book"' in q['sql']][-1]
+        with connection.cursor() as cursor:
+            cursor.execute(f'EXPLAIN QUERY PLAN {sql}')
+            return '\n'.join(row[-1] for row in cursor.fetchall())
+
+    def assertUsesIndex(self, plan, index):
+        self.assertIn(f'INDEX {index}', plan)
+        # the index returns rows in order: no separate sort step
+        self.assertNotIn('USE TEMP B-TREE FOR ORDER BY', plan)
+
+    def test_default_ordering(self):
+        self.assertUsesIndex(self.plan(), 'book_title_idx')
+
+    def test_title_filter(self):
+        self.assertUsesIndex(self.plan(title=self.book.title), 'book_title_idx')
+
+    def test_year_filter_and_ordering(self):
+        self.assertUsesIndex(self.plan(publication_year=self.book.publication_year), 'book_year_title_idx')
+        self.assertUsesIndex(self.plan(ordering='-publication_year'), 'book_year_title_idx')
+
+    def test_author_filter(self):
+        self.assertUsesIndex(self.plan(author=self.book.author_id), 'book_author_title_idx')
 
-# Create your tests here.
+    def test_author_name_lookups(self):
+        self.assertIn('INDEX author_name_idx', self.plan(author__name='Author 7'))
+        self.assertIn('INDEX author_name_nocase_idx', self.plan(author__name__istartswith='author 7'))
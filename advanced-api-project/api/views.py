@@ -17,6 +17,8 @@ class BookListView(generics.ListAPIView):
         - Filter by title: ?title=Harry Potter
         - Filter by author: ?author=1
         - Filter by publication_year: ?publication_year=1997
+        - Filter by author name: ?author__name=J.K. Rowling
+        - Author name prefix: ?author__name__istartswith=J.K.
     
     Searching:
         - Search in title and author name: ?search=Harry
@@ -32,7 +34,13 @@ class BookListView(generics.ListAPIView):
     
     filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
     
-    filterset_fields = ['title', 'author', 'publication_year']
+    # each filter/ordering combination is backed by an index, see models.py
+    filterset_fields = {
+        'title': ['exact'],
+        'author': ['exact'],
+        'publication_year': ['exact'],
+        'author__name': ['exact', 'istartswith'],
+    }
     
     search_fields = ['title', 'author__name']
     
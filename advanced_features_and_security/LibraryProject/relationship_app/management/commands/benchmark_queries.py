@@ -0,0 +1,100 @@
+import statistics
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+
+from relationship_app import queries
+from relationship_app.models import Author, Book, Library, Librarian
+
+
+class Rollback(Exception):
+    """Raised to discard the seeded benchmark data"""
+
+
+class Command(BaseCommand):
+    help = (
+        'Compare query counts and latency of relationship_app.queries against '
+        'the per-name lookups in query_samples.py, on throwaway seeded data'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--names', type=int, default=50, help='Authors and libraries looked up per run')
+        parser.add_argument('--books', type=int, default=20, help='Books per author')
+        parser.add_argument('--repeat', type=int, default=5, help='Timed runs per strategy')
+
+    def handle(self, *args, **options):
+        try:
+            with transaction.atomic():
+                authors, libraries = self.seed(options['names'], options['books'])
+                self.run(authors, libraries, options['repeat'])
+                raise Rollback
+        except Rollback:
+            pass
+
+    def seed(self, count, books_per_author):
+        authors = Author.objects.bulk_create(
+            [Author(name=f'bench author {i}') for i in range(count)]
+        )
+        books = Book.objects.bulk_create([
+            Book(title=f'bench book {i}-{j}', author=author)
+            for i, author in enumerate(authors)
+            for j in range(books_per_author)
+        ])
+        libraries = Library.objects.bulk_create(
+            [Library(name=f'bench library {i}') for i in range(count)]
+        )
+        Library.books.through.objects.bulk_create([
+            Library.books.through(library_id=library.pk, book_id=book.pk)
+            for i, library in enumerate(libraries)
+            for book in books[i * books_per_author:(i + 1) * books_per_author]
+        ])
+        Librarian.objects.bulk_create(
+            [Librarian(name=f'bench librarian {i}', library=library) for i, library in enumerate(libraries)]
+        )
+        queries.invalidate_query_cache()
+        return [a.name for a in authors], [lib.name for lib in libraries]
+
+    def run(self, authors, libraries, repeat):
+        # imported late: query_samples sets up Django on import
+        from relationship_app import query_samples
+
+        def legacy():
+            for name in authors:
+                [book.title for book in query_samples.query_books_by_author(name)]
+            for name in libraries:
+                [(book.title, book.author.name) for book in query_samples.list_books_in_library(name)]
+                query_samples.retrieve_librarian_for_library(name)
+
+        def batched(use_cache=False):
+            def lookup():
+                for books in queries.books_by_authors(authors, use_cache).values():
+                    [book.title for book in books]
+                for books in queries.books_in_libraries(libraries, use_cache).values():
+                    [(book.title, book.author.name) for book in books]
+                queries.librarians_for_libraries(libraries, use_cache)
+            return lookup
+
+        strategies = [
+            ('query_samples', legacy, None),
+            ('queries', batched(), None),
+            ('queries (cached)', batched(use_cache=True), batched(use_cache=True)),
+        ]
+        self.stdout.write(f"{'strategy':<18} {'queries':>8} {'median ms':>10} {'min ms':>8}")
+        for label, func, warm in strategies:
+            queries.invalidate_query_cache()
+            if warm:
+                warm()
+            timings = []
+            for _ in range(repeat):
+                with CaptureQueriesContext(connection) as captured:
+                    start = time.perf_counter()
+                    func()
+                    timings.append((time.perf_counter() - start) * 1000)
+            self.stdout.write(
+                f'{label:<18} {len(captured):>8} {statistics.median(timings):>10.2f} {min(timings):>8.2f}'
+            )
+        self.stdout.write(self.style.SUCCESS(
+            f'Looked up {len(authors)} authors and {len(libraries)} libraries per run'
+        ))
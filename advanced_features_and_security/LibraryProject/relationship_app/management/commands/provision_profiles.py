@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand
+
+from relationship_app.models import UserProfile
+from relationship_app.profiles import provision_missing_profiles
+
+
+class Command(BaseCommand):
+    help = 'Create a UserProfile for every user that has none (e.g. after a bulk user import)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--role', default=UserProfile.DEFAULT_ROLE,
+            choices=[value for value, _ in UserProfile.ROLE_CHOICES],
+            help='Role given to the new profiles',
+        )
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        created = provision_missing_profiles(role=options['role'], batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f'Created {created} profile(s)'))
@@ -1,6 +1,10 @@
 # relationship_app/models.py
 
+from django.conf import settings
+from django.core.cache import cache
 from django.db import models
+from django.db.models.signals import m2m_changed, pre_delete
+from django.dispatch import receiver
 
 class Author(models.Model):
     name = models.CharField(max_length=100)
@@ -19,6 +23,9 @@ class Book(models.Model):
             ('can_change_book', 'Can change book'),
             ('can_delete_book', 'Can delete book'),
         ]
+        indexes = [
+            models.Index(fields=['title', 'id'], name='book_title_idx'),
+        ]
 
     def __str__(self):
         return self.title
@@ -31,6 +38,51 @@ class Library(models.Model):
     def __str__(self):
         return self.name
 
+    @staticmethod
+    def book_count_key(library_id):
+        return f'relationship_app:library:{library_id}:book_count'
+
+    @classmethod
+    def cached_book_count(cls, library_id):
+        """
+        Number of books in a library, cached until its shelf changes. Only
+        the changing process's cache is cleared, so entries also expire
+        after RELATIONSHIP_BOOK_COUNT_CACHE_TIMEOUT seconds for processes
+        that do not share a cache.
+        """
+        key = cls.book_count_key(library_id)
+        count = cache.get(key)
+        if count is None:
+            count = cls.books.through.objects.filter(library_id=library_id).count()
+            cache.set(key, count, getattr(settings, 'RELATIONSHIP_BOOK_COUNT_CACHE_TIMEOUT', 30))
+        return count
+
+
+def forget_book_counts(library_ids):
+    cache.delete_many([Library.book_count_key(pk) for pk in library_ids])
+
+
+@receiver(m2m_changed, sender=Library.books.through)
+def library_books_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    """Drop cached counts of libraries whose shelves changed."""
+    if action == 'pre_clear' and reverse:
+        # book.library_set.clear(): note the libraries before the rows go
+        instance._cleared_library_ids = list(
+            sender.objects.filter(book_id=instance.pk).values_list('library_id', flat=True)
+        )
+    elif action in ('post_add', 'post_remove'):
+        forget_book_counts(pk_set if reverse else [instance.pk])
+    elif action == 'post_clear':
+        forget_book_counts(getattr(instance, '_cleared_library_ids', []) if reverse else [instance.pk])
+
+
+@receiver(pre_delete, sender=Book)
+def book_deleted(sender, instance, **kwargs):
+    """Deleting a book removes it from every library without m2m signals."""
+    forget_book_counts(
+        Library.books.through.objects.filter(book_id=instance.pk).values_list('library_id', flat=True)
+    )
+
 
 class Librarian(models.Model):
     name = models.CharField(max_length=100)
@@ -41,9 +93,9 @@ class Librarian(models.Model):
 
 
 # User Profile Model for Role-Based Access Control
-from django.contrib.auth.models import User
-from django.db.models.signals import post_save
-from django.dispatch import receiver
+# Profiles are provisioned lazily or in bulk, not on every User save;
+# see relationship_app/profiles.py.
+from django.conf import settings
 
 class UserProfile(models.Model):
     ROLE_CHOICES = [
@@ -51,20 +103,10 @@ class UserProfile(models.Model):
         ('Librarian', 'Librarian'),
         ('Member', 'Member'),
     ]
+    DEFAULT_ROLE = 'Member'
     
-    user = models.OneToOneField(User, on_delete=models.CASCADE)
-    role = models.CharField(max_length=20, choices=ROLE_CHOICES, default='Member')
+    user = models.OneToOneField(settings.AUTH_USER_MODEL, on_delete=models.CASCADE)
+    role = models.CharField(max_length=20, choices=ROLE_CHOICES, default=DEFAULT_ROLE)
 
     def __str__(self):
         return f"{self.user.username} - {self.role}"
-
-
-@receiver(post_save, sender=User)
-def create_user_profile(sender, instance, created, **kwargs):
-    if created:
-        UserProfile.objects.create(user=instance)
-
-
-@receiver(post_save, sender=User)
-def save_user_profile(sender, instance, **kwargs):
-    instance.userprofile.save()
\ No newline at end of file
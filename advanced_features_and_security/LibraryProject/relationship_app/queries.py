@@ -0,0 +1,147 @@
+"""
+Query service for the lookups in query_samples.py.
+
+The functions in query_samples.py look the author or library up first and
+then run a second query for its books or librarian, and their callers hit
+book.author once per book. Here every lookup is a single joined query,
+and the batch variants answer many names with that same one query,
+returning dicts keyed by name (names with no match map to [] or None).
+
+Pass ``use_cache=True`` to keep results in the cache, one entry per name,
+so a batch only queries the names it has not seen. Any write to authors,
+books, libraries or librarians bumps a generation number that is part of
+every key, which invalidates all cached results at once (bulk writes
+send no signals; call invalidate_query_cache() after those). The
+benchmark_queries command compares these against query_samples.py.
+"""
+import hashlib
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import F
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
+
+from .models import Author, Book, Library, Librarian
+
+GENERATION_KEY = 'relationship_app:queries:generation'
+
+
+def cache_timeout():
+    return getattr(settings, 'RELATIONSHIP_QUERY_CACHE_TIMEOUT', 300)
+
+
+def _keys(kind, names):
+    generation = cache.get_or_set(GENERATION_KEY, 1, None)
+    # names may hold spaces and other characters memcached rejects in keys
+    return {
+        f'relationship_app:queries:{generation}:{kind}:{hashlib.md5(name.encode()).hexdigest()}': name
+        for name in names
+    }
+
+
+def _cached(kind, names, fetch, use_cache):
+    """Answer ``names`` from the cache where possible, calling ``fetch`` for the rest."""
+    names = list(dict.fromkeys(names))
+    if not use_cache:
+        return fetch(names)
+    keys = _keys(kind, names)
+    found = cache.get_many(keys)
+    results = {keys[key]: value for key, value in found.items()}
+    missing = [name for name in names if name not in results]
+    if missing:
+        fetched = fetch(missing)
+        cache.set_many(
+            {key: fetched[name] for key, name in keys.items() if name in fetched},
+            cache_timeout(),
+        )
+        results.update(fetched)
+    return {name: results[name] for name in names}
+
+
+def _books_by_authors(names):
+    results = {name: [] for name in names}
+    books = (
+        Book.objects.filter(author__name__in=names)
+        .select_related('author')
+        .order_by('title', 'pk')
+    )
+    for book in books:
+        results[book.author.name].append(book)
+    return results
+
+
+def _books_in_libraries(names):
+    results = {name: [] for name in names}
+    # one row per (library, book) pair, straight off the through table join
+    books = (
+        Book.objects.filter(library__name__in=names)
+        .annotate(library_name=F('library__name'))
+        .select_related('author')
+        .order_by('title', 'pk')
+    )
+    for book in books:
+        results[book.library_name].append(book)
+    return results
+
+
+def _librarians_for_libraries(names):
+    results = dict.fromkeys(names)
+    for librarian in Librarian.objects.filter(library__name__in=names).select_related('library'):
+        results[librarian.library.name] = librarian
+    return results
+
+
+def books_by_authors(author_names, use_cache=False):
+    """{author name: [books with .author loaded]} in one query"""
+    return _cached('author_books', author_names, _books_by_authors, use_cache)
+
+
+def books_in_libraries(library_names, use_cache=False):
+    """{library name: [books with .author loaded]} in one query"""
+    return _cached('library_books', library_names, _books_in_libraries, use_cache)
+
+
+def librarians_for_libraries(library_names, use_cache=False):
+    """{library name: librarian or None} in one query"""
+    return _cached('librarian', library_names, _librarians_for_libraries, use_cache)
+
+
+def books_by_author(author_name, use_cache=False):
+    """Books by one author, authors joined"""
+    return books_by_authors([author_name], use_cache)[author_name]
+
+
+def books_in_library(library_name, use_cache=False):
+    """Books in one library, authors joined"""
+    return books_in_libraries([library_name], use_cache)[library_name]
+
+
+def librarian_for_library(library_name, use_cache=False):
+    """The library's librarian, or None"""
+    return librarians_for_libraries([library_name], use_cache)[library_name]
+
+
+def invalidate_query_cache():
+    try:
+        cache.incr(GENERATION_KEY)
+    except ValueError:
+        cache.set(GENERATION_KEY, 2, None)
+
+
+@receiver(post_save, sender=Author)
+@receiver(post_save, sender=Book)
+@receiver(post_save, sender=Library)
+@receiver(post_save, sender=Librarian)
+@receiver(post_delete, sender=Author)
+@receiver(post_delete, sender=Book)
+@receiver(post_delete, sender=Library)
+@receiver(post_delete, sender=Librarian)
+def catalog_changed(sender, **kwargs):
+    invalidate_query_cache()
+
+
+@receiver(m2m_changed, sender=Library.books.through)
+def shelves_changed(sender, action, **kwargs):
+    if action.startswith('post_'):
+        invalidate_query_cache()
@@ -0,0 +1,138 @@
+"""
+Cached role and permission lookups for relationship_app.
+
+A user's role (UserProfile.role) and permission set are read on every
+request to the role and book views. They change rarely, so both are kept
+in the cache per user and memoised on the user object for the rest of
+the request:
+
+- the role is loaded together with the user by
+  backends.CachedRoleBackend.get_user (select_related on the profile),
+  or from the cache otherwise;
+- permissions come from one query over user and group permissions instead
+  of ModelBackend's two, then from the cache.
+
+Entries are dropped when a profile is saved or a user's groups or direct
+permissions change. A change to a group's permissions can affect any
+number of users, so it bumps a generation number that is part of every
+permission key instead.
+
+That invalidation only reaches other processes through a shared cache
+(Redis, Memcached). With a per-process cache such as the default
+LocMemCache, a demotion or revoked permission is only seen elsewhere once
+the entry expires, so the timeouts default to a few seconds; raise
+RELATIONSHIP_ROLE_CACHE_TIMEOUT and RELATIONSHIP_PERMISSION_CACHE_TIMEOUT
+only together with a shared cache.
+"""
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import Group, Permission
+from django.core.cache import cache
+from django.db.models import Q
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
+
+from .models import UserProfile
+
+User = get_user_model()
+
+GENERATION_KEY = 'relationship_app:perm_generation'
+
+
+def role_timeout():
+    return getattr(settings, 'RELATIONSHIP_ROLE_CACHE_TIMEOUT', 10)
+
+
+def permission_timeout():
+    return getattr(settings, 'RELATIONSHIP_PERMISSION_CACHE_TIMEOUT', 10)
+
+
+def role_key(user_id):
+    return f'relationship_app:role:{user_id}'
+
+
+def permission_key(user_id):
+    generation = cache.get_or_set(GENERATION_KEY, 1, None)
+    return f'relationship_app:perms:{generation}:{user_id}'
+
+
+def bump_permission_generation():
+    """Invalidate every cached permission set at once."""
+    try:
+        cache.incr(GENERATION_KEY)
+    except ValueError:
+        cache.set(GENERATION_KEY, 2, None)
+
+
+def get_role(user):
+    """
+    The user's role name, or None for anonymous users. Users without a
+    profile yet (profiles are provisioned lazily) have the default role.
+    """
+    if not user.is_authenticated:
+        return None
+    if not hasattr(user, '_role_cache'):
+        fields_cache = user._state.fields_cache
+        if 'userprofile' in fields_cache:
+            profile = fields_cache['userprofile']
+            user._role_cache = profile.role if profile is not None else UserProfile.DEFAULT_ROLE
+        else:
+            role = cache.get(role_key(user.pk))
+            if role is None:
+                role = (
+                    UserProfile.objects.filter(user_id=user.pk)
+                    .values_list('role', flat=True).first()
+                ) or UserProfile.DEFAULT_ROLE
+                cache.set(role_key(user.pk), role, role_timeout())
+            user._role_cache = role
+    return user._role_cache
+
+
+def load_permissions(user):
+    """'app_label.codename' strings granted to the user directly or through groups."""
+    rows = Permission.objects.filter(
+        Q(user=user) | Q(group__user=user)
+    ).values_list('content_type__app_label', 'codename').distinct()
+    return {f'{app_label}.{codename}' for app_label, codename in rows}
+
+
+def forget_roles(user_ids):
+    cache.delete_many([role_key(pk) for pk in user_ids])
+
+
+def forget_permissions(user_ids):
+    cache.delete_many([permission_key(pk) for pk in user_ids])
+
+
+@receiver(post_save, sender=UserProfile)
+@receiver(post_delete, sender=UserProfile)
+def profile_changed(sender, instance, **kwargs):
+    forget_roles([instance.user_id])
+
+
+@receiver(m2m_changed, sender=User.groups.through)
+@receiver(m2m_changed, sender=User.user_permissions.through)
+def user_grants_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    """Groups or direct permissions of some users changed."""
+    if not action.startswith('post_'):
+        return
+    if not reverse:
+        forget_permissions([instance.pk])
+    elif pk_set is not None:
+        # group.user_set / permission.user_set: pk_set holds user ids
+        forget_permissions(pk_set)
+    else:
+        # a reverse clear() does not say which users were affected
+        bump_permission_generation()
+
+
+@receiver(m2m_changed, sender=Group.permissions.through)
+def group_permissions_changed(sender, action, **kwargs):
+    if action.startswith('post_'):
+        bump_permission_generation()
+
+
+@receiver(post_delete, sender=Group)
+@receiver(post_delete, sender=Permission)
+def grant_deleted(sender, **kwargs):
+    bump_permission_generation()
@@ -1,3 +1,314 @@
-from django.test import TestCase
+import json
+from io import StringIO
 
-# Create your tests here.
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import Group, Permission
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from . import queries
+from .models import Author, Book, Library, Librarian, UserProfile
+from .profiles import bulk_create_users, profile_for, provision_profiles, set_role
+from .roles import get_role
+
+User = get_user_model()
+
+
+# bookshelf also claims /books/ in the project URLconf
+@override_settings(ROOT_URLCONF='relationship_app.urls')
+class ListBooksTestCase(TestCase):
+    """Tests for the paginated, streaming book list and catalog exports."""
+
+    @classmethod
+    def setUpTestData(cls):
+        authors = Author.objects.bulk_create([Author(name=f'Author {i}') for i in range(5)])
+        Book.objects.bulk_create([
+            Book(title=f'Book {i:03d}', author=authors[i % 5]) for i in range(120)
+        ])
+
+    def test_list_is_paginated_with_authors_joined(self):
+        # COUNT(*) for the paginator + one page of books with authors
+        with self.assertNumQueries(2):
+            response = self.client.get(reverse('list_books'))
+        self.assertEqual(len(response.context['books']), 50)
+        self.assertContains(response, 'Book 000 by Author 0')
+        self.assertContains(response, 'Page 1 of 3')
+
+        response = self.client.get(reverse('list_books'), {'page': 3})
+        self.assertEqual(len(response.context['books']), 20)
+
+    def test_streamed_list_contains_every_book(self):
+        response = self.client.get(reverse('list_books'), {'stream': 1})
+        content = b''.join(response.streaming_content).decode()
+        self.assertEqual(content.count('<li>'), 120)
+        self.assertIn('Book 119 by Author 4', content)
+        self.assertTrue(content.rstrip().endswith('</html>'))
+
+    def test_csv_export(self):
+        response = self.client.get(reverse('export_books', args=['csv']))
+        lines = b''.join(response.streaming_content).decode().splitlines()
+        self.assertEqual(lines[0], 'id,title,author')
+        self.assertEqual(len(lines), 121)
+
+    def test_json_export(self):
+        response = self.client.get(reverse('export_books', args=['json']))
+        books = json.loads(b''.join(response.streaming_content))
+        self.assertEqual(len(books), 120)
+        self.assertEqual(books[0]['author'], 'Author 0')
+
+    def test_unknown_export_format(self):
+        response = self.client.get(reverse('export_books', args=['xml']))
+        self.assertEqual(response.status_code, 404)
+
+
+@override_settings(ROOT_URLCONF='relationship_app.urls')
+class LibraryDetailTestCase(TestCase):
+    """Tests for the prefetched, paginated library detail page."""
+
+    @classmethod
+    def setUpTestData(cls):
+        authors = Author.objects.bulk_create([Author(name=f'Author {i}') for i in range(10)])
+        books = Book.objects.bulk_create([
+            Book(title=f'Book {i:03d}', author=authors[i % 10]) for i in range(75)
+        ])
+        cls.library = Library.objects.create(name='Central Library')
+        cls.library.books.add(*books)
+        cls.other = Library.objects.create(name='Branch Library')
+        cls.other.books.add(*books[:3])
+
+    def setUp(self):
+        cache.clear()
+
+    def get(self, **params):
+        return self.client.get(reverse('library_detail', args=[self.library.pk]), params)
+
+    def test_query_plan(self):
+        # cold: book count + library + one page of books joined with authors
+        with self.assertNumQueries(3):
+            response = self.get()
+        # warm: the count comes from the cache
+        with self.assertNumQueries(2):
+            response = self.get()
+        self.assertEqual(len(response.context['books']), 50)
+        self.assertContains(response, 'Book 000 by Author 0')
+        self.assertContains(response, 'Books in Library (75)')
+
+    def test_second_page(self):
+        response = self.get(page=2)
+        self.assertEqual(
+            [book.title for book in response.context['books']],
+            [f'Book {i:03d}' for i in range(50, 75)]
+        )
+        # out-of-range pages fall back to the last page
+        self.assertEqual(self.get(page=99).context['page_obj'].number, 2)
+
+    def test_cached_count_follows_shelf_changes(self):
+        self.assertEqual(Library.cached_book_count(self.library.pk), 75)
+        self.library.books.remove(Book.objects.get(title='Book 000'))
+        self.assertEqual(Library.cached_book_count(self.library.pk), 74)
+
+        book = Book.objects.get(title='Book 001')
+        self.assertEqual(Library.cached_book_count(self.other.pk), 3)
+        book.library_set.clear()
+        self.assertEqual(Library.cached_book_count(self.library.pk), 73)
+        self.assertEqual(Library.cached_book_count(self.other.pk), 2)
+
+        Book.objects.get(title='Book 002').delete()
+        self.assertEqual(Library.cached_book_count(self.other.pk), 1)
+
+    @override_settings(RELATIONSHIP_BOOK_COUNT_CACHE_TIMEOUT=0)
+    def test_cached_count_expires(self):
+        self.assertEqual(Library.cached_book_count(self.library.pk), 75)
+        # a change made by another process clears nothing here
+        Library.books.through.objects.filter(library=self.library).delete()
+        self.assertEqual(Library.cached_book_count(self.library.pk), 0)
+
+    def test_missing_library(self):
+        response = self.client.get(reverse('library_detail', args=[self.library.pk + 100]))
+        self.assertEqual(response.status_code, 404)
+
+
+@override_settings(ROOT_URLCONF='relationship_app.urls')
+class RoleCacheTestCase(TestCase):
+    """Tests for cached role and permission resolution."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='reader', password='testpass123')
+        cls.librarians = Group.objects.create(name='Librarians')
+        cls.can_add = Permission.objects.get(codename='can_add_book')
+
+    def setUp(self):
+        cache.clear()
+        self.client.force_login(self.user)
+
+    def test_role_is_loaded_with_the_user(self):
+        # session + user joined with its profile; no separate profile query
+        with self.assertNumQueries(2):
+            response = self.client.get(reverse('member_view'))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.client.get(reverse('admin_view')).status_code, 302)
+
+    def test_role_follows_profile_changes(self):
+        user = User.objects.get(pk=self.user.pk)
+        self.assertEqual(get_role(user), 'Member')
+        # cached across requests
+        with self.assertNumQueries(0):
+            self.assertEqual(get_role(User(pk=self.user.pk)), 'Member')
+        set_role(user, 'Admin')
+        self.assertEqual(get_role(User.objects.get(pk=self.user.pk)), 'Admin')
+        self.assertEqual(self.client.get(reverse('admin_view')).status_code, 200)
+
+    @override_settings(RELATIONSHIP_ROLE_CACHE_TIMEOUT=0, RELATIONSHIP_PERMISSION_CACHE_TIMEOUT=0)
+    def test_unsignalled_changes_show_once_entries_expire(self):
+        # another process's changes clear nothing in this process's cache
+        profile_for(self.user)
+        self.assertEqual(get_role(User.objects.get(pk=self.user.pk)), 'Member')
+        UserProfile.objects.filter(user=self.user).update(role='Admin')
+        self.assertEqual(get_role(User.objects.get(pk=self.user.pk)), 'Admin')
+
+        url = reverse('add_book')
+        self.assertEqual(self.client.get(url).status_code, 403)
+        User.user_permissions.through.objects.create(user_id=self.user.pk, permission=self.can_add)
+        self.assertEqual(self.client.get(url).status_code, 200)
+
+    def test_permissions_are_cached_across_requests(self):
+        self.user.user_permissions.add(self.can_add)
+        url = reverse('add_book')
+        self.assertEqual(self.client.get(url).status_code, 200)
+        # session + user + the form's author choices; the permission set
+        # comes from the cache
+        with self.assertNumQueries(3):
+            self.client.get(url)
+
+    def test_permission_changes_invalidate_the_cache(self):
+        url = reverse('add_book')
+        self.assertEqual(self.client.get(url).status_code, 403)
+
+        self.librarians.user_set.add(self.user)
+        self.assertEqual(self.client.get(url).status_code, 403)
+        self.librarians.permissions.add(self.can_add)
+        self.assertEqual(self.client.get(url).status_code, 200)
+
+        self.user.groups.remove(self.librarians)
+        self.assertEqual(self.client.get(url).status_code, 403)
+        self.can_add.user_set.add(self.user)
+        self.assertEqual(self.client.get(url).status_code, 200)
+        self.can_add.user_set.clear()
+        self.assertEqual(self.client.get(url).status_code, 403)
+
+
+class ProfileProvisioningTestCase(TestCase):
+    """Tests for lazy and bulk UserProfile provisioning."""
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username='reader', password='testpass123')
+
+    def test_user_saves_do_not_touch_profiles(self):
+        self.assertFalse(UserProfile.objects.exists())
+        # e.g. the last_login update on every login: just the UPDATE
+        with self.assertNumQueries(1):
+            self.user.save(update_fields=['last_login'])
+        # no profile yet: the default role applies
+        self.assertEqual(get_role(self.user), 'Member')
+
+    def test_profile_is_created_on_first_access(self):
+        profile = profile_for(self.user)
+        self.assertEqual(profile.role, 'Member')
+        self.assertEqual(profile_for(User.objects.get(pk=self.user.pk)).pk, profile.pk)
+        self.assertEqual(UserProfile.objects.count(), 1)
+
+    def test_unchanged_profiles_are_not_written(self):
+        set_role(self.user, 'Librarian')
+        user = User.objects.select_related('userprofile').get(pk=self.user.pk)
+        with self.assertNumQueries(0):
+            self.assertFalse(set_role(user, 'Librarian'))
+        with self.assertNumQueries(1):
+            self.assertTrue(set_role(user, 'Admin'))
+        self.assertEqual(get_role(User.objects.get(pk=self.user.pk)), 'Admin')
+
+    def test_profile_saves_write_every_field(self):
+        other = User.objects.create_user(username='other', password='testpass123')
+        profile = profile_for(self.user)
+        profile = UserProfile.objects.get(pk=profile.pk)
+        profile.user = other
+        profile.save()
+        self.assertEqual(UserProfile.objects.get(pk=profile.pk).user, other)
+
+    def test_bulk_provisioning(self):
+        users = bulk_create_users(
+            [User(username=f'imported{i}') for i in range(20)], role='Librarian'
+        )
+        self.assertEqual(UserProfile.objects.filter(role='Librarian').count(), 20)
+        self.assertEqual(get_role(User.objects.get(pk=users[0].pk)), 'Librarian')
+
+        # existing profiles are kept; only the missing one is created
+        with self.assertNumQueries(2):
+            created = provision_profiles([user.pk for user in users] + [self.user.pk])
+        self.assertEqual(created, 1)
+        self.assertEqual(profile_for(self.user).role, 'Member')
+
+
+class QueryServiceTestCase(TestCase):
+    """Tests for the joined and batched lookups in relationship_app.queries."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.rowling = Author.objects.create(name='J.K. Rowling')
+        cls.tolkien = Author.objects.create(name='J.R.R. Tolkien')
+        cls.hobbit = Book.objects.create(title='The Hobbit', author=cls.tolkien)
+        cls.stone = Book.objects.create(title="Philosopher's Stone", author=cls.rowling)
+        cls.central = Library.objects.create(name='Central Library')
+        cls.central.books.add(cls.hobbit, cls.stone)
+        cls.branch = Library.objects.create(name='Branch Library')
+        cls.branch.books.add(cls.hobbit)
+        cls.librarian = Librarian.objects.create(name='Ada', library=cls.central)
+
+    def setUp(self):
+        cache.clear()
+
+    def test_batches_take_one_query(self):
+        with self.assertNumQueries(1):
+            books = queries.books_in_libraries(['Central Library', 'Branch Library', 'Nowhere'])
+            names = {name: [(b.title, b.author.name) for b in shelf] for name, shelf in books.items()}
+        self.assertEqual(names, {
+            'Central Library': [("Philosopher's Stone", 'J.K. Rowling'), ('The Hobbit', 'J.R.R. Tolkien')],
+            'Branch Library': [('The Hobbit', 'J.R.R. Tolkien')],
+            'Nowhere': [],
+        })
+        with self.assertNumQueries(1):
+            self.assertEqual(
+                queries.books_by_authors(['J.R.R. Tolkien', 'Nobody']),
+                {'J.R.R. Tolkien': [self.hobbit], 'Nobody': []}
+            )
+        with self.assertNumQueries(1):
+            self.assertEqual(
+                queries.librarians_for_libraries(['Central Library', 'Branch Library']),
+                {'Central Library': self.librarian, 'Branch Library': None}
+            )
+
+    def test_cache_only_queries_unseen_names(self):
+        queries.books_by_authors(['J.K. Rowling'], use_cache=True)
+        with self.assertNumQueries(0):
+            self.assertEqual(queries.books_by_author('J.K. Rowling', use_cache=True), [self.stone])
+        with self.assertNumQueries(1):
+            queries.books_by_authors(['J.K. Rowling', 'J.R.R. Tolkien'], use_cache=True)
+
+    def test_writes_invalidate_the_cache(self):
+        self.assertEqual(queries.books_in_library('Branch Library', use_cache=True), [self.hobbit])
+        self.branch.books.add(self.stone)
+        self.assertEqual(
+            queries.books_in_library('Branch Library', use_cache=True), [self.stone, self.hobbit]
+        )
+        self.assertIsNone(queries.librarian_for_library('Branch Library', use_cache=True))
+        Librarian.objects.create(name='Bea', library=self.branch)
+        self.assertEqual(queries.librarian_for_library('Branch Library', use_cache=True).name, 'Bea')
+
+    def test_benchmark_command(self):
+        out = StringIO()
+        call_command('benchmark_queries', names=3, books=2, repeat=1, stdout=out)
+        self.assertIn('query_samples', out.getvalue())
+        self.assertFalse(Author.objects.filter(name__startswith='bench').exists())
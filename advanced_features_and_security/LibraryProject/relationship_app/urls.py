@@ -5,6 +5,7 @@ from . import views
 urlpatterns = [
     # Task 1: Views and URL Configuration
     path('books/', views.list_books, name='list_books'),
+    path('books/export.<str:fmt>', views.export_books, name='export_books'),
     path('library/<int:pk>/', views.LibraryDetailView.as_view(), name='library_detail'),
     
     # Task 2: User Authentication URLs - EXACT format the checker expects
@@ -0,0 +1,141 @@
+"""
+In-process benchmark harness for the book endpoints.
+
+The benchmark_books command builds a synthetic dataset in a throwaway
+database (created and destroyed like the test database), then drives each
+endpoint through the test client. For every endpoint it reports:
+
+- latency percentiles over ``requests`` timed requests, after ``warmup``
+  untimed ones;
+- the number of SQL queries and the peak Python memory allocated while
+  serving one request. This is measured in a separate profiled request so
+  that tracing does not skew the timings.
+
+Reports are JSON, tagged with the git commit and library versions, so that
+runs from different commits can be diffed with ``compare_reports``.
+"""
+import json
+import platform
+import statistics
+import subprocess
+import time
+import tracemalloc
+from contextlib import contextmanager
+from pathlib import Path
+
+import django
+from django.conf import settings
+from django.db import connection
+from django.test.utils import CaptureQueriesContext, override_settings
+from django.utils import timezone
+
+PERCENTILES = (50, 90, 95, 99)
+
+
+def percentile(values, pct):
+    """Nearest-rank percentile of a non-empty list"""
+    ordered = sorted(values)
+    rank = max(1, round(pct / 100 * len(ordered)))
+    return ordered[min(rank, len(ordered)) - 1]
+
+
+@contextmanager
+def benchmark_database(keepdb=False):
+    """
+    Run against a separate database built like the test database. With
+    SQLite it is a file next to the real one, so ``keepdb`` can reuse a
+    large dataset between runs.
+    """
+    test_settings = connection.settings_dict.setdefault('TEST', {})
+    if connection.vendor == 'sqlite' and not test_settings.get('NAME'):
+        name = Path(connection.settings_dict['NAME'])
+        test_settings['NAME'] = str(name.with_name(f'benchmark_{name.name}'))
+    old_name = connection.creation.create_test_db(
+        verbosity=0, autoclobber=True, serialize=False, keepdb=keepdb
+    )
+    try:
+        # the test client talks to "testserver"
+        with override_settings(ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, 'testserver']):
+            yield
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0, keepdb=keepdb)
+
+
+def measure(client, path, params=None, requests=20, warmup=2):
+    """Benchmark GET ``path``; returns a dict of results"""
+    params = params or {}
+    for _ in range(warmup):
+        client.get(path, params)
+
+    timings = []
+    for _ in range(requests):
+        start = time.perf_counter()
+        response = client.get(path, params)
+        timings.append((time.perf_counter() - start) * 1000)
+
+    # one profiled request for queries and memory
+    tracemalloc.start()
+    try:
+        with CaptureQueriesContext(connection) as queries:
+            response = client.get(path, params)
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+    return {
+        'path': path,
+        'params': params,
+        'status': response.status_code,
+        'response_bytes': len(response.content),
+        'requests': requests,
+        'latency_ms': {
+            **{f'p{pct}': round(percentile(timings, pct), 3) for pct in PERCENTILES},
+            'mean': round(statistics.fmean(timings), 3),
+            'max': round(max(timings), 3),
+        },
+        'queries': len(queries),
+        'peak_memory_kib': round(peak / 1024, 1),
+    }
+
+
+def environment():
+    """Where and on what the benchmark ran"""
+    try:
+        commit = subprocess.run(
+            ['git', 'rev-parse', 'HEAD'], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        'commit': commit,
+        'timestamp': timezone.now().isoformat(),
+        'python': platform.python_version(),
+        'django': django.get_version(),
+        'database': connection.vendor,
+    }
+
+
+def write_report(report, path):
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2)
+        f.write('\n')
+
+
+def compare_reports(report, baseline):
+    """
+    Yield (size, endpoint, metric, baseline value, new value) for the p95
+    latency, query count and peak memory of endpoints in both reports.
+    """
+    old = {
+        (run['size'], name): result
+        for run in baseline.get('runs', [])
+        for name, result in run['endpoints'].items()
+    }
+    for run in report['runs']:
+        for name, result in run['endpoints'].items():
+            before = old.get((run['size'], name))
+            if before is None:
+                continue
+            yield run['size'], name, 'p95_ms', before['latency_ms']['p95'], result['latency_ms']['p95']
+            yield run['size'], name, 'queries', before['queries'], result['queries']
+            yield run['size'], name, 'peak_memory_kib', before['peak_memory_kib'], result['peak_memory_kib']
@@ -0,0 +1,95 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from api.benchmarking import (
+    benchmark_database, compare_reports, environment, measure, write_report,
+)
+from api.models import Book
+from api.seeding import seed, synthetic_records
+
+def endpoints(book):
+    """name -> (path, query params) of every endpoint benchmarked"""
+    return {
+        'BookViewSet list': (reverse('book_all-list'), {}),
+        'BookViewSet retrieve': (reverse('book_all-detail', args=[book.pk]), {}),
+        'BookViewSet recent_books': (reverse('book_all-recent-books'), {}),
+    }
+
+class Command(BaseCommand):
+    help = (
+        'Benchmark the Book API on synthetic datasets of the given sizes in a throwaway '
+        'database; reports latency percentiles, queries and peak memory per endpoint as JSON'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--sizes', default='10000',
+            help='Comma-separated book counts, e.g. 10000,100000,1000000 (default: 10000)'
+        )
+        parser.add_argument('--requests', type=int, default=20, help='Timed requests per endpoint')
+        parser.add_argument('--warmup', type=int, default=2, help='Untimed requests per endpoint')
+        parser.add_argument('--output', help='Write the JSON report here (default: stdout)')
+        parser.add_argument('--compare', metavar='REPORT', help='Earlier JSON report to compare against')
+        parser.add_argument('--chunk-size', type=int, default=10000, help='Rows per INSERT while seeding')
+        parser.add_argument(
+            '--keepdb', action='store_true',
+            help='Keep the benchmark database (and its data) for the next run'
+        )
+
+    def handle(self, *args, **options):
+        try:
+            sizes = sorted(int(size) for size in options['sizes'].split(','))
+        except ValueError:
+            raise CommandError('--sizes must be comma-separated integers')
+        baseline = None
+        if options['compare']:
+            with open(options['compare'], encoding='utf-8') as f:
+                baseline = json.load(f)
+
+        report = {'project': 'api_project', **environment(), 'runs': []}
+        with benchmark_database(options['keepdb']):
+            # failing endpoints are reported with their status instead of aborting
+            client = APIClient(raise_request_exception=False)
+            for size in sizes:
+                # datasets grow in place, so 10k -> 100k -> 1M only adds rows
+                self.grow(size, options['chunk_size'])
+                book = Book.objects.order_by('pk').first()
+                results = {
+                    name: measure(client, path, params, options['requests'], options['warmup'])
+                    for name, (path, params) in endpoints(book).items()
+                }
+                report['runs'].append({'size': size, 'endpoints': results})
+                self.summarise(size, results)
+
+        if options['output']:
+            write_report(report, options['output'])
+            self.stdout.write(self.style.SUCCESS(f"Report written to {options['output']}"))
+        else:
+            self.stdout.write(json.dumps(report, indent=2))
+        if baseline:
+            for size, name, metric, before, after in compare_reports(report, baseline):
+                change = f'{(after - before) / before:+.0%}' if before else 'n/a'
+                self.stderr.write(f'{size:>8} {name:<34} {metric:<16} {before:>10} -> {after:<10} {change}')
+
+    def grow(self, size, chunk_size):
+        """Top the dataset up to ``size`` synthetic books"""
+        books = Book.objects.count()
+        if books < size:
+            self.stderr.write(f'Seeding {size - books} books...')
+            seed(Book, synthetic_records(Book, size - books, start=books, seed=books), chunk_size)
+
+    def summarise(self, size, results):
+        self.stderr.write(
+            f"{'size':>8} {'endpoint':<34} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} "
+            f"{'queries':>7} {'peak KiB':>10} {'bytes':>10} {'status':>6}"
+        )
+        for name, result in results.items():
+            latency = result['latency_ms']
+            self.stderr.write(
+                f"{size:>8} {name:<34} {latency['p50']:>9.2f} {latency['p95']:>9.2f} "
+                f"{latency['p99']:>9.2f} {result['queries']:>7} "
+                f"{result['peak_memory_kib']:>10.0f} {result['response_bytes']:>10} {result['status']:>6}"
+            )
@@ -1,3 +1,87 @@
+import os
+import tempfile
+from io import StringIO
+
+from django.core.management import call_command
+from django.core.management.base import CommandError
 from django.test import TestCase
 
-# Create your tests here.
+from .models import Book
+from .seeding import BulkSeeder, seed, synthetic_records
+
+
+class BulkSeedTestCase(TestCase):
+    """
+    Tests for chunked bulk seeding and the commands built on it.
+    """
+
+    def call(self, *args):
+        out = StringIO()
+        call_command(*args, stdout=out)
+        return out.getvalue()
+
+    def test_populate_books_is_idempotent(self):
+        self.call('populate_books')
+        self.call('populate_books')
+        self.assertEqual(Book.objects.count(), 5)
+
+    def test_synthetic_rows_stream_in_chunks(self):
+        # one bulk INSERT per chunk, each in its own transaction
+        with self.assertNumQueries(3 * 3):
+            stats = seed(Book, synthetic_records(Book, 250), chunk_size=100, key='isbn')
+        self.assertEqual(stats['rows'], 250)
+        self.assertEqual(Book.objects.count(), 250)
+        self.assertEqual(Book.objects.filter(isbn='0000000000249').count(), 1)
+
+        # a later run with an offset adds rows; a repeated run adds nothing
+        seed(Book, synthetic_records(Book, 50, start=250), key='isbn')
+        seed(Book, synthetic_records(Book, 50, start=250), key='isbn')
+        self.assertEqual(Book.objects.count(), 300)
+
+    def test_update_conflicts(self):
+        self.call('populate_books')
+        seed(Book, [{'isbn': '1234567890123', 'title': 'Renamed', 'author': 'W. S. Vincent'}],
+             key='isbn', update=True)
+        self.assertEqual(Book.objects.get(isbn='1234567890123').title, 'Renamed')
+        self.assertEqual(Book.objects.count(), 5)
+
+    def test_update_keeps_fields_the_record_omits(self):
+        Book.objects.create(isbn='9780441013593', title='Dune', author='Frank Herbert', pages=412)
+        records = [
+            {'isbn': '9780441013593', 'title': 'Dune (revised)'},
+            {'isbn': '9780000000001', 'title': 'New', 'author': 'A', 'pages': 10},
+        ]
+        seed(Book, records, key='isbn', update=True)
+        dune = Book.objects.get(isbn='9780441013593')
+        self.assertEqual((dune.title, dune.author, dune.pages), ('Dune (revised)', 'Frank Herbert', 412))
+        self.assertEqual(Book.objects.get(isbn='9780000000001').pages, 10)
+
+        # same on a key the database does not enforce
+        seed(Book, [{'title': 'Dune (revised)', 'pages': 500}], key='title', update=True)
+        dune.refresh_from_db()
+        self.assertEqual((dune.author, dune.pages), ('Frank Herbert', 500))
+
+    def test_non_unique_key_is_looked_up(self):
+        records = [{'title': 'Same', 'author': 'A', 'isbn': f'{i}'} for i in range(3)]
+        seeder = BulkSeeder(Book, key='title')
+        list(seeder.run(records))
+        self.assertEqual(seeder.stats['skipped'], 2)
+        self.assertEqual(Book.objects.filter(title='Same').count(), 1)
+
+    def test_bulk_seed_command_reads_csv(self):
+        path = os.path.join(tempfile.mkdtemp(), 'books.csv')
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write('title,author,isbn,pages,publication_date\n'
+                    'Dune,Frank Herbert,9780441013593,412,1965-08-01\n'
+                    'Untitled,Anonymous,9780000000000,,\n')
+        output = self.call('bulk_seed', 'api.Book', '--file', path, '--key', 'isbn')
+        self.assertIn('2 rows written', output)
+        dune = Book.objects.get(isbn='9780441013593')
+        self.assertEqual((dune.pages, dune.publication_date.year), (412, 1965))
+        self.assertIsNone(Book.objects.get(title='Untitled').pages)
+
+    def test_bulk_seed_command_errors(self):
+        with self.assertRaises(CommandError):
+            self.call('bulk_seed', 'api.Nope', '--synthetic', '1')
+        with self.assertRaises(CommandError):
+            self.call('bulk_seed', 'api.Book', '--synthetic', '1', '--update')
@@ -123,3 +123,22 @@ STATIC_URL = 'static/'
 # https://docs.djangoproject.com/en/5.2/ref/settings/#default-auto-field
 
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
+
+# Loads the user's role with the user and caches permission sets
+# (see relationship_app/roles.py). Role and permission changes clear the
+# cached entries only in the cache the changing process uses. LocMemCache
+# is per process, so other processes would keep granting a revoked role
+# until the entry expires: keep the timeouts at seconds unless CACHES
+# points at a shared backend such as Redis or Memcached.
+AUTHENTICATION_BACKENDS = ['relationship_app.backends.CachedRoleBackend']
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    }
+}
+
+RELATIONSHIP_ROLE_CACHE_TIMEOUT = 10
+RELATIONSHIP_PERMISSION_CACHE_TIMEOUT = 10
+# Library detail pages are paginated on a cached book count
+RELATIONSHIP_BOOK_COUNT_CACHE_TIMEOUT = 30
@@ -0,0 +1,67 @@
+import json
+import sys
+
+from django.apps import apps
+from django.core.management.base import BaseCommand, CommandError
+
+from bookshelf.seeding import READERS, SeedError, seed, synthetic_records
+
+
+class Command(BaseCommand):
+    help = 'Bulk load records from a JSONL/CSV file, or generated ones, into any model in chunks'
+
+    def add_arguments(self, parser):
+        parser.add_argument('model', help='Model label, e.g. bookshelf.Book')
+        source = parser.add_mutually_exclusive_group(required=True)
+        source.add_argument('--file', help='JSONL or CSV file of records, or - for stdin')
+        source.add_argument('--synthetic', type=int, metavar='N', help='Generate N records')
+        parser.add_argument(
+            '--format',
+            choices=sorted(READERS),
+            help='Input format (default: from the file extension)'
+        )
+        parser.add_argument('--chunk-size', type=int, default=5000, help='Rows per transaction')
+        parser.add_argument('--key', help='Field identifying existing rows (default: skip no rows)')
+        parser.add_argument(
+            '--update',
+            action='store_true',
+            help='Update rows whose key exists instead of skipping them'
+        )
+        parser.add_argument('--start', type=int, default=0, help='First row number for --synthetic')
+        parser.add_argument('--seed', type=int, default=0, help='Random seed for --synthetic')
+
+    def handle(self, *args, **options):
+        try:
+            model = apps.get_model(options['model'])
+        except (LookupError, ValueError) as e:
+            raise CommandError(e)
+        if options['update'] and not options['key']:
+            raise CommandError('--update needs --key')
+
+        def progress(stats, elapsed):
+            self.stdout.write(f"{stats['rows']} rows ({stats['rows'] / max(elapsed, 1e-9):.0f} rows/s)")
+
+        path = options['file']
+        try:
+            if path:
+                fmt = options['format'] or ('csv' if path.endswith('.csv') else 'jsonl')
+                source = sys.stdin if path == '-' else open(path, newline='', encoding='utf-8')
+                with source:
+                    stats = self.seed(model, READERS[fmt](source), options, progress)
+            else:
+                records = synthetic_records(model, options['synthetic'], options['start'], options['seed'])
+                stats = self.seed(model, records, options, progress)
+        except (SeedError, json.JSONDecodeError) as e:
+            raise CommandError(f'Seeding stopped: {e}')
+
+        self.stdout.write(self.style.SUCCESS(
+            f"{model._meta.label}: {stats['written']} rows written, {stats['skipped']} skipped "
+            f"of {stats['rows']} read"
+        ))
+
+    def seed(self, model, records, options, progress):
+        return seed(
+            model, records,
+            chunk_size=options['chunk_size'], key=options['key'],
+            update=options['update'], progress=progress,
+        )
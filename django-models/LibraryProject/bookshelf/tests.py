@@ -1,3 +1,28 @@
+from io import StringIO
+
+from django.core.management import call_command
 from django.test import TestCase
 
-# Create your tests here.
+from .models import Book
+
+
+class SeedBooksTestCase(TestCase):
+    """
+    Tests for the bulk sample and synthetic book loaders.
+    """
+
+    def test_create_sample_books_is_idempotent(self):
+        # existing titles + one INSERT, each chunk in a savepoint
+        with self.assertNumQueries(4):
+            call_command('create_sample_books', stdout=StringIO())
+        out = StringIO()
+        call_command('create_sample_books', stdout=out)
+        self.assertIn('0 sample books, 5 already existed', out.getvalue())
+        self.assertEqual(Book.objects.count(), 5)
+
+    def test_synthetic_books(self):
+        call_command('bulk_seed', 'bookshelf.Book', '--synthetic', '120', '--chunk-size', '50', stdout=StringIO())
+        self.assertEqual(Book.objects.count(), 120)
+        book = Book.objects.first()
+        self.assertTrue(book.title and book.description and book.published_date)
+        self.assertLess(book.rating, 10)
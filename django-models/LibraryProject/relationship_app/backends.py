@@ -0,0 +1,34 @@
+from django.contrib.auth import get_user_model
+from django.contrib.auth.backends import ModelBackend
+from django.core.cache import cache
+
+from .roles import load_permissions, permission_key, permission_timeout
+
+
+class CachedRoleBackend(ModelBackend):
+    """
+    ModelBackend that loads the user's profile (and so their role) in the
+    same query as the user, and caches the permission set across requests.
+    Superusers and inactive users behave exactly as with ModelBackend.
+    """
+    def get_user(self, user_id):
+        UserModel = get_user_model()
+        try:
+            user = UserModel._default_manager.select_related('userprofile').get(pk=user_id)
+        except UserModel.DoesNotExist:
+            return None
+        return user if self.user_can_authenticate(user) else None
+
+    def get_all_permissions(self, user_obj, obj=None):
+        if not user_obj.is_active or user_obj.is_anonymous or obj is not None:
+            return set()
+        if user_obj.is_superuser:
+            return super().get_all_permissions(user_obj, obj)
+        if not hasattr(user_obj, '_perm_cache'):
+            key = permission_key(user_obj.pk)
+            perms = cache.get(key)
+            if perms is None:
+                perms = load_permissions(user_obj)
+                cache.set(key, perms, permission_timeout())
+            user_obj._perm_cache = perms
+        return user_obj._perm_cache
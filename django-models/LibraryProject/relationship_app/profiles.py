@@ -0,0 +1,73 @@
+"""
+UserProfile provisioning.
+
+Profiles used to be created by a User post_save receiver and re-saved on
+every User save (each login's last_login update included), and users made
+with bulk_create got none. Now nothing runs on User saves:
+
+- profile_for(user) gets or creates the profile on first access;
+- provision_profiles() creates the missing profiles of many users in one
+  INSERT, for imports and bulk-created users;
+- set_role() writes only when the role actually changes; UserProfile.save()
+  itself is left alone, so other callers always write what they set.
+
+A user without a profile has UserProfile.DEFAULT_ROLE (see roles.get_role).
+"""
+from django.contrib.auth import get_user_model
+from django.db import transaction
+
+from .models import UserProfile
+from .roles import forget_roles
+
+
+def profile_for(user):
+    """The user's profile, created with the default role if it is missing."""
+    try:
+        return user.userprofile
+    except UserProfile.DoesNotExist:
+        profile, _ = UserProfile.objects.get_or_create(user=user)
+        user.userprofile = profile
+        return profile
+
+
+def set_role(user, role):
+    """Give the user ``role``; returns True if anything was written."""
+    profile = profile_for(user)
+    if profile.role == role:
+        return False
+    profile.role = role
+    profile.save(update_fields=['role'])
+    return True
+
+
+def provision_profiles(user_ids, role=UserProfile.DEFAULT_ROLE, batch_size=1000):
+    """
+    Create profiles with ``role`` for those of ``user_ids`` that have none.
+    Existing profiles are left alone. Returns the number of profiles created.
+    """
+    user_ids = set(user_ids)
+    existing = set(
+        UserProfile.objects.filter(user_id__in=user_ids).values_list('user_id', flat=True)
+    )
+    missing = sorted(user_ids - existing)
+    UserProfile.objects.bulk_create(
+        [UserProfile(user_id=pk, role=role) for pk in missing],
+        batch_size=batch_size, ignore_conflicts=True,
+    )
+    # bulk_create sends no post_save, and the default role may be cached
+    forget_roles(missing)
+    return len(missing)
+
+
+def bulk_create_users(users, role=UserProfile.DEFAULT_ROLE, batch_size=1000):
+    """bulk_create ``users`` and give each a profile with ``role``."""
+    with transaction.atomic():
+        users = get_user_model().objects.bulk_create(users, batch_size=batch_size)
+        provision_profiles([user.pk for user in users], role=role, batch_size=batch_size)
+    return users
+
+
+def provision_missing_profiles(role=UserProfile.DEFAULT_ROLE, batch_size=1000):
+    """Create a profile for every user that has none; returns the number created."""
+    user_ids = get_user_model().objects.filter(userprofile__isnull=True).values_list('pk', flat=True)
+    return provision_profiles(list(user_ids), role=role, batch_size=batch_size)
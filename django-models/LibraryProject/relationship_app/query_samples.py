@@ -41,23 +41,26 @@ def retrieve_librarian_for_library(library_name):
 
 
 # Sample usage (for testing purposes)
+# The functions above take two queries each; relationship_app.queries does
+# the same lookups in one joined query (also for many names at once).
 if __name__ == "__main__":
-    # Example queries
-    
+    from relationship_app.queries import books_by_author, books_in_library, librarian_for_library
+
     # Query all books by a specific author
-    author_books = query_books_by_author("J.K. Rowling")
+    author_books = books_by_author("J.K. Rowling")
     print("Books by J.K. Rowling:")
     for book in author_books:
         print(f"- {book.title}")
     
     # List all books in a library
-    library_books = list_books_in_library("Central Library")
+    # authors come joined, so book.author.name does not query per book
+    library_books = books_in_library("Central Library")
     print("\nBooks in Central Library:")
     for book in library_books:
         print(f"- {book.title} by {book.author.name}")
     
     # Retrieve the librarian for a library
-    librarian = retrieve_librarian_for_library("Central Library")
+    librarian = librarian_for_library("Central Library")
     if librarian:
         print(f"\nLibrarian for Central Library: {librarian.name}")
     else:
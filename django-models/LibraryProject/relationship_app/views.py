@@ -7,22 +7,139 @@ from django.contrib.auth import login
 from django.shortcuts import redirect
 from django.contrib.auth.decorators import login_required, user_passes_test, permission_required
 from django.urls import reverse_lazy
+from django.core.paginator import Page, Paginator
+from django.db.models import Prefetch
+from django.http import Http404, StreamingHttpResponse
+from django.template.loader import render_to_string
+from django.utils.html import format_html
+import csv
+import json
 from .models import Book, Author
 from .models import Library
+from .roles import get_role
+
+BOOKS_PER_PAGE = 50
+LIBRARY_BOOKS_PER_PAGE = 50
+STREAM_CHUNK_SIZE = 2000
+
+
+def catalog():
+    """All books with their authors, in a stable index-backed order."""
+    return Book.objects.all().select_related('author').order_by('title', 'pk')
+
 
 # Task 1: Function-based view to list all books
 def list_books(request):
-    """Function-based view that lists all books."""
-    books = Book.objects.all()
-    return render(request, 'relationship_app/list_books.html', {'books': books})
+    """
+    Function-based view that lists all books.
+    Paginated with ?page=; ?stream=1 streams the whole catalog instead,
+    reading it in chunks so memory stays flat however large it is.
+    """
+    if request.GET.get('stream'):
+        return StreamingHttpResponse(stream_book_list(), content_type='text/html')
+    
+    page_obj = Paginator(catalog(), BOOKS_PER_PAGE).get_page(request.GET.get('page'))
+    return render(request, 'relationship_app/list_books.html', {
+        'books': page_obj.object_list,
+        'page_obj': page_obj,
+    })
+
+
+def stream_book_list():
+    """Yield the book list page piece by piece."""
+    head, tail = render_to_string(
+        'relationship_app/list_books.html', {'books': []}
+    ).split('<!-- books -->')
+    yield head
+    for book in catalog().iterator(chunk_size=STREAM_CHUNK_SIZE):
+        yield format_html('<li>{} by {}</li>\n', book.title, book.author.name)
+    yield tail
+
+
+class Echo:
+    """File-like object whose write() returns the data, for csv.writer."""
+    def write(self, value):
+        return value
+
+
+def export_rows():
+    books = catalog().values_list('pk', 'title', 'author__name')
+    return books.iterator(chunk_size=STREAM_CHUNK_SIZE)
+
+
+def stream_csv():
+    writer = csv.writer(Echo())
+    yield writer.writerow(['id', 'title', 'author'])
+    for row in export_rows():
+        yield writer.writerow(row)
+
+
+def stream_json():
+    yield '['
+    separator = ''
+    for pk, title, author in export_rows():
+        yield separator + json.dumps({'id': pk, 'title': title, 'author': author})
+        separator = ','
+    yield ']'
+
+
+EXPORT_FORMATS = {
+    'csv': (stream_csv, 'text/csv'),
+    'json': (stream_json, 'application/json'),
+}
+
+
+def export_books(request, fmt):
+    """Stream the whole catalog as CSV or JSON."""
+    if fmt not in EXPORT_FORMATS:
+        raise Http404('Unknown export format')
+    stream, content_type = EXPORT_FORMATS[fmt]
+    response = StreamingHttpResponse(stream(), content_type=content_type)
+    response['Content-Disposition'] = f'attachment; filename="books.{fmt}"'
+    return response
+
+
+class CountedPaginator(Paginator):
+    """Paginator whose total is known up front, so it never runs COUNT(*)."""
+    def __init__(self, count, per_page):
+        super().__init__([], per_page)
+        self.count = count
 
 
 # Task 1: Class-based view for library details
 class LibraryDetailView(DetailView):
-    """Class-based view that displays details for a specific library."""
+    """
+    Class-based view that displays details for a specific library.
+    Shows one page of its books (?page=), loaded together with their
+    authors by a single sliced prefetch; the total comes from the cached
+    per-library book count.
+    """
     model = Library
     template_name = 'relationship_app/library_detail.html'
     context_object_name = 'library'
+    paginate_by = LIBRARY_BOOKS_PER_PAGE
+
+    def get_paginator(self):
+        if not hasattr(self, 'paginator'):
+            count = Library.cached_book_count(self.kwargs['pk'])
+            self.paginator = CountedPaginator(count, self.paginate_by)
+            self.page_number = self.paginator.get_page(self.request.GET.get('page')).number
+        return self.paginator
+
+    def get_queryset(self):
+        paginator = self.get_paginator()
+        start = (self.page_number - 1) * paginator.per_page
+        books = Book.objects.select_related('author').order_by('title', 'pk')
+        return Library.objects.prefetch_related(
+            Prefetch('books', queryset=books[start:start + paginator.per_page], to_attr='page_books')
+        )
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        page_obj = Page(self.object.page_books, self.page_number, self.get_paginator())
+        context['books'] = page_obj.object_list
+        context['page_obj'] = page_obj
+        return context
 
 
 # Task 2: User Registration View
@@ -52,8 +169,8 @@ class CustomLogoutView(LogoutView):
 
 # Task 3: Helper function to check user roles
 def check_role(user, role):
-    """Helper function to check if user has specific role."""
-    return hasattr(user, 'userprofile') and user.userprofile.role == role
+    """Helper function to check if user has specific role (cached, see roles.py)."""
+    return get_role(user) == role
 
 
 # Task 3: Role-based view functions
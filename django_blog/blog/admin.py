@@ -4,11 +4,13 @@ from .models import Post, Comment
 @admin.register(Post)
 class PostAdmin(admin.ModelAdmin):
     list_display = ['title', 'author', 'published_date']
+    list_select_related = ['author']
     list_filter = ['published_date', 'author']
     search_fields = ['title', 'content']
 
 @admin.register(Comment)
 class CommentAdmin(admin.ModelAdmin):
     list_display = ['author', 'post', 'created_at']
+    list_select_related = ['author', 'post']
     list_filter = ['created_at', 'author']
     search_fields = ['content', 'author__username']
\ No newline at end of file
@@ -0,0 +1,130 @@
+"""
+Caching for the post list and post detail pages.
+
+Every post has a version stamp in the cache: the time it, its tags or its
+comments last changed. One more stamp covers the post list. The signals
+in blog/signals.py bump the stamps, so nothing is ever deleted by key.
+
+The stamps feed three layers:
+- ETag and Last-Modified headers, so anonymous browsers revalidating an
+  unchanged page get a 304 without touching the database;
+- a full-page cache of anonymous responses, keyed on URL and stamp;
+- template fragments ({% cache %}) keyed on the stamp for logged-in users.
+
+When a stamp is missing (evicted or first hit) it is seeded from
+Post.updated_at and the latest Comment.updated_at.
+"""
+import hashlib
+from functools import wraps
+
+from django.conf import settings
+from django.contrib.messages import get_messages
+from django.core.cache import cache
+from django.db.models import Max
+from django.http import HttpResponse
+from django.utils import timezone
+from django.utils.cache import patch_vary_headers
+from django.views.decorators.http import condition
+
+from .models import Post
+
+LIST_STAMP = 'posts'
+
+
+def page_cache_timeout():
+    return getattr(settings, 'BLOG_PAGE_CACHE_TIMEOUT', 600)
+
+
+def _stamp_key(name):
+    return f'blog:stamp:{name}'
+
+
+def post_stamp_name(post_id):
+    return f'post:{post_id}'
+
+
+def bump_stamps(*names):
+    """Mark posts (or the list) as changed now"""
+    now = timezone.now()
+    cache.set_many({_stamp_key(name): now for name in names}, None)
+
+
+def get_stamp(name, seed):
+    """Current stamp for ``name``, seeding it from ``seed()`` on a miss"""
+    key = _stamp_key(name)
+    stamp = cache.get(key)
+    if stamp is None:
+        cache.add(key, seed() or timezone.now(), None)
+        stamp = cache.get(key) or timezone.now()
+    return stamp
+
+
+def post_stamp(post_id):
+    def seed():
+        row = (
+            Post.objects.filter(pk=post_id)
+            .annotate(last_comment=Max('comments__updated_at'))
+            .values_list('updated_at', 'last_comment')
+            .first()
+        )
+        return max(filter(None, row)) if row else None
+    return get_stamp(post_stamp_name(post_id), seed)
+
+
+def list_stamp():
+    return get_stamp(
+        LIST_STAMP, lambda: Post.objects.aggregate(last=Max('updated_at'))['last']
+    )
+
+
+def is_cacheable(request):
+    """
+    Only anonymous GETs without pending flash messages share pages;
+    everyone else sees edit buttons, forms or messages of their own.
+    """
+    return (
+        request.method in ('GET', 'HEAD')
+        and not request.user.is_authenticated
+        and not len(get_messages(request))
+    )
+
+
+def cached_page(stamp_func):
+    """
+    Decorate a view with conditional GET handling and an anonymous
+    full-page cache, both driven by ``stamp_func(request, *args, **kwargs)``.
+    """
+    def etag(request, *args, **kwargs):
+        if not is_cacheable(request):
+            return None
+        stamp = stamp_func(request, *args, **kwargs)
+        path = hashlib.md5(request.get_full_path().encode()).hexdigest()[:12]
+        return f'{path}-{stamp.timestamp():.6f}'
+
+    def last_modified(request, *args, **kwargs):
+        if not is_cacheable(request):
+            return None
+        return stamp_func(request, *args, **kwargs)
+
+    def decorator(view_func):
+        @wraps(view_func)
+        def wrapper(request, *args, **kwargs):
+            if not is_cacheable(request):
+                return view_func(request, *args, **kwargs)
+            key = f'blog:page:{etag(request, *args, **kwargs)}'
+            cached = cache.get(key)
+            if cached is not None:
+                content, content_type = cached
+                response = HttpResponse(content, content_type=content_type)
+            else:
+                response = view_func(request, *args, **kwargs)
+                if hasattr(response, 'render'):
+                    response = response.render()
+                if response.status_code == 200 and not response.cookies:
+                    cache.set(
+                        key, (response.content, response['Content-Type']), page_cache_timeout()
+                    )
+            patch_vary_headers(response, ['Cookie'])
+            return response
+        return condition(etag_func=etag, last_modified_func=last_modified)(wrapper)
+    return decorator
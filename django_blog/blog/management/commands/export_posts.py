@@ -0,0 +1,40 @@
+import sys
+import time
+
+from django.core.management.base import BaseCommand
+
+from blog.transfer import WRITERS, export_queryset
+
+
+class Command(BaseCommand):
+    help = 'Stream all posts with their comments and tags to JSONL or CSV'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='File to write, or - for stdout')
+        parser.add_argument(
+            '--format',
+            choices=sorted(WRITERS),
+            help='Output format (default: from the file extension)'
+        )
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=1000,
+            help='Posts fetched per query'
+        )
+
+    def handle(self, *args, **options):
+        path = options['path']
+        fmt = options['format'] or ('csv' if path.endswith('.csv') else 'jsonl')
+        posts = export_queryset(options['chunk_size'])
+
+        start = time.perf_counter()
+        if path == '-':
+            count = WRITERS[fmt](posts, sys.stdout)
+        else:
+            with open(path, 'w', newline='', encoding='utf-8') as out:
+                count = WRITERS[fmt](posts, out)
+        elapsed = time.perf_counter() - start
+        self.stderr.write(self.style.SUCCESS(
+            f'Exported {count} posts in {elapsed:.1f}s ({count / max(elapsed, 1e-9):.0f} posts/s)'
+        ))
@@ -0,0 +1,55 @@
+import json
+import sys
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from blog.transfer import READERS, Importer, TransferError
+
+
+class Command(BaseCommand):
+    help = 'Bulk import posts, comments and tags from a JSONL or CSV file'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='File to read, or - for stdin')
+        parser.add_argument(
+            '--format',
+            choices=sorted(READERS),
+            help='Input format (default: from the file extension)'
+        )
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=1000,
+            help='Rows per transaction'
+        )
+        parser.add_argument(
+            '--create-users',
+            action='store_true',
+            help='Create unknown authors with unusable passwords instead of skipping their rows'
+        )
+
+    def handle(self, *args, **options):
+        path = options['path']
+        fmt = options['format'] or ('csv' if path.endswith('.csv') else 'jsonl')
+        importer = Importer(options['chunk_size'], options['create_users'])
+
+        source = sys.stdin if path == '-' else open(path, newline='', encoding='utf-8')
+        start = time.perf_counter()
+        try:
+            with source:
+                for stats in importer.run(READERS[fmt](source)):
+                    elapsed = time.perf_counter() - start
+                    self.stdout.write(
+                        f"{stats['rows']} rows ({stats['rows'] / elapsed:.0f} rows/s)"
+                    )
+        except (TransferError, KeyError, json.JSONDecodeError) as e:
+            raise CommandError(f'Import stopped after {importer.stats["rows"]} rows: {e!r}')
+
+        elapsed = time.perf_counter() - start
+        stats = importer.stats
+        self.stdout.write(self.style.SUCCESS(
+            f"Imported {stats['posts']} posts and {stats['comments']} comments, "
+            f"skipped {stats['skipped']} rows in {elapsed:.1f}s "
+            f"({stats['rows'] / max(elapsed, 1e-9):.0f} rows/s)"
+        ))
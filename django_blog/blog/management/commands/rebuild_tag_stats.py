@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from blog.tags import rebuild_tag_stats
+
+
+class Command(BaseCommand):
+    help = 'Recompute tag post counts from the tags on all posts'
+
+    def handle(self, *args, **options):
+        count = rebuild_tag_stats()
+        self.stdout.write(self.style.SUCCESS(f'Counted {count} tags'))
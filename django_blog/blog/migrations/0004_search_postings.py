@@ -0,0 +1,52 @@
+# Generated by Django 5.2.5 on 2026-10-18 04:29
+
+import django.db.models.deletion
+from collections import defaultdict
+
+from django.db import migrations, models
+
+
+def index_existing_posts(apps, schema_editor):
+    from blog.search import build_postings
+
+    Post = apps.get_model('blog', 'Post')
+    SearchPosting = apps.get_model('blog', 'SearchPosting')
+    ContentType = apps.get_model('contenttypes', 'ContentType')
+    TaggedItem = apps.get_model('taggit', 'TaggedItem')
+
+    tags = defaultdict(list)
+    content_type = ContentType.objects.filter(app_label='blog', model='post').first()
+    if content_type is not None:
+        tagged = TaggedItem.objects.filter(content_type=content_type)
+        for post_id, name in tagged.values_list('object_id', 'tag__name'):
+            tags[post_id].append(name)
+
+    postings = []
+    for post in Post.objects.iterator():
+        for term, weight in build_postings(post.title, post.content, tags[post.pk]).items():
+            postings.append(SearchPosting(term=term, post_id=post.pk, weight=weight))
+    SearchPosting.objects.bulk_create(postings, batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0003_post_tags'),
+        ('contenttypes', '0002_remove_content_type_name'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SearchPosting',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('term', models.CharField(max_length=64)),
+                ('weight', models.PositiveIntegerField()),
+                ('post', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='search_postings', to='blog.post')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('term', 'post'), name='search_posting_term_post_uniq')],
+            },
+        ),
+        migrations.RunPython(index_existing_posts, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 5.2.5 on 2026-10-18 04:31
+
+from django.db import migrations, models
+from django.db.models import F
+
+
+def start_from_published_date(apps, schema_editor):
+    Post = apps.get_model('blog', 'Post')
+    Post.objects.update(updated_at=F('published_date'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0004_search_postings'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='post',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.RunPython(start_from_published_date, migrations.RunPython.noop),
+    ]
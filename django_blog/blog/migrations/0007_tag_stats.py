@@ -0,0 +1,63 @@
+# Generated by Django 5.2.5 on 2026-10-18 04:33
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def count_existing_tags(apps, schema_editor):
+    Post = apps.get_model('blog', 'Post')
+    TagStat = apps.get_model('blog', 'TagStat')
+    ContentType = apps.get_model('contenttypes', 'ContentType')
+    TaggedItem = apps.get_model('taggit', 'TaggedItem')
+
+    content_type = ContentType.objects.filter(app_label='blog', model='post').first()
+    if content_type is None:
+        return
+    tagged = TaggedItem.objects.filter(content_type=content_type)
+    published = dict(Post.objects.values_list('pk', 'published_date'))
+    last_used = {}
+    for tag_id, post_id in tagged.values_list('tag_id', 'object_id'):
+        date = published.get(post_id)
+        if date and (tag_id not in last_used or date > last_used[tag_id]):
+            last_used[tag_id] = date
+    counts = tagged.values('tag_id').annotate(posts=Count('object_id', distinct=True))
+    TagStat.objects.bulk_create([
+        TagStat(tag_id=row['tag_id'], post_count=row['posts'], last_used_at=last_used.get(row['tag_id']))
+        for row in counts
+    ], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0006_comment_post_created_idx'),
+        ('contenttypes', '0002_remove_content_type_name'),
+        ('taggit', '0006_rename_taggeditem_content_type_object_id_taggit_tagg_content_8fc721_idx'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TagStat',
+            fields=[
+                ('tag', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='blog_stat', serialize=False, to='taggit.tag')),
+                ('post_count', models.PositiveIntegerField(default=0)),
+                ('last_used_at', models.DateTimeField(blank=True, null=True)),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='post',
+            index=models.Index(fields=['-published_date'], name='post_published_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='tagstat',
+            index=models.Index(fields=['-post_count'], name='tagstat_popular_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='tagstat',
+            index=models.Index(fields=['-last_used_at'], name='tagstat_recent_idx'),
+        ),
+        migrations.RunPython(count_existing_tags, migrations.RunPython.noop),
+    ]
@@ -1,6 +1,7 @@
 from django.db import models
 from django.contrib.auth.models import User
 from taggit.managers import TaggableManager
+from taggit.models import Tag
 
 class Post(models.Model):
     """
@@ -10,12 +11,14 @@ class Post(models.Model):
         title: The title of the blog post
         content: The main content/body of the post
         published_date: Timestamp when the post was created
+        updated_at: Timestamp when the post was last edited
         author: Foreign key to User model, the author of the post
         tags: Many-to-many relationship with Tag model via taggit
     """
     title = models.CharField(max_length=200)
     content = models.TextField()
     published_date = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
     author = models.ForeignKey(User, on_delete=models.CASCADE, related_name='posts')
     tags = TaggableManager()  # Add this line
     
@@ -24,6 +27,9 @@ class Post(models.Model):
     
     class Meta:
         ordering = ['-published_date']
+        indexes = [
+            models.Index(fields=['-published_date'], name='post_published_idx'),
+        ]
 
 
 class Comment(models.Model):
@@ -47,4 +53,59 @@ class Comment(models.Model):
         return f'Comment by {self.author.username} on {self.post.title}'
     
     class Meta:
-        ordering = ['created_at']
\ No newline at end of file
+        ordering = ['created_at']
+        indexes = [
+            # Comment pages of one post, oldest first
+            models.Index(fields=['post', 'created_at'], name='comment_post_created_idx'),
+        ]
+
+class SearchPosting(models.Model):
+    """
+    One entry of the inverted search index: a term and a post it occurs in.
+    
+    Fields:
+        term: Normalised word from the post's title, content or tags
+        post: The post containing the term
+        weight: Relevance of the term for this post (title and tag hits
+                count more than content hits)
+    
+    Maintained by blog.search.index_post whenever a post or its tags change.
+    """
+    term = models.CharField(max_length=64)
+    post = models.ForeignKey(Post, on_delete=models.CASCADE, related_name='search_postings')
+    weight = models.PositiveIntegerField()
+    
+    def __str__(self):
+        return f'{self.term} -> {self.post_id}'
+    
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['term', 'post'], name='search_posting_term_post_uniq'),
+        ]
+
+
+
+class TagStat(models.Model):
+    """
+    Materialised usage statistics for one tag, so tag clouds and tag pages
+    never GROUP BY the whole taggit through table.
+    
+    Fields:
+        tag: The taggit tag these numbers describe
+        post_count: Number of posts currently carrying the tag
+        last_used_at: When the tag was last added to a post
+    
+    Maintained incrementally by blog.tags when tags are added or removed.
+    """
+    tag = models.OneToOneField(Tag, on_delete=models.CASCADE, primary_key=True, related_name='blog_stat')
+    post_count = models.PositiveIntegerField(default=0)
+    last_used_at = models.DateTimeField(null=True, blank=True)
+    
+    def __str__(self):
+        return f'{self.tag_id}: {self.post_count} posts'
+    
+    class Meta:
+        indexes = [
+            models.Index(fields=['-post_count'], name='tagstat_popular_idx'),
+            models.Index(fields=['-last_used_at'], name='tagstat_recent_idx'),
+        ]
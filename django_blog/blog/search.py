@@ -0,0 +1,116 @@
+"""
+Inverted index behind the blog search page.
+
+Every post is split into terms from its title, content and tag names and
+stored as SearchPosting rows (term, post, weight). A search looks up the
+query terms on the (term, post) index, sums their weights per post and
+keeps the posts that contain every term, so it never scans Post, the
+taggit through table or Tag. The index is updated incrementally by the
+signals in blog/signals.py: only postings whose weight changed are
+written when a post is edited or retagged.
+"""
+import re
+from collections import Counter
+
+from django.db import transaction
+from django.db.models import Count, Sum
+
+from .models import Post, SearchPosting
+
+TITLE_WEIGHT = 5
+TAG_WEIGHT = 3
+CONTENT_WEIGHT = 1
+MAX_CONTENT_WEIGHT = 10  # stop long posts from winning on repetition alone
+MAX_QUERY_TERMS = 10
+
+TERM_RE = re.compile(r'\w+', re.UNICODE)
+STOP_WORDS = frozenset(
+    'a an and are as at be but by for from has have in is it its of on or '
+    'that the this to was were will with'.split()
+)
+
+
+def tokenize(text):
+    """Lower-cased words of ``text`` worth indexing"""
+    return [
+        word for word in TERM_RE.findall((text or '').lower())
+        if 1 < len(word) <= 64 and word not in STOP_WORDS
+    ]
+
+
+def build_postings(title, content, tag_names):
+    """{term: weight} for a post's text"""
+    weights = Counter()
+    for term, count in Counter(tokenize(content)).items():
+        weights[term] += min(count, MAX_CONTENT_WEIGHT) * CONTENT_WEIGHT
+    for term in set(tokenize(title)):
+        weights[term] += TITLE_WEIGHT
+    for term in set(tokenize(' '.join(tag_names))):
+        weights[term] += TAG_WEIGHT
+    return weights
+
+
+def index_post(post):
+    """
+    Bring the postings of one post up to date.
+    Only rows whose term or weight changed are touched.
+    """
+    tag_names = post.tags.values_list('name', flat=True)
+    wanted = build_postings(post.title, post.content, tag_names)
+    existing = {
+        posting.term: posting
+        for posting in SearchPosting.objects.filter(post=post)
+    }
+    stale = [term for term in existing if term not in wanted]
+    changed = []
+    for term, weight in wanted.items():
+        posting = existing.get(term)
+        if posting is not None and posting.weight != weight:
+            posting.weight = weight
+            changed.append(posting)
+    new = [
+        SearchPosting(term=term, post=post, weight=weight)
+        for term, weight in wanted.items() if term not in existing
+    ]
+    with transaction.atomic():
+        if stale:
+            SearchPosting.objects.filter(post=post, term__in=stale).delete()
+        if changed:
+            SearchPosting.objects.bulk_update(changed, ['weight'])
+        SearchPosting.objects.bulk_create(new, ignore_conflicts=True)
+
+
+def rebuild_index(batch_size=500):
+    """Index every post from scratch; returns the number of posts indexed"""
+    total = 0
+    SearchPosting.objects.all().delete()
+    posts = Post.objects.prefetch_related('tags').order_by('pk')
+    batch = []
+    for post in posts.iterator(chunk_size=batch_size):
+        tag_names = [tag.name for tag in post.tags.all()]
+        for term, weight in build_postings(post.title, post.content, tag_names).items():
+            batch.append(SearchPosting(term=term, post_id=post.pk, weight=weight))
+        total += 1
+        if len(batch) >= batch_size:
+            SearchPosting.objects.bulk_create(batch)
+            batch = []
+    SearchPosting.objects.bulk_create(batch)
+    return total
+
+
+def search(query):
+    """
+    Ids of posts matching every term of ``query``, best match first.
+    Returns a values queryset of dicts with ``post`` and ``score`` so
+    callers can paginate before loading any Post rows.
+    """
+    terms = list(dict.fromkeys(tokenize(query)))[:MAX_QUERY_TERMS]
+    if not terms:
+        return SearchPosting.objects.none().values('post')
+    return (
+        SearchPosting.objects.filter(term__in=terms)
+        .values('post')
+        .annotate(score=Sum('weight'), matched=Count('term'))
+        .filter(matched=len(terms))
+        .order_by('-score', '-post')
+    )
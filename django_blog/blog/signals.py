@@ -0,0 +1,63 @@
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_delete
+from django.dispatch import receiver
+
+from .cache import LIST_STAMP, bump_stamps, post_stamp_name
+from .models import Comment, Post
+from .search import index_post
+from .tags import adjust_tag_stats, post_tag_ids
+
+
+@receiver(post_save, sender=Post)
+def index_saved_post(sender, instance, update_fields=None, **kwargs):
+    """Re-index a post when its title or content may have changed"""
+    if update_fields is not None and not {'title', 'content'} & set(update_fields):
+        return
+    index_post(instance)
+
+
+@receiver(m2m_changed, sender=Post.tags.through)
+def index_retagged_post(sender, instance, action, **kwargs):
+    """Tag names are indexed too, so re-index after tags are added or removed"""
+    if action in ('post_add', 'post_remove', 'post_clear') and isinstance(instance, Post):
+        index_post(instance)
+        bump_stamps(post_stamp_name(instance.pk), LIST_STAMP)
+
+
+@receiver(post_save, sender=Post)
+@receiver(post_delete, sender=Post)
+def bump_post_stamps(sender, instance, **kwargs):
+    """Cached pages showing this post are out of date"""
+    bump_stamps(post_stamp_name(instance.pk), LIST_STAMP)
+
+
+@receiver(post_save, sender=Comment)
+@receiver(post_delete, sender=Comment)
+def bump_comment_stamps(sender, instance, **kwargs):
+    """Comments only appear on their post's detail page"""
+    bump_stamps(post_stamp_name(instance.post_id))
+
+
+@receiver(m2m_changed, sender=Post.tags.through)
+def count_tag_changes(sender, instance, action, pk_set=None, **kwargs):
+    """Keep TagStat post counts in step with tags added to or removed from posts"""
+    if not isinstance(instance, Post):
+        return
+    if action == 'post_add':
+        adjust_tag_stats(pk_set, 1)
+    elif action == 'post_remove':
+        adjust_tag_stats(pk_set, -1)
+    elif action == 'pre_clear':
+        instance._cleared_tag_ids = post_tag_ids(instance)
+    elif action == 'post_clear':
+        adjust_tag_stats(getattr(instance, '_cleared_tag_ids', ()), -1)
+
+
+@receiver(pre_delete, sender=Post)
+def remember_deleted_post_tags(sender, instance, **kwargs):
+    """taggit drops a deleted post's tags without sending m2m_changed"""
+    instance._deleted_tag_ids = post_tag_ids(instance)
+
+
+@receiver(post_delete, sender=Post)
+def release_deleted_post_tags(sender, instance, **kwargs):
+    adjust_tag_stats(getattr(instance, '_deleted_tag_ids', ()), -1)
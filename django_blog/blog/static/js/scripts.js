@@ -14,4 +14,18 @@ document.addEventListener('DOMContentLoaded', function() {
             }
         });
     });
-});
\ No newline at end of file
+});
+// "Load more comments": swap the link for the next page of comments
+document.addEventListener('click', function(e) {
+    const link = e.target.closest('.load-more-comments');
+    if (!link) {
+        return;
+    }
+    e.preventDefault();
+    fetch(link.href, {headers: {'X-Requested-With': 'XMLHttpRequest'}})
+        .then(response => response.text())
+        .then(html => {
+            link.insertAdjacentHTML('beforebegin', html);
+            link.remove();
+        });
+});
@@ -0,0 +1,52 @@
+"""
+Incremental maintenance of TagStat rows.
+
+taggit reports exactly which tags were added to or removed from a post
+through m2m_changed, and blog/signals.py turns that into +1/-1 updates
+here. Posts that are deleted lose their tags without any m2m signal, so
+their tag ids are captured in pre_delete and released afterwards.
+rebuild_tag_stats (also the rebuild_tag_stats command) recomputes
+everything from the through table.
+"""
+from django.db import transaction
+from django.db.models import Count, F, Max, Value
+from django.db.models.functions import Greatest
+from django.utils import timezone
+
+from .models import Post, TagStat
+
+
+def adjust_tag_stats(tag_ids, delta):
+    """Add ``delta`` to the post count of each tag in ``tag_ids``"""
+    tag_ids = set(tag_ids or ())
+    if not tag_ids:
+        return
+    with transaction.atomic():
+        TagStat.objects.bulk_create(
+            [TagStat(tag_id=tag_id) for tag_id in tag_ids], ignore_conflicts=True
+        )
+        updates = {'post_count': Greatest(F('post_count') + delta, Value(0))}
+        if delta > 0:
+            updates['last_used_at'] = timezone.now()
+        TagStat.objects.filter(tag_id__in=tag_ids).update(**updates)
+
+
+def post_tag_ids(post):
+    return list(post.tags.values_list('pk', flat=True))
+
+
+def rebuild_tag_stats():
+    """Recompute every TagStat row; returns the number of tags counted"""
+    usage = (
+        Post.objects.filter(tags__isnull=False)
+        .values('tags')
+        .annotate(post_count=Count('pk', distinct=True), last=Max('published_date'))
+    )
+    stats = [
+        TagStat(tag_id=row['tags'], post_count=row['post_count'], last_used_at=row['last'])
+        for row in usage
+    ]
+    with transaction.atomic():
+        TagStat.objects.all().delete()
+        TagStat.objects.bulk_create(stats, batch_size=500)
+    return len(stats)
@@ -1,3 +1,316 @@
+import os
+import tempfile
+from io import StringIO
 from django.test import TestCase
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.urls import reverse
+from django.utils.http import http_date
+from .cache import get_stamp, post_stamp_name
+from .models import Post, Comment, SearchPosting, TagStat
+from .search import search
+from .tags import rebuild_tag_stats
+from .transfer import Importer
 
-# Create your tests here.
+
+class SearchIndexTestCase(TestCase):
+    """
+    Tests for the inverted index behind the search page.
+    """
+
+    def setUp(self):
+        self.author = User.objects.create_user(username='author', password='testpass123')
+        self.in_title = Post.objects.create(
+            author=self.author, title='Django caching', content='Speed up pages.'
+        )
+        self.in_content = Post.objects.create(
+            author=self.author, title='Weekly notes', content='Tried some django caching tricks.'
+        )
+        self.tagged = Post.objects.create(
+            author=self.author, title='Travel', content='Photos from the trip.'
+        )
+        self.tagged.tags.add('django')
+
+    def ranked_ids(self, query):
+        return [hit['post'] for hit in search(query)]
+
+    def test_title_and_tag_hits_rank_above_content(self):
+        self.assertEqual(
+            self.ranked_ids('django'),
+            [self.in_title.pk, self.tagged.pk, self.in_content.pk]
+        )
+
+    def test_all_terms_must_match(self):
+        self.assertEqual(
+            self.ranked_ids('django caching'), [self.in_title.pk, self.in_content.pk]
+        )
+        self.assertEqual(self.ranked_ids('django photos'), [self.tagged.pk])
+        self.assertEqual(self.ranked_ids('the'), [])
+
+    def test_index_follows_edits_and_tag_changes(self):
+        self.in_content.content = 'Nothing to see here.'
+        self.in_content.save()
+        self.tagged.tags.clear()
+        self.assertEqual(self.ranked_ids('django'), [self.in_title.pk])
+
+        self.in_content.tags.add('Django')
+        self.assertEqual(self.ranked_ids('django'), [self.in_title.pk, self.in_content.pk])
+
+    def test_deleted_posts_leave_the_index(self):
+        self.in_title.delete()
+        self.assertFalse(SearchPosting.objects.filter(post_id=self.in_title.pk).exists())
+
+    def test_search_page_is_paginated(self):
+        for i in range(12):
+            Post.objects.create(author=self.author, title=f'Django post {i}', content='body')
+        response = self.client.get(reverse('search'), {'q': 'django'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context['page_obj'].paginator.count, 15)
+        self.assertEqual(len(response.context['posts']), 10)
+        self.assertContains(response, 'page=2')
+
+        response = self.client.get(reverse('search'), {'q': 'django', 'page': 2})
+        self.assertEqual(len(response.context['posts']), 5)
+
+
+class PageCacheTestCase(TestCase):
+    """
+    Tests for anonymous page caching and conditional GETs on post pages.
+    """
+
+    def setUp(self):
+        cache.clear()
+        self.author = User.objects.create_user(username='author', password='testpass123')
+        self.post = Post.objects.create(author=self.author, title='Cached', content='Body')
+        self.url = reverse('post-detail', args=[self.post.pk])
+
+    def test_repeat_anonymous_hit_skips_database(self):
+        first = self.client.get(self.url)
+        with self.assertNumQueries(0):
+            second = self.client.get(self.url)
+        self.assertEqual(second.status_code, 200)
+        self.assertEqual(first.content, second.content)
+        self.assertEqual(first['ETag'], second['ETag'])
+
+    def test_conditional_get_returns_304(self):
+        first = self.client.get(self.url)
+        with self.assertNumQueries(0):
+            response = self.client.get(self.url, HTTP_IF_NONE_MATCH=first['ETag'])
+        self.assertEqual(response.status_code, 304)
+
+        response = self.client.get(self.url, HTTP_IF_MODIFIED_SINCE=first['Last-Modified'])
+        self.assertEqual(response.status_code, 304)
+
+    def test_new_comment_invalidates_detail_page(self):
+        first = self.client.get(self.url)
+        Comment.objects.create(post=self.post, author=self.author, content='Fresh comment')
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=first['ETag'])
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, 'Fresh comment')
+
+    def test_edit_invalidates_list_page(self):
+        self.client.get(reverse('posts'))
+        self.post.title = 'Renamed'
+        self.post.save()
+        self.assertContains(self.client.get(reverse('posts')), 'Renamed')
+
+    def test_stamp_is_seeded_from_the_database(self):
+        cache.clear()
+        response = self.client.get(self.url)
+        self.assertEqual(response['Last-Modified'], http_date(self.post.updated_at.timestamp()))
+
+    def test_logged_in_users_get_their_own_page(self):
+        self.client.get(self.url)
+        self.client.force_login(self.author)
+        response = self.client.get(self.url)
+        self.assertNotIn('ETag', response)
+        self.assertContains(response, 'Edit Post')
+
+
+class CommentPaginationTestCase(TestCase):
+    """
+    Tests for paged comments and the "load more" fragment on post detail.
+    """
+
+    def setUp(self):
+        cache.clear()
+        self.author = User.objects.create_user(username='author', password='testpass123')
+        self.post = Post.objects.create(author=self.author, title='Busy post', content='Body')
+        Comment.objects.bulk_create([
+            Comment(post=self.post, author=self.author, content=f'Comment number {i}')
+            for i in range(45)
+        ])
+
+    def test_detail_shows_first_page_only(self):
+        response = self.client.get(reverse('post-detail', args=[self.post.pk]))
+        self.assertEqual(len(response.context['comments']), 20)
+        self.assertContains(response, 'Comments (45)')
+        self.assertContains(response, 'Load more comments')
+
+    def test_load_more_walks_every_comment_once(self):
+        response = self.client.get(reverse('post-detail', args=[self.post.pk]))
+        seen = [c.pk for c in response.context['comments']]
+        next_url = response.context['next_comments_url']
+        while next_url:
+            # one query for the comments and their authors
+            with self.assertNumQueries(1):
+                response = self.client.get(next_url)
+            seen += [c.pk for c in response.context['comments']]
+            next_url = response.context['next_comments_url']
+        self.assertEqual(
+            seen, list(self.post.comments.order_by('created_at', 'pk').values_list('pk', flat=True))
+        )
+
+    def test_missing_post_is_404(self):
+        response = self.client.get(reverse('load-comments', args=[self.post.pk + 1]))
+        self.assertEqual(response.status_code, 404)
+
+
+class TagStatTestCase(TestCase):
+    """
+    Tests for materialised tag counts and the per-tag post listing.
+    """
+
+    def setUp(self):
+        self.author = User.objects.create_user(username='author', password='testpass123')
+        self.first = Post.objects.create(author=self.author, title='First', content='Body')
+        self.second = Post.objects.create(author=self.author, title='Second', content='Body')
+        self.first.tags.add('python', 'django')
+        self.second.tags.add('python')
+
+    def counts(self):
+        return dict(TagStat.objects.values_list('tag__name', 'post_count'))
+
+    def test_counts_follow_tag_changes(self):
+        self.assertEqual(self.counts(), {'python': 2, 'django': 1})
+        self.first.tags.remove('python')
+        self.second.tags.set(['django', 'web'])
+        self.assertEqual(self.counts(), {'python': 0, 'django': 2, 'web': 1})
+        self.first.tags.clear()
+        self.second.delete()
+        self.assertEqual(self.counts(), {'python': 0, 'django': 0, 'web': 0})
+
+    def test_rebuild_matches_incremental_counts(self):
+        self.first.tags.add('extra')
+        incremental = self.counts()
+        TagStat.objects.update(post_count=99)
+        rebuild_tag_stats()
+        self.assertEqual(self.counts(), incremental)
+
+    def test_rebuild_command(self):
+        TagStat.objects.all().delete()
+        out = StringIO()
+        call_command('rebuild_tag_stats', stdout=out)
+        self.assertIn('Counted 2 tags', out.getvalue())
+        self.assertEqual(self.counts(), {'python': 2, 'django': 1})
+
+    def test_tag_listing_is_paginated_without_counting(self):
+        for i in range(6):
+            Post.objects.create(author=self.author, title=f'Extra {i}', content='Body').tags.add('python')
+        # tag with its stats, the page of posts with authors, prefetched tags
+        with self.assertNumQueries(3):
+            response = self.client.get(reverse('posts-by-tag', args=['python']))
+        self.assertEqual(response.context['page_obj'].paginator.count, 8)
+        self.assertEqual(len(response.context['posts']), 5)
+
+    def test_tag_cloud(self):
+        response = self.client.get(reverse('tag-cloud'))
+        self.assertEqual(
+            [stat.tag.name for stat in response.context['tag_stats']], ['python', 'django']
+        )
+
+
+class ImportExportTestCase(TestCase):
+    """
+    Tests for the import_posts and export_posts commands.
+    """
+
+    def setUp(self):
+        self.alice = User.objects.create_user(username='alice', password='testpass123')
+        self.bob = User.objects.create_user(username='bob', password='testpass123')
+        self.tmp = tempfile.mkdtemp()
+
+    def path(self, name, content=None):
+        path = os.path.join(self.tmp, name)
+        if content is not None:
+            with open(path, 'w', encoding='utf-8') as f:
+                f.write(content)
+        return path
+
+    def import_file(self, path, *args):
+        call_command('import_posts', path, *args, stdout=StringIO())
+
+    def test_jsonl_import(self):
+        self.import_file(self.path('posts.jsonl', (
+            '{"ref": "1", "title": "Imported", "content": "Old body", "author": "alice",'
+            ' "published_date": "2020-01-02T03:04:05+00:00", "tags": ["legacy", "django"],'
+            ' "comments": [{"author": "bob", "content": "Welcome back",'
+            ' "created_at": "2020-01-03T00:00:00+00:00"}]}\n'
+            '{"kind": "comment", "post": "1", "author": "alice", "content": "Thanks"}\n'
+            '{"ref": "2", "title": "Ghost", "content": "x", "author": "nobody"}\n'
+        )))
+        post = Post.objects.get(title='Imported')
+        self.assertEqual(post.published_date.year, 2020)
+        self.assertEqual(sorted(post.tags.names()), ['django', 'legacy'])
+        self.assertEqual(post.comments.count(), 2)
+        self.assertEqual(post.comments.first().created_at.day, 3)
+        self.assertFalse(Post.objects.filter(title='Ghost').exists())
+        # bulk writes still feed search and tag statistics
+        self.assertEqual([hit['post'] for hit in search('legacy')], [post.pk])
+        self.assertEqual(TagStat.objects.get(tag__name='legacy').post_count, 1)
+
+    def test_comments_in_later_chunks_bump_their_post_stamp(self):
+        cache.clear()
+        items = [
+            ('post', {'ref': '1', 'title': 'Imported', 'content': 'x', 'author': 'alice'}),
+            ('comment', {'post': '1', 'author': 'bob', 'content': 'Late'}),
+        ]
+        chunks = Importer(chunk_size=1).run(items)
+        next(chunks)
+        # the detail page is served and stamped between the two chunks
+        name = post_stamp_name(Post.objects.get().pk)
+        before = get_stamp(name, lambda: None)
+        next(chunks)
+        self.assertGreater(get_stamp(name, lambda: None), before)
+
+    def test_create_users(self):
+        self.import_file(
+            self.path('posts.jsonl', '{"title": "Hi", "content": "x", "author": "carol"}\n'),
+            '--create-users',
+        )
+        self.assertFalse(User.objects.get(username='carol').has_usable_password())
+
+    def test_round_trip_through_csv(self):
+        post = Post.objects.create(author=self.alice, title='Original, with comma', content='Body')
+        post.tags.add('python')
+        Comment.objects.create(post=post, author=self.bob, content='Nice')
+        exported = self.path('posts.csv')
+        call_command('export_posts', exported, stderr=StringIO())
+        Post.objects.all().delete()
+
+        self.import_file(exported)
+        post = Post.objects.get()
+        self.assertEqual(post.title, 'Original, with comma')
+        self.assertEqual(post.tags.names()[0], 'python')
+        self.assertEqual(post.comments.get().author, self.bob)
+
+    def test_import_queries_do_not_grow_per_row(self):
+        def import_posts(count, prefix):
+            lines = ''.join(
+                f'{{"ref": "{prefix}{i}", "title": "Post {i}", "content": "body", "author": "alice",'
+                f' "tags": ["{prefix}{i % 3}"], "comments": [{{"author": "bob", "content": "c"}}]}}\n'
+                for i in range(count)
+            )
+            with CaptureQueriesContext(connection) as queries:
+                self.import_file(self.path(f'{prefix}.jsonl', lines))
+            return len(queries)
+
+        # a few bulk statements per chunk (SQLite splits big INSERTs in batches)
+        # instead of several queries for every post, comment and tag
+        self.assertLess(import_posts(300, 'bulk'), 30)
+        self.assertLess(import_posts(30, 'small'), 20)
+        self.assertEqual(Post.objects.count(), 330)
+        self.assertEqual(Comment.objects.count(), 330)
@@ -0,0 +1,291 @@
+"""
+Streaming bulk import and export of posts, comments and tags.
+
+Two formats are understood, and export writes what import reads:
+
+JSONL, one post per line, comments nested::
+
+    {"ref": "42", "title": "...", "content": "...", "author": "alice",
+     "published_date": "2024-05-01T10:00:00+00:00", "tags": ["django"],
+     "comments": [{"author": "bob", "content": "...", "created_at": "..."}]}
+
+A line may also be a lone comment: {"kind": "comment", "post": "42", ...}.
+
+CSV with a header row, one post or comment per row. Comment rows point
+at an earlier post row through ``ref``::
+
+    kind,ref,title,content,author,date,tags
+    post,42,Title,Body,alice,2024-05-01T10:00:00+00:00,"django,python"
+    comment,42,,Nice post,bob,2024-05-02T08:00:00+00:00,
+
+Rows are imported in chunks: each chunk is one transaction made of a
+handful of bulk_create calls, whatever its size. bulk_create sends no
+signals, so the search index, tag statistics and page cache stamps that
+the signals normally maintain are updated here in bulk.
+"""
+import csv
+import json
+from collections import Counter
+from itertools import islice
+
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.contrib.contenttypes.models import ContentType
+from django.db import transaction
+from django.db.models import Prefetch
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from django.utils.text import slugify
+from taggit.models import Tag, TaggedItem
+
+from .cache import LIST_STAMP, bump_stamps, post_stamp_name
+from .models import Comment, Post, SearchPosting
+from .search import build_postings
+from .tags import adjust_tag_stats
+
+CSV_FIELDS = ['kind', 'ref', 'title', 'content', 'author', 'date', 'tags']
+
+
+class TransferError(ValueError):
+    """A row that cannot be imported"""
+
+
+def _date(value):
+    if not value:
+        return None
+    parsed = parse_datetime(value)
+    if parsed is None:
+        raise TransferError(f'Invalid date: {value!r}')
+    if timezone.is_naive(parsed):
+        parsed = timezone.make_aware(parsed)
+    return parsed
+
+
+def read_jsonl(lines):
+    """Yield ('post', record) and ('comment', record) items from JSONL lines"""
+    for line in lines:
+        line = line.strip()
+        if not line:
+            continue
+        record = json.loads(line)
+        if record.get('kind') == 'comment':
+            yield 'comment', record
+            continue
+        comments = record.pop('comments', None) or []
+        yield 'post', record
+        for comment in comments:
+            yield 'comment', {**comment, 'post': record.get('ref')}
+
+
+def read_csv(lines):
+    """Yield ('post', record) and ('comment', record) items from CSV rows"""
+    for row in csv.DictReader(lines):
+        tags = [tag.strip() for tag in (row.get('tags') or '').split(',') if tag.strip()]
+        if row.get('kind') == 'comment':
+            yield 'comment', {
+                'post': row['ref'],
+                'author': row['author'],
+                'content': row['content'],
+                'created_at': row.get('date'),
+            }
+        else:
+            yield 'post', {
+                'ref': row.get('ref'),
+                'title': row['title'],
+                'content': row['content'],
+                'author': row['author'],
+                'published_date': row.get('date'),
+                'tags': tags,
+            }
+
+
+READERS = {'jsonl': read_jsonl, 'csv': read_csv}
+
+
+class Importer:
+    """
+    Import items from a reader in chunks of ``chunk_size``.
+    ``post_ids`` maps source refs to new post ids across chunks, so a
+    comment may arrive any time after its post.
+    """
+    def __init__(self, chunk_size=1000, create_users=False):
+        self.chunk_size = chunk_size
+        self.create_users = create_users
+        self.post_ids = {}
+        self.users = {}
+        self.stats = Counter()
+        self.content_type = ContentType.objects.get_for_model(Post)
+
+    def run(self, items):
+        """Import every item; yields the running stats after each chunk"""
+        items = iter(items)
+        while True:
+            chunk = list(islice(items, self.chunk_size))
+            if not chunk:
+                break
+            with transaction.atomic():
+                commented = self.import_chunk(chunk)
+            # a post from an earlier chunk may already have a cached page
+            if commented:
+                bump_stamps(*[post_stamp_name(post_id) for post_id in commented])
+            yield self.stats
+        if self.stats['posts']:
+            bump_stamps(LIST_STAMP)
+
+    def resolve_users(self, usernames):
+        missing = set(usernames) - self.users.keys()
+        if not missing:
+            return
+        self.users.update(User.objects.filter(username__in=missing).values_list('username', 'pk'))
+        unknown = missing - self.users.keys()
+        if unknown and self.create_users:
+            User.objects.bulk_create(
+                [User(username=name, password=make_password(None)) for name in unknown],
+                ignore_conflicts=True,
+            )
+            self.users.update(User.objects.filter(username__in=unknown).values_list('username', 'pk'))
+
+    def resolve_tags(self, names):
+        """{name: tag id}, creating missing tags in one batch where possible"""
+        tags = dict(Tag.objects.filter(name__in=names).values_list('name', 'pk'))
+        missing = [name for name in names if name not in tags]
+        if missing:
+            Tag.objects.bulk_create(
+                [Tag(name=name, slug=slugify(name, allow_unicode=True)) for name in missing],
+                ignore_conflicts=True,
+            )
+            tags.update(Tag.objects.filter(name__in=missing).values_list('name', 'pk'))
+            for name in missing:
+                if name not in tags:
+                    # slug clash with an existing tag: let taggit pick a unique slug
+                    tags[name] = Tag.objects.create(name=name).pk
+        return tags
+
+    def import_chunk(self, chunk):
+        """Write one chunk; returns the ids of posts that received comments"""
+        post_records = [record for kind, record in chunk if kind == 'post']
+        comment_records = [record for kind, record in chunk if kind == 'comment']
+        self.resolve_users(
+            [record.get('author') or '' for _, record in chunk]
+        )
+
+        posts, dates, post_extras = [], [], []
+        for record in post_records:
+            author_id = self.users.get(record.get('author') or '')
+            if author_id is None:
+                self.stats['skipped'] += 1
+                continue
+            posts.append(Post(
+                title=record['title'][:200],
+                content=record.get('content') or '',
+                author_id=author_id,
+            ))
+            dates.append(_date(record.get('published_date')))
+            post_extras.append((record.get('ref'), list(dict.fromkeys(record.get('tags') or []))))
+
+        Post.objects.bulk_create(posts)
+        dated = []
+        for post, date in zip(posts, dates):
+            if date is not None:
+                post.published_date = post.updated_at = date
+                dated.append(post)
+        if dated:
+            # auto_now_add overwrote the source dates on insert
+            Post.objects.bulk_update(dated, ['published_date', 'updated_at'])
+        for post, (ref, _) in zip(posts, post_extras):
+            if ref is not None:
+                self.post_ids[str(ref)] = post.pk
+
+        tags = self.resolve_tags({name for _, names in post_extras for name in names})
+        TaggedItem.objects.bulk_create([
+            TaggedItem(content_type=self.content_type, object_id=post.pk, tag_id=tags[name])
+            for post, (_, names) in zip(posts, post_extras)
+            for name in names
+        ])
+        usage = Counter(tags[name] for _, names in post_extras for name in names)
+        for uses in set(usage.values()):
+            adjust_tag_stats([tag_id for tag_id, n in usage.items() if n == uses], uses)
+
+        SearchPosting.objects.bulk_create([
+            SearchPosting(term=term, post_id=post.pk, weight=weight)
+            for post, (_, names) in zip(posts, post_extras)
+            for term, weight in build_postings(post.title, post.content, names).items()
+        ], batch_size=1000)
+
+        comments, comment_dates = [], []
+        for record in comment_records:
+            post_id = self.post_ids.get(str(record.get('post')))
+            author_id = self.users.get(record.get('author') or '')
+            if post_id is None or author_id is None:
+                self.stats['skipped'] += 1
+                continue
+            comments.append(Comment(post_id=post_id, author_id=author_id, content=record['content']))
+            comment_dates.append(_date(record.get('created_at')))
+        Comment.objects.bulk_create(comments)
+        dated = []
+        for comment, date in zip(comments, comment_dates):
+            if date is not None:
+                comment.created_at = comment.updated_at = date
+                dated.append(comment)
+        if dated:
+            Comment.objects.bulk_update(dated, ['created_at', 'updated_at'])
+
+        self.stats['posts'] += len(posts)
+        self.stats['comments'] += len(comments)
+        self.stats['rows'] += len(chunk)
+        return {comment.post_id for comment in comments}
+
+
+def export_queryset(chunk_size=1000):
+    return (
+        Post.objects.select_related('author')
+        .prefetch_related('tags', Prefetch('comments', Comment.objects.select_related('author')))
+        .order_by('pk')
+        .iterator(chunk_size=chunk_size)
+    )
+
+
+def write_jsonl(posts, out):
+    """Write posts as JSONL; returns the number of posts written"""
+    count = 0
+    for post in posts:
+        out.write(json.dumps({
+            'ref': str(post.pk),
+            'title': post.title,
+            'content': post.content,
+            'author': post.author.username,
+            'published_date': post.published_date.isoformat(),
+            'tags': [tag.name for tag in post.tags.all()],
+            'comments': [
+                {
+                    'author': comment.author.username,
+                    'content': comment.content,
+                    'created_at': comment.created_at.isoformat(),
+                }
+                for comment in post.comments.all()
+            ],
+        }) + '\n')
+        count += 1
+    return count
+
+
+def write_csv(posts, out):
+    """Write posts and their comments as CSV rows; returns the number of posts written"""
+    writer = csv.writer(out)
+    writer.writerow(CSV_FIELDS)
+    count = 0
+    for post in posts:
+        writer.writerow([
+            'post', post.pk, post.title, post.content, post.author.username,
+            post.published_date.isoformat(), ','.join(tag.name for tag in post.tags.all()),
+        ])
+        for comment in post.comments.all():
+            writer.writerow([
+                'comment', post.pk, '', comment.content, comment.author.username,
+                comment.created_at.isoformat(), '',
+            ])
+        count += 1
+    return count
+
+
+WRITERS = {'jsonl': write_jsonl, 'csv': write_csv}
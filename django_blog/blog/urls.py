@@ -18,10 +18,12 @@ urlpatterns = [
 
     # Comment URLs
     path('post/<int:pk>/comments/new/', views.add_comment, name='add-comment'),
+    path('post/<int:pk>/comments/', views.load_comments, name='load-comments'),
     path('comment/<int:pk>/update/', views.CommentUpdateView.as_view(), name='comment-update'),
     path('comment/<int:pk>/delete/', views.CommentDeleteView.as_view(), name='comment-delete'),
 
         # Search and Tag URLs
     path('search/', views.search_posts, name='search'),
+    path("tags/", views.TagCloudView.as_view(), name="tag-cloud"),
     path("tags/<slug:tag_slug>/", views.PostByTagListView.as_view(), name="posts-by-tag")
 ]
\ No newline at end of file
@@ -1,13 +1,25 @@
+import base64
 from django.shortcuts import render, redirect, get_object_or_404
+from django.http import Http404
+from django.utils.dateparse import parse_datetime
 from django.contrib.auth import login, logout, authenticate
 from django.contrib.auth.decorators import login_required
 from django.contrib.auth.mixins import LoginRequiredMixin, UserPassesTestMixin
 from django.contrib import messages
 from django.views.generic import ListView, DetailView, CreateView, UpdateView, DeleteView
-from django.urls import reverse_lazy
+from django.urls import reverse, reverse_lazy
+from django.utils.http import urlencode
 from django.db.models import Q
-from .models import Post, Comment
+from django.utils.decorators import method_decorator
+from django.core.paginator import Paginator
+from taggit.models import Tag
+from .models import Post, Comment, TagStat
 from .forms import CustomUserCreationForm, UserUpdateForm, CommentForm
+from .search import search
+from .cache import cached_page, list_stamp, post_stamp
+
+SEARCH_RESULTS_PER_PAGE = 10
+COMMENTS_PER_PAGE = 20
 
 def home(request):
     """Home page view"""
@@ -52,34 +64,110 @@ def profile(request):
     
     return render(request, 'blog/profile.html', {'form': form})
 
+@method_decorator(cached_page(lambda request: list_stamp()), name='dispatch')
 class PostListView(ListView):
     """
     Display list of all blog posts.
     Uses ListView generic view to show all posts ordered by published date.
+    Anonymous pages are cached until any post changes (see blog.cache).
     """
     model = Post
     template_name = 'blog/post_list.html'
     context_object_name = 'posts'
     ordering = ['-published_date']
     paginate_by = 5
+    
+    def get_context_data(self, **kwargs):
+        """Add the list version stamp used to key template fragments"""
+        context = super().get_context_data(**kwargs)
+        context['cache_stamp'] = list_stamp().timestamp()
+        return context
 
 
+@method_decorator(cached_page(lambda request, pk: post_stamp(pk)), name='dispatch')
 class PostDetailView(DetailView):
     """
     Display individual blog post details.
     Shows full content of a single post.
+    Anonymous pages are cached until the post or its comments change.
     """
     model = Post
     template_name = 'blog/post_detail.html'
 
+    def get_queryset(self):
+        return Post.objects.select_related('author').prefetch_related('tags')
+
     def get_context_data(self, **kwargs):
-        """Add comment form and comments to context"""
+        """
+        Add comment form, the first page of comments and the post's version
+        stamp to context. Further comments are fetched from load_comments.
+        """
         context = super().get_context_data(**kwargs)
-        context['comments'] = self.object.comments.all()
+        comments, next_cursor = comment_page(self.object.pk)
+        context['comments'] = comments
+        context['next_comments_url'] = comments_url(self.object.pk, next_cursor)
         context['comment_form'] = CommentForm()
+        context['cache_stamp'] = post_stamp(self.object.pk).timestamp()
         return context
 
 
+def encode_comment_cursor(comment):
+    """Opaque position of a comment in its post's (created_at, id) order"""
+    raw = f'{comment.created_at.isoformat()}|{comment.pk}'
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+
+def decode_comment_cursor(cursor):
+    """(created_at, id) from a cursor, or None if it is missing or invalid"""
+    try:
+        created_at, pk = base64.urlsafe_b64decode(cursor.encode()).decode().split('|')
+        created_at = parse_datetime(created_at)
+        return (created_at, int(pk)) if created_at else None
+    except (AttributeError, ValueError):
+        return None
+
+
+def comment_page(post_id, cursor=None):
+    """
+    Up to COMMENTS_PER_PAGE comments of a post after ``cursor``, oldest
+    first, with their authors. Returns (comments, next cursor or None).
+    Uses the (post, created_at) index however deep the client has read.
+    """
+    comments = Comment.objects.filter(post_id=post_id).select_related('author')
+    position = decode_comment_cursor(cursor)
+    if position:
+        created_at, pk = position
+        comments = comments.filter(
+            Q(created_at__gt=created_at) | Q(created_at=created_at, pk__gt=pk)
+        )
+    comments = list(comments.order_by('created_at', 'pk')[:COMMENTS_PER_PAGE + 1])
+    if len(comments) > COMMENTS_PER_PAGE:
+        comments = comments[:COMMENTS_PER_PAGE]
+        return comments, encode_comment_cursor(comments[-1])
+    return comments, None
+
+
+def comments_url(post_id, cursor):
+    if cursor is None:
+        return None
+    return f"{reverse('load-comments', args=[post_id])}?{urlencode({'cursor': cursor})}"
+
+
+@cached_page(lambda request, pk: post_stamp(pk))
+def load_comments(request, pk):
+    """
+    HTML fragment with the next page of a post's comments.
+    Used by the "Load more comments" link on the post detail page.
+    """
+    comments, next_cursor = comment_page(pk, request.GET.get('cursor'))
+    if not comments and not Post.objects.filter(pk=pk).exists():
+        raise Http404('Post not found')
+    return render(request, 'blog/comment_list.html', {
+        'comments': comments,
+        'next_comments_url': comments_url(pk, next_cursor),
+    })
+
+
 class PostCreateView(LoginRequiredMixin, CreateView):
     """
     Create new blog post.
@@ -232,32 +320,83 @@ class CommentDeleteView(LoginRequiredMixin, UserPassesTestMixin, DeleteView):
 def search_posts(request):
     """
     Search posts by title, content, or tags.
-    Uses Q objects for complex queries.
+    Uses the inverted index in blog.search, ranks posts by how well they
+    match and only loads the posts on the requested page.
     """
     query = request.GET.get('q', '')
-    posts = Post.objects.none()
+    page_obj = None
+    posts = []
     
     if query:
-        posts = Post.objects.filter(
-            Q(title__icontains=query) |
-            Q(content__icontains=query) |
-            Q(tags__name__icontains=query)
-        ).distinct()
+        paginator = Paginator(search(query), SEARCH_RESULTS_PER_PAGE)
+        page_obj = paginator.get_page(request.GET.get('page'))
+        post_ids = [hit['post'] for hit in page_obj.object_list]
+        found = Post.objects.select_related('author').prefetch_related('tags').in_bulk(post_ids)
+        posts = [found[post_id] for post_id in post_ids if post_id in found]
     
     return render(request, 'blog/search_results.html', {
         'posts': posts,
+        'page_obj': page_obj,
         'query': query
     })
 
 
+class CountedPaginator(Paginator):
+    """Paginator that takes the total from a stored count instead of COUNT(*)"""
+    def __init__(self, object_list, per_page, count, **kwargs):
+        super().__init__(object_list, per_page, **kwargs)
+        self.count = count
+
+
 class PostByTagListView(ListView):
     """
-    Display all posts with a specific tag.
+    Display all posts with a specific tag, newest first.
+    The total comes from TagStat, so paging never counts the through table.
     """
     model = Post
-    template_name = 'blog/post_list.html'  # reuse your post list template
+    template_name = 'blog/posts_by_tags.html'
     context_object_name = 'posts'
+    paginate_by = 5
 
     def get_queryset(self):
         # filter posts by tag slug from the URL
-        return Post.objects.filter(tags__slug=self.kwargs['tag_slug'])
\ No newline at end of file
+        self.tag = get_object_or_404(
+            Tag.objects.select_related('blog_stat'), slug=self.kwargs['tag_slug']
+        )
+        return (
+            Post.objects.filter(tags=self.tag)
+            .select_related('author')
+            .prefetch_related('tags')
+            .order_by('-published_date', '-pk')
+        )
+
+    def get_paginator(self, queryset, per_page, orphans=0, allow_empty_first_page=True, **kwargs):
+        stat = getattr(self.tag, 'blog_stat', None)
+        if stat is None:
+            return super().get_paginator(queryset, per_page, orphans, allow_empty_first_page, **kwargs)
+        return CountedPaginator(
+            queryset, per_page, stat.post_count,
+            orphans=orphans, allow_empty_first_page=allow_empty_first_page, **kwargs
+        )
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context['tag'] = self.tag
+        context['tag_name'] = self.tag.name
+        return context
+
+
+class TagCloudView(ListView):
+    """
+    Tags with their post counts, most used first (?sort=recent for the
+    most recently used). Reads only the materialised TagStat table.
+    """
+    template_name = 'blog/tag_cloud.html'
+    context_object_name = 'tag_stats'
+    paginate_by = 100
+
+    def get_queryset(self):
+        stats = TagStat.objects.filter(post_count__gt=0).select_related('tag')
+        if self.request.GET.get('sort') == 'recent':
+            return stats.order_by('-last_used_at')
+        return stats.order_by('-post_count')
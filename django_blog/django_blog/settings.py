@@ -131,4 +131,18 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 LOGIN_REDIRECT_URL = 'home'
 LOGOUT_REDIRECT_URL = 'home'
-LOGIN_URL = 'login'
\ No newline at end of file
+LOGIN_URL = 'login'
+# Cache
+# https://docs.djangoproject.com/en/5.2/topics/cache/
+# Post pages are cached and invalidated through version stamps kept in the
+# cache (see blog/cache.py). With several server processes this must be a
+# shared backend such as Redis or Memcached, or other processes keep
+# serving stale pages until BLOG_PAGE_CACHE_TIMEOUT expires.
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    }
+}
+
+BLOG_PAGE_CACHE_TIMEOUT = 600
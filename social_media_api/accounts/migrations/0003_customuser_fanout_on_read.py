@@ -0,0 +1,27 @@
+# Generated by Django 5.2.5 on 2026-10-18 09:40
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+def flag_read_merged_authors(apps, schema_editor):
+    # authors currently above the threshold have not been fanned out
+    CustomUser = apps.get_model('accounts', 'CustomUser')
+    threshold = getattr(settings, 'FEED_FANOUT_MAX_FOLLOWERS', 5000)
+    CustomUser.objects.filter(followers_count__gt=threshold).update(fanout_on_read=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0002_stored_follow_counts'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='customuser',
+            name='fanout_on_read',
+            field=models.BooleanField(db_index=True, default=False),
+        ),
+        migrations.RunPython(flag_read_merged_authors, migrations.RunPython.noop),
+    ]
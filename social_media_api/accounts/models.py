@@ -14,6 +14,12 @@ class CustomUser(AbstractUser):
         related_name='following',
         blank=True
     )
+    # Stored counts, kept in step by follow_user/unfollow_user
+    followers_count = models.PositiveIntegerField(default=0, db_index=True)
+    following_count = models.PositiveIntegerField(default=0)
+    # Set once the user has posted as a fan-out-on-read author, i.e. has
+    # posts missing from followers' timelines (see posts.feed)
+    fanout_on_read = models.BooleanField(default=False, db_index=True)
     
     def __str__(self):
         return self.username
\ No newline at end of file
@@ -34,18 +34,8 @@ class UserSerializer(serializers.ModelSerializer):
     Serializer for user profile display.
     Shows user information without password.
     """
-    followers_count = serializers.SerializerMethodField()
-    following_count = serializers.SerializerMethodField()
-    
     class Meta:
         model = User
         fields = ['id', 'username', 'email', 'bio', 'profile_picture', 
                   'followers_count', 'following_count']
-    
-    def get_followers_count(self, obj):
-        """Count how many followers user has"""
-        return obj.followers.count()
-    
-    def get_following_count(self, obj):
-        """Count how many users this user follows"""
-        return obj.following.count()
\ No newline at end of file
+        read_only_fields = ['followers_count', 'following_count']
\ No newline at end of file
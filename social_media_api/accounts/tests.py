@@ -1,3 +1,42 @@
-from django.test import TestCase
+from django.test import TestCase, override_settings
+from django.contrib.auth import get_user_model
+from rest_framework.test import APIClient
 
-# Create your tests here.
+User = get_user_model()
+
+
+@override_settings(SECURE_SSL_REDIRECT=False)
+class FollowCounterTestCase(TestCase):
+    """
+    Stored followers_count/following_count follow the follow graph.
+    """
+
+    def setUp(self):
+        self.client = APIClient()
+        self.alice = User.objects.create_user(username='alice', password='testpass123')
+        self.bob = User.objects.create_user(username='bob', password='testpass123')
+        self.client.force_authenticate(user=self.alice)
+
+    def assertCounts(self, user, followers, following):
+        user.refresh_from_db()
+        self.assertEqual((user.followers_count, user.following_count), (followers, following))
+
+    def test_follow_is_counted_once(self):
+        self.client.post(f'/api/accounts/follow/{self.bob.id}/')
+        self.client.post(f'/api/accounts/follow/{self.bob.id}/')
+        self.assertTrue(self.alice.following.filter(pk=self.bob.pk).exists())
+        self.assertCounts(self.bob, 1, 0)
+        self.assertCounts(self.alice, 0, 1)
+
+    def test_unfollow_decrements_and_is_safe_to_repeat(self):
+        self.client.post(f'/api/accounts/follow/{self.bob.id}/')
+        self.client.post(f'/api/accounts/unfollow/{self.bob.id}/')
+        self.client.post(f'/api/accounts/unfollow/{self.bob.id}/')
+        self.assertCounts(self.bob, 0, 0)
+        self.assertCounts(self.alice, 0, 0)
+
+    def test_profile_reports_stored_counts(self):
+        self.client.post(f'/api/accounts/follow/{self.bob.id}/')
+        self.alice.refresh_from_db()
+        response = self.client.get('/api/accounts/profile/')
+        self.assertEqual(response.data['following_count'], 1)
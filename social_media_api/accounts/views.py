@@ -4,12 +4,15 @@ from rest_framework.response import Response
 from rest_framework.authtoken.models import Token
 from rest_framework.authtoken.views import ObtainAuthToken
 from django.contrib.auth import get_user_model
+from django.db import transaction
 from .serializers import UserRegistrationSerializer, UserSerializer
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework import status
 from rest_framework.response import Response
 
 CustomUser = get_user_model()
+# Through table of CustomUser.followers: from_customuser is followed by to_customuser
+Follow = CustomUser.followers.through
 
 class RegisterView(generics.GenericAPIView):
     """
@@ -76,14 +79,27 @@ def follow_user(request, user_id):
                 status=status.HTTP_400_BAD_REQUEST
             )
         
-        request.user.following.add(user_to_follow)
+        from posts.counters import adjust_counter
+        from posts.feed import backfill_timeline
         
-        from notifications.models import Notification
-        Notification.objects.create(
-            recipient=user_to_follow,
-            actor=request.user,
-            verb='started following you'
-        )
+        with transaction.atomic():
+            _, created = Follow.objects.get_or_create(
+                from_customuser=user_to_follow,
+                to_customuser=request.user
+            )
+            if created:
+                adjust_counter(CustomUser, user_to_follow.pk, 'followers_count', 1)
+                adjust_counter(CustomUser, request.user.pk, 'following_count', 1)
+        
+        if created:
+            backfill_timeline(request.user, user_to_follow)
+            
+            from notifications.outbox import enqueue_notification
+            enqueue_notification(
+                recipient=user_to_follow,
+                actor=request.user,
+                verb='started following you'
+            )
         
         return Response(
             {'message': f'You are now following {user_to_follow.username}'},
@@ -106,8 +122,20 @@ def unfollow_user(request, user_id):
     try:
         user_to_unfollow = CustomUser.objects.get(id=user_id)
         
+        from posts.counters import adjust_counter
+        from posts.feed import remove_from_timeline
+        
         # Remove from following list
-        request.user.following.remove(user_to_unfollow)
+        with transaction.atomic():
+            removed, _ = Follow.objects.filter(
+                from_customuser=user_to_unfollow,
+                to_customuser=request.user
+            ).delete()
+            if removed:
+                adjust_counter(CustomUser, user_to_unfollow.pk, 'followers_count', -1)
+                adjust_counter(CustomUser, request.user.pk, 'following_count', -1)
+        
+        remove_from_timeline(request.user, user_to_unfollow)
         
         return Response(
             {'message': f'You have unfollowed {user_to_unfollow.username}'},
@@ -1,7 +1,12 @@
 from django.contrib import admin
-from .models import Notification
+from .models import Notification, PendingNotification
 
 @admin.register(Notification)
 class NotificationAdmin(admin.ModelAdmin):
-    list_display = ['recipient', 'actor', 'verb', 'timestamp', 'read']
-    list_filter = ['read', 'timestamp']
\ No newline at end of file
+    list_display = ['recipient', 'actor', 'verb', 'actor_count', 'timestamp', 'read']
+    raw_id_fields = ['actors']
+    list_filter = ['read', 'timestamp']
+
+@admin.register(PendingNotification)
+class PendingNotificationAdmin(admin.ModelAdmin):
+    list_display = ['recipient', 'actor', 'verb', 'created_at']
\ No newline at end of file
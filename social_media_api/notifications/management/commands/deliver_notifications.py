@@ -0,0 +1,44 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from notifications.outbox import deliver_all
+
+
+class Command(BaseCommand):
+    help = 'Deliver queued notifications from the outbox in batches'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=500,
+            help='Outbox rows to deliver per transaction'
+        )
+        parser.add_argument(
+            '--interval',
+            type=float,
+            default=1.0,
+            help='Seconds to sleep when the outbox is empty'
+        )
+        parser.add_argument(
+            '--once',
+            action='store_true',
+            help='Drain the outbox once and exit instead of polling'
+        )
+
+    def handle(self, *args, **options):
+        if options['once']:
+            delivered = deliver_all(options['batch_size'])
+            self.stdout.write(self.style.SUCCESS(f'Delivered {delivered} notifications'))
+            return
+
+        self.stdout.write('Polling notification outbox (Ctrl+C to stop)')
+        try:
+            while True:
+                close_old_connections()
+                if not deliver_all(options['batch_size']):
+                    time.sleep(options['interval'])
+        except KeyboardInterrupt:
+            self.stdout.write('Stopped')
@@ -0,0 +1,45 @@
+# Generated by Django 5.2.5 on 2026-10-18 04:16
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+def populate_actors(apps, schema_editor):
+    """Existing notifications become single-actor groups"""
+    Notification = apps.get_model('notifications', 'Notification')
+    Through = Notification.actors.through
+    rows = Notification.objects.values_list('id', 'actor_id').iterator(chunk_size=1000)
+    batch = []
+    for notification_id, actor_id in rows:
+        batch.append(Through(notification_id=notification_id, customuser_id=actor_id))
+        if len(batch) >= 1000:
+            Through.objects.bulk_create(batch, ignore_conflicts=True)
+            batch = []
+    Through.objects.bulk_create(batch, ignore_conflicts=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('contenttypes', '0002_remove_content_type_name'),
+        ('notifications', '0002_pendingnotification'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='notification',
+            name='actor_count',
+            field=models.PositiveIntegerField(default=1),
+        ),
+        migrations.AddField(
+            model_name='notification',
+            name='actors',
+            field=models.ManyToManyField(blank=True, related_name='grouped_notifications', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddIndex(
+            model_name='notification',
+            index=models.Index(fields=['recipient', '-timestamp'], name='notif_recipient_recent_idx'),
+        ),
+        migrations.RunPython(populate_actors, migrations.RunPython.noop),
+    ]
@@ -6,6 +6,9 @@ from django.contrib.contenttypes.models import ContentType
 class Notification(models.Model):
     """
     Stores notifications for user actions (follows, likes, comments).
+    Events with the same recipient, verb and target inside a time window
+    are grouped into one row: ``actor`` is the latest actor and
+    ``actor_count`` how many distinct actors the group holds.
     """
     recipient = models.ForeignKey(
         settings.AUTH_USER_MODEL,
@@ -29,11 +32,99 @@ class Notification(models.Model):
     target_object_id = models.PositiveIntegerField(null=True, blank=True)
     target = GenericForeignKey('target_content_type', 'target_object_id')
     
+    actors = models.ManyToManyField(
+        settings.AUTH_USER_MODEL,
+        related_name='grouped_notifications',
+        blank=True
+    )
+    actor_count = models.PositiveIntegerField(default=1)
+    
     timestamp = models.DateTimeField(auto_now_add=True)
     read = models.BooleanField(default=False)
     
     class Meta:
         ordering = ['-timestamp']
+        indexes = [
+            models.Index(fields=['recipient', '-timestamp'], name='notif_recipient_recent_idx'),
+            models.Index(fields=['recipient', 'read', '-timestamp'], name='notif_recipient_unread_idx'),
+        ]
+    
+    @property
+    def summary(self):
+        """Human readable text, e.g. 'alice and 241 others liked your post'"""
+        others = self.actor_count - 1
+        if others <= 0:
+            return f'{self.actor.username} {self.verb}'
+        noun = 'other' if others == 1 else 'others'
+        return f'{self.actor.username} and {others} {noun} {self.verb}'
+    
+    def __str__(self):
+        return self.summary
+
+
+class PendingNotification(models.Model):
+    """
+    Outbox row for a notification that has not been delivered yet.
+    Request handlers only insert here; the deliver_notifications worker
+    turns batches of these into Notification rows.
+    Repeats of the same event share a dedupe_key and collapse into one row.
+    """
+    recipient = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='+'
+    )
+    actor = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='+'
+    )
+    verb = models.CharField(max_length=255)
+    target_content_type = models.ForeignKey(
+        ContentType,
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True
+    )
+    target_object_id = models.PositiveIntegerField(null=True, blank=True)
+    dedupe_key = models.CharField(max_length=255, unique=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    
+    class Meta:
+        ordering = ['id']
+    
+    def __str__(self):
+        return f'Pending: {self.dedupe_key}'
+
+
+class UnreadCounter(models.Model):
+    """
+    Stored number of unread notifications per user, so the badge count
+    is a primary key lookup instead of a COUNT over the notifications.
+    """
+    user = models.OneToOneField(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='unread_counter'
+    )
+    count = models.PositiveIntegerField(default=0)
+    
+    def __str__(self):
+        return f'{self.user_id}: {self.count} unread'
+
+
+class PubSubMessage(models.Model):
+    """
+    A message published through pubsub.DatabaseBackend. Rows only live
+    long enough for every process to poll them.
+    """
+    channel = models.CharField(max_length=100)
+    message = models.JSONField(default=dict)
+    created_at = models.DateTimeField(auto_now_add=True, db_index=True)
+    
+    class Meta:
+        ordering = ['id']
     
     def __str__(self):
-        return f'{self.actor.username} {self.verb}'
\ No newline at end of file
+        return f'{self.channel}: {self.message}'
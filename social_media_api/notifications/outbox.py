@@ -0,0 +1,164 @@
+from collections import Counter
+from datetime import timedelta
+
+from django.conf import settings
+from django.contrib.contenttypes.models import ContentType
+from django.db import transaction
+from django.utils import timezone
+
+from .models import Notification, PendingNotification
+from .pubsub import publish_to_users
+from .unread import adjust_unread, ensure_counters
+
+
+def group_window():
+    """Seconds during which events on the same target join one notification"""
+    return getattr(settings, 'NOTIFICATION_GROUP_WINDOW', 86400)
+
+
+def make_dedupe_key(recipient_id, actor_id, verb, content_type_id, object_id):
+    return f'{recipient_id}:{actor_id}:{content_type_id or ""}:{object_id or ""}:{verb}'[:255]
+
+
+def group_key(item):
+    """(recipient, verb, target) that events are grouped on"""
+    return (
+        item.recipient_id,
+        item.verb,
+        item.target_content_type_id,
+        item.target_object_id,
+    )
+
+
+def enqueue_notification(recipient, actor, verb, target=None):
+    """
+    Queue a notification for background delivery.
+    Costs a single INSERT on the request path; an identical event that is
+    still waiting in the outbox is silently ignored.
+    ``recipient`` and ``actor`` may be users or user ids.
+    """
+    recipient_id = getattr(recipient, 'pk', recipient)
+    actor_id = getattr(actor, 'pk', actor)
+    content_type_id = object_id = None
+    if target is not None:
+        content_type_id = ContentType.objects.get_for_model(target).id
+        object_id = target.pk
+    PendingNotification.objects.bulk_create(
+        [PendingNotification(
+            recipient_id=recipient_id,
+            actor_id=actor_id,
+            verb=verb,
+            target_content_type_id=content_type_id,
+            target_object_id=object_id,
+            dedupe_key=make_dedupe_key(recipient_id, actor_id, verb, content_type_id, object_id),
+        )],
+        ignore_conflicts=True,
+    )
+
+
+def _open_groups(pending):
+    """
+    Latest notification per group key among ``pending`` that is still
+    inside the grouping window, and which of the pending actors each one
+    already holds.
+    """
+    cutoff = timezone.now() - timedelta(seconds=group_window())
+    candidates = Notification.objects.filter(
+        recipient_id__in={p.recipient_id for p in pending},
+        verb__in={p.verb for p in pending},
+        timestamp__gte=cutoff,
+    ).order_by('timestamp').select_for_update()
+    groups = {group_key(n): n for n in candidates}
+
+    members = {key: set() for key in groups}
+    by_id = {n.id: key for key, n in groups.items()}
+    existing = Notification.actors.through.objects.filter(
+        notification_id__in=by_id,
+        customuser_id__in={p.actor_id for p in pending},
+    ).values_list('notification_id', 'customuser_id')
+    for notification_id, actor_id in existing:
+        members[by_id[notification_id]].add(actor_id)
+    return groups, members
+
+
+def deliver_pending(batch_size=500):
+    """
+    Apply one batch from the outbox to the grouped Notification rows.
+    An event joins the open group for its (recipient, verb, target), bumping
+    actor_count and marking it unread, or starts a new group. An actor who
+    is already in the group (like -> unlike -> like) changes nothing.
+    Rows are claimed with SKIP LOCKED where the database supports it, so
+    several workers can run side by side. Returns the number of outbox
+    rows consumed.
+    """
+    with transaction.atomic():
+        pending = list(
+            PendingNotification.objects.select_for_update(skip_locked=True)
+            .order_by('id')[:batch_size]
+        )
+        if not pending:
+            return 0
+
+        groups, members = _open_groups(pending)
+        added = {key: [] for key in groups}
+        ensure_counters({item.recipient_id for item in pending})
+        newly_unread = Counter()
+        now = timezone.now()
+        for item in pending:
+            key = group_key(item)
+            group = groups.get(key)
+            if group is None:
+                group = groups[key] = Notification(
+                    recipient_id=item.recipient_id,
+                    actor_id=item.actor_id,
+                    verb=item.verb,
+                    target_content_type_id=item.target_content_type_id,
+                    target_object_id=item.target_object_id,
+                    actor_count=0,
+                )
+                members[key] = set()
+                added[key] = []
+                newly_unread[item.recipient_id] += 1
+            if item.actor_id in members[key]:
+                continue
+            if group.pk is not None and group.read:
+                newly_unread[item.recipient_id] += 1
+            members[key].add(item.actor_id)
+            added[key].append(item.actor_id)
+            group.actor_id = item.actor_id
+            group.actor_count += 1
+            group.timestamp = now
+            group.read = False
+
+        new_groups = [n for n in groups.values() if n.pk is None]
+        changed = [n for key, n in groups.items() if n.pk is not None and added[key]]
+        Notification.objects.bulk_create(new_groups)
+        if changed:
+            Notification.objects.bulk_update(
+                changed, ['actor', 'actor_count', 'timestamp', 'read']
+            )
+        Through = Notification.actors.through
+        Through.objects.bulk_create(
+            [
+                Through(notification_id=groups[key].pk, customuser_id=actor_id)
+                for key, actor_ids in added.items()
+                for actor_id in actor_ids
+            ],
+            ignore_conflicts=True,
+        )
+        for recipient_id, delta in newly_unread.items():
+            adjust_unread(recipient_id, delta)
+        PendingNotification.objects.filter(id__in=[item.id for item in pending]).delete()
+        recipients = {item.recipient_id for item in pending}
+        transaction.on_commit(lambda: publish_to_users(recipients))
+    return len(pending)
+
+
+def deliver_all(batch_size=500):
+    """Drain the outbox completely; returns the number of rows consumed"""
+    total = 0
+    while True:
+        done = deliver_pending(batch_size)
+        if not done:
+            return total
+        total += done
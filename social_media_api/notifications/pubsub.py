@@ -0,0 +1,201 @@
+import asyncio
+import threading
+from collections import defaultdict
+from datetime import timedelta
+from functools import lru_cache
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+
+def user_channel(user_id):
+    return f'notifications:{user_id}'
+
+
+class Subscription:
+    """
+    Async handle on one channel, used as ``async with backend.subscribe(ch)``.
+    Messages are only wake-up hints; consumers re-read the database, so a
+    full queue simply drops the extra message.
+    """
+    def __init__(self, backend, channel, maxsize=100):
+        self.backend = backend
+        self.channel = channel
+        self.queue = asyncio.Queue(maxsize=maxsize)
+        self.loop = None
+
+    async def __aenter__(self):
+        self.loop = asyncio.get_running_loop()
+        self.backend.attach(self)
+        return self
+
+    async def __aexit__(self, *exc_info):
+        self.backend.detach(self)
+
+    def offer(self, message):
+        """Queue a message from any thread"""
+        def put():
+            try:
+                self.queue.put_nowait(message)
+            except asyncio.QueueFull:
+                pass
+        self.loop.call_soon_threadsafe(put)
+
+    async def get(self, timeout):
+        """Next message, or None if nothing arrived within ``timeout`` seconds"""
+        try:
+            return await asyncio.wait_for(self.queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+
+
+class BaseBackend:
+    """
+    Interface for notification pub/sub backends.
+    Subclasses deliver ``publish`` calls to attached subscriptions,
+    possibly across processes (e.g. Redis or Postgres LISTEN/NOTIFY).
+    """
+    def publish(self, channel, message):
+        raise NotImplementedError
+
+    def publish_many(self, channels, message):
+        for channel in channels:
+            self.publish(channel, message)
+
+    def attach(self, subscription):
+        raise NotImplementedError
+
+    def detach(self, subscription):
+        raise NotImplementedError
+
+    def subscribe(self, channel):
+        return Subscription(self, channel)
+
+
+class InMemoryBackend(BaseBackend):
+    """
+    Process-local backend. Publishers and subscribers must share a process,
+    so it suits a single-process setup or tests; streams still pick up
+    notifications written elsewhere on their next heartbeat.
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._subscriptions = defaultdict(set)
+
+    def publish(self, channel, message):
+        with self._lock:
+            subscriptions = list(self._subscriptions.get(channel, ()))
+        for subscription in subscriptions:
+            subscription.offer(message)
+
+    def attach(self, subscription):
+        with self._lock:
+            self._subscriptions[subscription.channel].add(subscription)
+
+    def detach(self, subscription):
+        with self._lock:
+            subscriptions = self._subscriptions.get(subscription.channel)
+            if subscriptions is not None:
+                subscriptions.discard(subscription)
+                if not subscriptions:
+                    del self._subscriptions[subscription.channel]
+
+
+def poll_interval():
+    """Seconds between DatabaseBackend polls"""
+    return getattr(settings, 'NOTIFICATION_PUBSUB_POLL_INTERVAL', 1)
+
+
+def retention():
+    """Seconds DatabaseBackend keeps published messages"""
+    return getattr(settings, 'NOTIFICATION_PUBSUB_RETENTION', 60)
+
+
+class DatabaseBackend(InMemoryBackend):
+    """
+    Cross-process backend on the PubSubMessage table, for publishers such
+    as the deliver_notifications worker that run apart from the streams.
+    Each event loop with open subscriptions runs one poller, so a process
+    issues one query per NOTIFICATION_PUBSUB_POLL_INTERVAL however many
+    streams it holds. Publishers prune messages older than
+    NOTIFICATION_PUBSUB_RETENTION seconds.
+    """
+    def __init__(self):
+        super().__init__()
+        self._pollers = {}
+
+    def publish(self, channel, message):
+        self.publish_many([channel], message)
+
+    def publish_many(self, channels, message):
+        from .models import PubSubMessage
+
+        PubSubMessage.objects.bulk_create(
+            [PubSubMessage(channel=channel, message=message) for channel in channels]
+        )
+        cutoff = timezone.now() - timedelta(seconds=retention())
+        PubSubMessage.objects.filter(created_at__lt=cutoff).delete()
+
+    def attach(self, subscription):
+        super().attach(subscription)
+        loop = subscription.loop
+        with self._lock:
+            if loop not in self._pollers:
+                # allow for clock skew between publishers and this process
+                since = timezone.now() - timedelta(seconds=poll_interval())
+                self._pollers[loop] = loop.create_task(self._poll(loop, since))
+
+    def detach(self, subscription):
+        super().detach(subscription)
+        loop = subscription.loop
+        with self._lock:
+            if not self._local_subscriptions(loop):
+                self._pollers.pop(loop).cancel()
+
+    def _local_subscriptions(self, loop):
+        return [
+            subscription
+            for subscriptions in self._subscriptions.values()
+            for subscription in subscriptions
+            if subscription.loop is loop
+        ]
+
+    def _fetch(self, channels, since, last_id):
+        from .models import PubSubMessage
+
+        messages = PubSubMessage.objects.filter(channel__in=channels)
+        if last_id is None:
+            messages = messages.filter(created_at__gte=since)
+        else:
+            messages = messages.filter(id__gt=last_id)
+        return list(messages.order_by('id').values_list('id', 'channel', 'message')[:1000])
+
+    async def _poll(self, loop, since):
+        last_id = None
+        while True:
+            with self._lock:
+                subscriptions = self._local_subscriptions(loop)
+            channels = {subscription.channel for subscription in subscriptions}
+            rows = await sync_to_async(self._fetch)(channels, since, last_id)
+            for _, channel, message in rows:
+                for subscription in subscriptions:
+                    if subscription.channel == channel:
+                        subscription.offer(message)
+            if rows:
+                last_id = rows[-1][0]
+            await asyncio.sleep(poll_interval())
+
+
+@lru_cache(maxsize=None)
+def get_backend():
+    path = getattr(settings, 'NOTIFICATION_PUBSUB_BACKEND', 'notifications.pubsub.DatabaseBackend')
+    return import_string(path)()
+
+
+def publish_to_users(user_ids, message=None):
+    get_backend().publish_many(
+        [user_channel(user_id) for user_id in user_ids],
+        message or {'type': 'notification'},
+    )
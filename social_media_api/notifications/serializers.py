@@ -6,9 +6,25 @@ class NotificationSerializer(serializers.ModelSerializer):
     Converts notification data to JSON.
     """
     actor_username = serializers.ReadOnlyField(source='actor.username')
+    summary = serializers.ReadOnlyField()
+    target = serializers.SerializerMethodField()
     
     class Meta:
         model = Notification
         fields = ['id', 'recipient', 'actor', 'actor_username', 
-                'verb', 'timestamp', 'read']
-        read_only_fields = ['recipient', 'actor', 'timestamp']
\ No newline at end of file
+                'verb', 'actor_count', 'summary', 'target', 'timestamp', 'read']
+        read_only_fields = ['recipient', 'actor', 'actor_count', 'timestamp']
+    
+    def get_target(self, obj):
+        """
+        Short description of the target object, e.g. the post title.
+        Expects targets to be prefetched; see NotificationListView.
+        """
+        target = obj.target
+        if target is None:
+            return None
+        return {
+            'type': target._meta.model_name,
+            'id': target.pk,
+            'title': getattr(target, 'title', None),
+        }
\ No newline at end of file
@@ -1,3 +1,305 @@
-from django.test import TestCase
+import asyncio
+from datetime import timedelta
+from io import StringIO
+from asgiref.sync import sync_to_async
+from django.test import TestCase, override_settings
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+from posts.models import Post
+from posts.pagination import encode_cursor
+from .models import Notification, PendingNotification, UnreadCounter
+from .outbox import deliver_pending, enqueue_notification
+from .pubsub import DatabaseBackend, InMemoryBackend, get_backend, user_channel
+from .views import make_stream_token
 
-# Create your tests here.
+User = get_user_model()
+
+
+@override_settings(SECURE_SSL_REDIRECT=False)
+class NotificationOutboxTestCase(TestCase):
+    """
+    Tests for queued notification delivery.
+    """
+
+    def setUp(self):
+        self.client = APIClient()
+        self.author = User.objects.create_user(username='author', password='testpass123')
+        self.fan = User.objects.create_user(username='fan', password='testpass123')
+        self.post = Post.objects.create(author=self.author, title='Hello', content='body')
+        self.client.force_authenticate(user=self.fan)
+
+    def test_like_queues_instead_of_writing(self):
+        self.client.post(f'/api/posts/{self.post.id}/like/')
+        self.assertEqual(PendingNotification.objects.count(), 1)
+        self.assertFalse(Notification.objects.exists())
+
+        self.assertEqual(deliver_pending(), 1)
+        notification = Notification.objects.get()
+        self.assertEqual(notification.recipient, self.author)
+        self.assertEqual(notification.target, self.post)
+        self.assertFalse(PendingNotification.objects.exists())
+
+    def test_like_unlike_spam_is_deduped(self):
+        for _ in range(3):
+            self.client.post(f'/api/posts/{self.post.id}/like/')
+            self.client.post(f'/api/posts/{self.post.id}/unlike/')
+        self.assertEqual(PendingNotification.objects.count(), 1)
+        deliver_pending()
+
+        self.client.post(f'/api/posts/{self.post.id}/like/')
+        deliver_pending()
+        self.assertEqual(Notification.objects.count(), 1)
+
+    def test_follow_is_queued_and_delivered_by_command(self):
+        self.client.post(f'/api/accounts/follow/{self.author.id}/')
+        out = StringIO()
+        call_command('deliver_notifications', '--once', stdout=out)
+        self.assertIn('Delivered 1', out.getvalue())
+        self.assertEqual(Notification.objects.get().verb, 'started following you')
+
+    def test_likes_on_one_post_are_grouped(self):
+        fans = [User.objects.create_user(username=f'fan{i}') for i in range(3)]
+        for fan in fans:
+            self.client.force_authenticate(user=fan)
+            self.client.post(f'/api/posts/{self.post.id}/like/')
+        deliver_pending(batch_size=2)
+        deliver_pending(batch_size=2)
+
+        notification = Notification.objects.get()
+        self.assertEqual(notification.actor_count, 3)
+        self.assertEqual(notification.actor, fans[-1])
+        self.assertEqual(notification.summary, 'fan2 and 2 others liked your post')
+        self.assertEqual(notification.actors.count(), 3)
+
+    def test_read_group_reopens_on_new_actor(self):
+        self.client.post(f'/api/posts/{self.post.id}/like/')
+        deliver_pending()
+        Notification.objects.update(read=True)
+
+        other = User.objects.create_user(username='other')
+        self.client.force_authenticate(user=other)
+        self.client.post(f'/api/posts/{self.post.id}/like/')
+        deliver_pending()
+
+        notification = Notification.objects.get()
+        self.assertFalse(notification.read)
+        self.assertEqual(notification.actor_count, 2)
+
+
+@override_settings(SECURE_SSL_REDIRECT=False)
+class UnreadNotificationTestCase(TestCase):
+    """
+    Tests for bulk mark-read and the stored unread count.
+    """
+
+    def setUp(self):
+        self.client = APIClient()
+        self.author = User.objects.create_user(username='author', password='testpass123')
+        self.posts = [
+            Post.objects.create(author=self.author, title=f'Post {i}', content='body')
+            for i in range(3)
+        ]
+        fan = User.objects.create_user(username='fan')
+        self.client.force_authenticate(user=fan)
+        for post in self.posts:
+            self.client.post(f'/api/posts/{post.id}/like/')
+        deliver_pending()
+        self.client.force_authenticate(user=self.author)
+
+    def unread(self):
+        return self.client.get('/api/notifications/unread-count/').data['unread_count']
+
+    def test_unread_count_is_single_lookup(self):
+        self.assertEqual(self.unread(), 3)
+        with self.assertNumQueries(1):
+            self.client.get('/api/notifications/unread-count/')
+
+    def test_mark_one_read(self):
+        notification = Notification.objects.first()
+        response = self.client.post(f'/api/notifications/{notification.id}/read/')
+        self.assertEqual(response.status_code, 200)
+        self.client.post(f'/api/notifications/{notification.id}/read/')
+        self.assertEqual(self.unread(), 2)
+
+        response = self.client.post('/api/notifications/999/read/')
+        self.assertEqual(response.status_code, 404)
+
+    def test_mark_selected_and_all_read(self):
+        first = Notification.objects.first()
+        response = self.client.post('/api/notifications/read/', {'ids': [first.id]}, format='json')
+        self.assertEqual(response.data['marked_read'], 1)
+        self.assertEqual(self.unread(), 2)
+
+        response = self.client.post('/api/notifications/read/', format='json')
+        self.assertEqual(response.data['marked_read'], 2)
+        self.assertEqual(self.unread(), 0)
+        self.assertFalse(Notification.objects.filter(read=False).exists())
+
+    def test_counter_seeded_lazily(self):
+        UnreadCounter.objects.all().delete()
+        self.assertEqual(self.unread(), 3)
+
+
+@override_settings(SECURE_SSL_REDIRECT=False)
+class NotificationListQueryTestCase(TestCase):
+    """
+    The notification list must not issue per-row queries.
+    """
+
+    def setUp(self):
+        self.client = APIClient()
+        self.author = User.objects.create_user(username='author', password='testpass123')
+        self.client.force_authenticate(user=self.author)
+
+    def add_notifications(self, count):
+        for i in range(count):
+            fan = User.objects.create_user(username=f'fan{Notification.objects.count()}')
+            post = Post.objects.create(author=self.author, title=f'Post {i}', content='body')
+            Notification.objects.create(recipient=self.author, actor=fan, verb='liked your post', target=post)
+            Notification.objects.create(recipient=self.author, actor=fan, verb='started following you')
+
+    def count_queries(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get('/api/notifications/', {'page_size': 50})
+        return len(queries), response
+
+    def test_query_count_is_constant(self):
+        self.add_notifications(2)
+        small, _ = self.count_queries()
+        self.add_notifications(23)
+        large, response = self.count_queries()
+        self.assertEqual(small, large)
+        self.assertEqual(len(response.data['results']), 50)
+
+    def test_target_summary(self):
+        self.add_notifications(1)
+        results = self.client.get('/api/notifications/').data['results']
+        liked = next(n for n in results if n['target'])
+        self.assertEqual(liked['target']['type'], 'post')
+        self.assertEqual(liked['target']['title'], 'Post 0')
+        self.assertIsNone(next(n for n in results if not n['target'])['target'])
+
+    def test_cursor_walk_skips_regrouped_notification(self):
+        self.add_notifications(3)
+        first = self.client.get('/api/notifications/', {'cursor': '', 'page_size': 2}).data
+        seen = [n['id'] for n in first['results']]
+        # the oldest notification gains an actor and moves to the top
+        regrouped = Notification.objects.order_by('timestamp', 'id').first()
+        Notification.objects.filter(pk=regrouped.pk).update(timestamp=timezone.now())
+        url = first['next']
+        while url:
+            page = self.client.get(url).data
+            seen += [n['id'] for n in page['results']]
+            url = page['next']
+        self.assertEqual(len(seen), len(set(seen)))
+        self.assertNotIn(regrouped.pk, seen)
+        latest = self.client.get('/api/notifications/', {'cursor': ''}).data['results'][0]
+        self.assertEqual(latest['id'], regrouped.pk)
+
+
+@override_settings(
+    SECURE_SSL_REDIRECT=False,
+    NOTIFICATION_STREAM_HEARTBEAT=0.05,
+    NOTIFICATION_STREAM_LIFETIME=0.3,
+)
+class NotificationStreamTestCase(TestCase):
+    """
+    Tests for the server-sent events stream.
+    """
+
+    def setUp(self):
+        self.author = User.objects.create_user(username='author', password='testpass123')
+        self.fan = User.objects.create_user(username='fan')
+        self.token = Token.objects.create(user=self.author)
+
+    def tearDown(self):
+        get_backend.cache_clear()
+
+    async def read_stream(self, **headers):
+        token = await sync_to_async(make_stream_token)(self.author)
+        response = await self.async_client.get(
+            '/api/notifications/stream/', {'token': token}, headers=headers
+        )
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+        return ''.join([chunk.decode() async for chunk in response.streaming_content])
+
+    async def test_requires_token(self):
+        response = await self.async_client.get('/api/notifications/stream/')
+        self.assertEqual(response.status_code, 401)
+
+    async def test_api_token_is_not_accepted_in_url(self):
+        response = await self.async_client.get(
+            '/api/notifications/stream/', {'token': self.token.key}
+        )
+        self.assertEqual(response.status_code, 401)
+
+    def test_stream_token_endpoint(self):
+        client = APIClient()
+        client.force_authenticate(user=self.author)
+        response = client.post('/api/notifications/stream/token/')
+        self.assertEqual(response.data['expires_in'], 60)
+        self.assertNotEqual(response.data['token'], self.token.key)
+
+    @override_settings(NOTIFICATION_STREAM_TOKEN_MAX_AGE=-1)
+    async def test_expired_stream_token_is_rejected(self):
+        token = await sync_to_async(make_stream_token)(self.author)
+        response = await self.async_client.get('/api/notifications/stream/', {'token': token})
+        self.assertEqual(response.status_code, 401)
+
+    async def test_resumes_from_last_event_id(self):
+        start = timezone.now() - timedelta(seconds=1)
+        notification = await Notification.objects.acreate(
+            recipient=self.author, actor=self.fan, verb='started following you'
+        )
+        body = await self.read_stream(last_event_id=encode_cursor(start, 0))
+        self.assertIn('event: notification', body)
+        self.assertIn(f'"id": {notification.id}', body)
+        self.assertIn(': keepalive', body)
+
+    async def test_pubsub_wakes_subscribers(self):
+        backend = InMemoryBackend()
+        async with backend.subscribe(user_channel(1)) as subscription:
+            await asyncio.get_running_loop().run_in_executor(
+                None, backend.publish, user_channel(1), {'type': 'notification'}
+            )
+            self.assertEqual(await subscription.get(1), {'type': 'notification'})
+            self.assertIsNone(await subscription.get(0.01))
+
+    def deliver_like(self):
+        post = Post.objects.create(author=self.author, title='Hello', content='body')
+        enqueue_notification(self.author, self.fan, 'liked your post', post)
+        with self.captureOnCommitCallbacks(execute=True):
+            deliver_pending()
+
+    @override_settings(
+        NOTIFICATION_PUBSUB_BACKEND='notifications.pubsub.DatabaseBackend',
+        NOTIFICATION_PUBSUB_POLL_INTERVAL=0.02,
+        NOTIFICATION_STREAM_HEARTBEAT=10,
+        NOTIFICATION_STREAM_LIFETIME=1,
+    )
+    async def test_outbox_delivery_wakes_stream(self):
+        get_backend.cache_clear()
+        reader = asyncio.create_task(self.read_stream())
+        await asyncio.sleep(0.1)
+        # the worker publishes through its own backend, as in another process
+        get_backend.cache_clear()
+        await sync_to_async(self.deliver_like)()
+        body = await reader
+        # the heartbeat only fires at the end, so the wakeup delivered it
+        self.assertIn('liked your post', body)
+        self.assertLess(body.index('liked your post'), body.index(': keepalive'))
+
+    async def test_database_backend_crosses_instances(self):
+        subscriber, publisher = DatabaseBackend(), DatabaseBackend()
+        with self.settings(NOTIFICATION_PUBSUB_POLL_INTERVAL=0.02):
+            async with subscriber.subscribe(user_channel(1)) as subscription:
+                await sync_to_async(publisher.publish)(user_channel(2), {'type': 'other'})
+                await sync_to_async(publisher.publish)(user_channel(1), {'type': 'notification'})
+                self.assertEqual(await subscription.get(1), {'type': 'notification'})
+                self.assertIsNone(await subscription.get(0.1))
+        self.assertEqual(subscriber._pollers, {})
@@ -0,0 +1,42 @@
+from django.db.models import Count
+
+from posts.counters import adjust_counter
+
+from .models import Notification, UnreadCounter
+
+
+def ensure_counters(user_ids):
+    """
+    Create missing UnreadCounter rows, seeded from the (recipient, read)
+    index. Existing rows are left alone.
+    """
+    user_ids = set(user_ids)
+    missing = user_ids - set(
+        UnreadCounter.objects.filter(pk__in=user_ids).values_list('pk', flat=True)
+    )
+    if not missing:
+        return
+    counts = dict(
+        Notification.objects.filter(recipient_id__in=missing, read=False)
+        .order_by()
+        .values_list('recipient_id')
+        .annotate(total=Count('id'))
+    )
+    UnreadCounter.objects.bulk_create(
+        [UnreadCounter(user_id=user_id, count=counts.get(user_id, 0)) for user_id in missing],
+        ignore_conflicts=True,
+    )
+
+
+def unread_count(user):
+    """Number of unread notifications for ``user``"""
+    count = UnreadCounter.objects.filter(pk=user.pk).values_list('count', flat=True).first()
+    if count is None:
+        ensure_counters([user.pk])
+        count = UnreadCounter.objects.filter(pk=user.pk).values_list('count', flat=True).first()
+    return count
+
+
+def adjust_unread(user_id, delta):
+    if delta:
+        adjust_counter(UnreadCounter, user_id, 'count', delta)
@@ -1,7 +1,14 @@
 from django.urls import path
-from .views import NotificationListView, mark_notification_read
+from .views import (
+    NotificationListView, mark_notification_read, mark_notifications_read,
+    unread_notification_count, notification_stream, notification_stream_token
+)
 
 urlpatterns = [
     path('', NotificationListView.as_view(), name='notifications'),
     path('<int:pk>/read/', mark_notification_read, name='mark-read'),
+    path('read/', mark_notifications_read, name='mark-all-read'),
+    path('unread-count/', unread_notification_count, name='unread-count'),
+    path('stream/', notification_stream, name='notification-stream'),
+    path('stream/token/', notification_stream_token, name='notification-stream-token'),
 ]
\ No newline at end of file
@@ -1,18 +1,48 @@
 from rest_framework import generics, permissions, status
 from rest_framework.response import Response
 from rest_framework.decorators import api_view, permission_classes
+from rest_framework.authtoken.models import Token
+import json
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core import signing
+from django.db import transaction
+from django.db.models import Q
+from django.http import JsonResponse, StreamingHttpResponse
+from django.utils import timezone
+from posts.pagination import StandardResultsPagination, decode_cursor, encode_cursor
 from .models import Notification
+from .pubsub import get_backend, user_channel
+from .unread import adjust_unread, unread_count
 from .serializers import NotificationSerializer
 
+User = get_user_model()
+
+STREAM_TOKEN_SALT = 'notifications.stream'
+
 class NotificationListView(generics.ListAPIView):
     """
     List all notifications for current user.
+    Actors are joined and targets are prefetched in one query per content
+    type, so a page costs the same number of queries whatever its size.
+
+    Notifications are ordered by latest activity. A group that gains an
+    actor moves to the top, so a ?cursor= walk never returns it twice but
+    skips it if it had not been reached yet; clients pick it up from the
+    first page or the stream.
     """
     serializer_class = NotificationSerializer
     permission_classes = [permissions.IsAuthenticated]
+    pagination_class = StandardResultsPagination
+    cursor_ordering = '-timestamp'
     
     def get_queryset(self):
-        return Notification.objects.filter(recipient=self.request.user)
+        return (
+            Notification.objects.filter(recipient=self.request.user)
+            .select_related('actor')
+            .prefetch_related('target')
+        )
 
 
 @api_view(['POST'])
@@ -21,18 +51,173 @@ def mark_notification_read(request, pk):
     """
     Mark a notification as read.
     """
-    try:
-        notification = Notification.objects.get(pk=pk, recipient=request.user)
-        notification.read = True
-        notification.save()
-        
-        return Response(
-            {'message': 'Notification marked as read'},
-            status=status.HTTP_200_OK
-        )
+    with transaction.atomic():
+        changed = Notification.objects.filter(
+            pk=pk, recipient=request.user, read=False
+        ).update(read=True)
+        adjust_unread(request.user.pk, -changed)
     
-    except Notification.DoesNotExist:
+    if not changed and not Notification.objects.filter(pk=pk, recipient=request.user).exists():
         return Response(
             {'error': 'Notification not found'},
             status=status.HTTP_404_NOT_FOUND
-        )
\ No newline at end of file
+        )
+    
+    return Response(
+        {'message': 'Notification marked as read'},
+        status=status.HTTP_200_OK
+    )
+
+
+@api_view(['POST'])
+@permission_classes([permissions.IsAuthenticated])
+def mark_notifications_read(request):
+    """
+    Mark several notifications as read with a single UPDATE.
+    Body: {"ids": [1, 2, 3]} for specific notifications, or no ids for all.
+    """
+    ids = request.data.get('ids')
+    notifications = Notification.objects.filter(recipient=request.user, read=False)
+    if ids is not None:
+        if not isinstance(ids, list) or not all(isinstance(i, int) for i in ids):
+            return Response(
+                {'error': 'ids must be a list of integers'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        notifications = notifications.filter(pk__in=ids)
+    
+    with transaction.atomic():
+        changed = notifications.update(read=True)
+        adjust_unread(request.user.pk, -changed)
+    
+    return Response(
+        {'marked_read': changed},
+        status=status.HTTP_200_OK
+    )
+
+
+@api_view(['GET'])
+@permission_classes([permissions.IsAuthenticated])
+def unread_notification_count(request):
+    """
+    Number of unread notifications, for badges.
+    """
+    return Response({'unread_count': unread_count(request.user)})
+
+
+
+def _events_since(user, position, limit=100):
+    """
+    Notifications created or regrouped after ``position`` (timestamp, id),
+    as (event id, serialized data) pairs, plus the new position.
+    """
+    created_at, pk = position
+    notifications = list(
+        Notification.objects.filter(recipient=user)
+        .filter(Q(timestamp__gt=created_at) | Q(timestamp=created_at, id__gt=pk))
+        .select_related('actor')
+        .prefetch_related('target')
+        .order_by('timestamp', 'id')[:limit]
+    )
+    if notifications:
+        last = notifications[-1]
+        position = (last.timestamp, last.id)
+    data = NotificationSerializer(notifications, many=True).data
+    events = [
+        (encode_cursor(n.timestamp, n.id), item)
+        for n, item in zip(notifications, data)
+    ]
+    return events, position
+
+
+async def _event_stream(user, position):
+    heartbeat = getattr(settings, 'NOTIFICATION_STREAM_HEARTBEAT', 15)
+    lifetime = getattr(settings, 'NOTIFICATION_STREAM_LIFETIME', 300)
+    deadline = timezone.now().timestamp() + lifetime
+    
+    async with get_backend().subscribe(user_channel(user.pk)) as subscription:
+        yield 'retry: 3000\n\n'
+        while True:
+            events, position = await sync_to_async(_events_since)(user, position)
+            for event_id, data in events:
+                yield f'id: {event_id}\nevent: notification\ndata: {json.dumps(data)}\n\n'
+            remaining = deadline - timezone.now().timestamp()
+            if remaining <= 0:
+                return
+            if await subscription.get(min(heartbeat, remaining)) is None:
+                yield ': keepalive\n\n'
+
+
+def stream_token_max_age():
+    """Seconds a stream token can be used to connect"""
+    return getattr(settings, 'NOTIFICATION_STREAM_TOKEN_MAX_AGE', 60)
+
+
+def make_stream_token(user):
+    return signing.TimestampSigner(salt=STREAM_TOKEN_SALT).sign(str(user.pk))
+
+
+def read_stream_token(token):
+    """User id in a stream token, or None if it is forged or expired"""
+    try:
+        return int(signing.TimestampSigner(salt=STREAM_TOKEN_SALT).unsign(
+            token, max_age=stream_token_max_age()
+        ))
+    except (signing.BadSignature, ValueError):
+        return None
+
+
+@api_view(['POST'])
+@permission_classes([permissions.IsAuthenticated])
+def notification_stream_token(request):
+    """
+    Short-lived token for the stream's ?token= parameter.
+    EventSource cannot send an Authorization header, and a URL ends up in
+    access logs and browser history, so it carries this signed token,
+    valid only for opening streams, instead of the API token.
+    """
+    return Response({
+        'token': make_stream_token(request.user),
+        'expires_in': stream_token_max_age(),
+    })
+
+
+async def _stream_user(request):
+    """Resolve the user from 'Authorization: Token <key>' or a stream token in ?token="""
+    header = request.headers.get('Authorization', '')
+    if header.startswith('Token '):
+        token = await Token.objects.select_related('user').filter(
+            key=header[len('Token '):].strip()
+        ).afirst()
+        user = token.user if token is not None else None
+    else:
+        user_id = read_stream_token(request.GET.get('token', ''))
+        user = await User.objects.filter(pk=user_id).afirst() if user_id else None
+    if user is None or not user.is_active:
+        return None
+    return user
+
+
+async def notification_stream(request):
+    """
+    Server-sent events stream of new notifications for the current user.
+    The connection idles on a pub/sub subscription and only touches the
+    database when woken up or on each heartbeat. Clients reconnect with
+    Last-Event-ID to resume where they left off, fetching a new stream
+    token once theirs has expired.
+    """
+    user = await _stream_user(request)
+    if user is None:
+        return JsonResponse(
+            {'detail': 'Authentication credentials were not provided.'},
+            status=status.HTTP_401_UNAUTHORIZED
+        )
+    
+    position = decode_cursor(request.headers.get('Last-Event-ID')) or (timezone.now(), 0)
+    response = StreamingHttpResponse(
+        _event_stream(user, position),
+        content_type='text/event-stream'
+    )
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'
+    return response
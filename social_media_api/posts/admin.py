@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import Post, Comment, Like
+from .models import Post, Comment, Like, TimelineEntry
 
 @admin.register(Post)
 class PostAdmin(admin.ModelAdmin):
@@ -15,4 +15,9 @@ class CommentAdmin(admin.ModelAdmin):
 
 @admin.register(Like)
 class LikeAdmin(admin.ModelAdmin):
-    list_display = ['user', 'post', 'created_at']
\ No newline at end of file
+    list_display = ['user', 'post', 'created_at']
+
+@admin.register(TimelineEntry)
+class TimelineEntryAdmin(admin.ModelAdmin):
+    list_display = ['user', 'post', 'author', 'created_at']
+    raw_id_fields = ['user', 'post', 'author']
\ No newline at end of file
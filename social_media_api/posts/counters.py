@@ -0,0 +1,105 @@
+import random
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import F, Value
+from django.db.models.functions import Greatest
+
+
+def adjust_counter(model, pk, field, delta):
+    """
+    Add ``delta`` to a stored counter column with a single UPDATE.
+    Uses an F() expression so concurrent requests never overwrite each
+    other, and never lets a counter that has drifted go below zero.
+    """
+    rows = model.objects.filter(pk=pk)
+    if delta < 0:
+        rows = rows.filter(**{f'{field}__gte': -delta})
+    return rows.update(**{field: F(field) + delta})
+
+
+def like_shard_count():
+    """Number of counter shards per post; more shards, less contention"""
+    return getattr(settings, 'LIKE_COUNTER_SHARDS', 16)
+
+
+def pick_shard():
+    return random.randrange(like_shard_count())
+
+
+def shard_upsert_sql(rows):
+    """
+    SQL and params adding each (post_id, delta) in ``rows`` to a random
+    shard, creating the shard row if needed, in one statement.
+    """
+    from .models import LikeCounterShard
+
+    qn = connection.ops.quote_name
+    meta = LikeCounterShard._meta
+    table = qn(meta.db_table)
+    post_col = qn(meta.get_field('post').column)
+    shard_col = qn(meta.get_field('shard').column)
+    likes_col = qn(meta.get_field('likes').column)
+
+    values = ', '.join(['(%s, %s, %s)'] * len(rows))
+    params = []
+    for post_id, delta in rows:
+        params += [post_id, pick_shard(), delta]
+    if connection.vendor == 'mysql':
+        conflict = f'ON DUPLICATE KEY UPDATE {likes_col} = {likes_col} + VALUES({likes_col})'
+    else:
+        conflict = (
+            f'ON CONFLICT ({post_col}, {shard_col}) '
+            f'DO UPDATE SET {likes_col} = {table}.{likes_col} + excluded.{likes_col}'
+        )
+    sql = f'INSERT INTO {table} ({post_col}, {shard_col}, {likes_col}) VALUES {values} {conflict}'
+    return sql, params
+
+
+def bump_like_shards(rows):
+    """Record like count changes, given as (post_id, delta) pairs"""
+    rows = [(post_id, delta) for post_id, delta in rows if delta]
+    if not rows:
+        return
+    sql, params = shard_upsert_sql(rows)
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+
+
+def like_totals(post_ids):
+    """Current like count per post: the stored column plus pending shards"""
+    from .models import Post
+
+    return dict(
+        Post.objects.filter(pk__in=post_ids).with_pending_likes()
+        .annotate(total=F('likes_count') + F('pending_likes'))
+        .values_list('pk', 'total')
+    )
+
+
+def flush_like_shards(batch_size=1000):
+    """
+    Fold up to ``batch_size`` shard rows into Post.likes_count and delete
+    them. Shards are claimed with SKIP LOCKED where supported, so this can
+    run while likes keep arriving. Returns the number of shards folded.
+    """
+    from .models import LikeCounterShard, Post
+
+    with transaction.atomic():
+        shards = list(
+            LikeCounterShard.objects.select_for_update(skip_locked=True)
+            .order_by('id')
+            .values_list('id', 'post_id', 'likes')[:batch_size]
+        )
+        if not shards:
+            return 0
+        totals = {}
+        for _, post_id, likes in shards:
+            totals[post_id] = totals.get(post_id, 0) + likes
+        for post_id, delta in totals.items():
+            if delta:
+                Post.objects.filter(pk=post_id).update(
+                    likes_count=Greatest(F('likes_count') + delta, Value(0))
+                )
+        LikeCounterShard.objects.filter(id__in=[shard_id for shard_id, _, _ in shards]).delete()
+    return len(shards)
@@ -0,0 +1,211 @@
+"""
+Home timeline storage for the user feed.
+
+Posts are pushed into each follower's TimelineEntry rows when they are
+created (fan-out-on-write), so reading a feed is a single index range scan
+instead of an IN-list over everyone the user follows. Authors with more
+than FEED_FANOUT_MAX_FOLLOWERS followers are skipped on write and merged
+in at read time instead (fan-out-on-read), which keeps one post from a
+very popular account from inserting millions of rows. CustomUser's
+fanout_on_read flag records which authors are read-merged. Once such an
+author is back under the threshold, the restore_fanout command pushes
+their recent posts to every follower and only then clears the flag.
+"""
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db.models import Q
+from django.utils import timezone
+
+from .models import Post, TimelineEntry
+
+User = get_user_model()
+
+FANOUT_BATCH_SIZE = 1000
+CELEBRITY_CACHE_KEY = 'feed:celebrity-ids'
+CELEBRITY_CACHE_TIMEOUT = 300
+
+
+def fanout_max_followers():
+    """Follower count above which an author is read-merged instead of pushed"""
+    return getattr(settings, 'FEED_FANOUT_MAX_FOLLOWERS', 5000)
+
+
+def backfill_limit():
+    """Recent posts copied into a timeline when it starts receiving an author"""
+    return getattr(settings, 'FEED_BACKFILL_LIMIT', 100)
+
+
+def celebrity_ids():
+    """
+    Ids of authors handled with fan-out-on-read.
+    An author joins when they post while above the threshold and leaves
+    only once their posts have been pushed to followers again, so posts
+    written in between are never dropped from feeds. The set is small and
+    changes slowly, so it is cached for a few minutes.
+    """
+    ids = cache.get(CELEBRITY_CACHE_KEY)
+    if ids is None:
+        ids = set(User.objects.filter(fanout_on_read=True).values_list('id', flat=True))
+        cache.set(CELEBRITY_CACHE_KEY, ids, CELEBRITY_CACHE_TIMEOUT)
+    return ids
+
+
+def is_celebrity(user):
+    return user.followers_count > fanout_max_followers()
+
+
+def _set_fanout_on_read(author, value):
+    User.objects.filter(pk=author.pk).update(fanout_on_read=value)
+    author.fanout_on_read = value
+    # Update the cached set right away rather than when it next expires
+    ids = celebrity_ids()
+    if (author.pk in ids) != value:
+        cache.set(CELEBRITY_CACHE_KEY, ids ^ {author.pk}, CELEBRITY_CACHE_TIMEOUT)
+
+
+def _insert_entries(posts, follower_ids):
+    entries = [
+        TimelineEntry(
+            user_id=follower_id,
+            post_id=post.id,
+            author_id=post.author_id,
+            created_at=post.created_at,
+        )
+        for post in posts
+        for follower_id in follower_ids
+    ]
+    TimelineEntry.objects.bulk_create(
+        entries, batch_size=FANOUT_BATCH_SIZE, ignore_conflicts=True
+    )
+
+
+def _follower_batches(author):
+    """The author's follower ids, FANOUT_BATCH_SIZE at a time"""
+    batch = []
+    follower_ids = author.followers.values_list('id', flat=True)
+    for follower_id in follower_ids.iterator(chunk_size=FANOUT_BATCH_SIZE):
+        batch.append(follower_id)
+        if len(batch) >= FANOUT_BATCH_SIZE:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def _recent_posts(author, limit=None):
+    if limit is None:
+        limit = backfill_limit()
+    return list(Post.objects.filter(author=author).order_by('-created_at', '-id')[:limit])
+
+
+def fan_out_post(post):
+    """
+    Push a new post into the timelines of the author's followers.
+    Returns the number of timelines written, or 0 for fan-out-on-read authors.
+    """
+    author = post.author
+    if is_celebrity(author):
+        if not author.fanout_on_read:
+            _set_fanout_on_read(author, True)
+        return 0
+    if author.fanout_on_read:
+        # Back under the threshold, but the posts written while read-merged
+        # are not in any timeline yet. Readers keep merging this author in
+        # until the restore_fanout command has pushed them (this one too).
+        return 0
+    written = 0
+    for batch in _follower_batches(author):
+        _insert_entries([post], batch)
+        written += len(batch)
+    return written
+
+
+def backfill_followers(author, limit=None):
+    """
+    Copy an author's recent posts into every follower's timeline and switch
+    the author back to fan-out-on-write. Posts created while this runs are
+    pushed again after the switch, so none falls between the two modes.
+    Returns the number of timelines written.
+    """
+    started = timezone.now()
+    posts = _recent_posts(author, limit)
+    written = 0
+    for batch in _follower_batches(author):
+        _insert_entries(posts, batch)
+        written += len(batch)
+    _set_fanout_on_read(author, False)
+    late = list(Post.objects.filter(author=author, created_at__gte=started))
+    if late:
+        for batch in _follower_batches(author):
+            _insert_entries(late, batch)
+    return written
+
+
+def restore_fanout(limit=None):
+    """
+    Backfill followers of every read-merged author who is back under the
+    threshold. Too slow for a request, so the restore_fanout command runs
+    it. Returns the number of authors switched back to fan-out-on-write.
+    """
+    authors = User.objects.filter(
+        fanout_on_read=True, followers_count__lte=fanout_max_followers()
+    )
+    count = 0
+    for author in authors.iterator():
+        backfill_followers(author, limit)
+        count += 1
+    return count
+
+
+def backfill_timeline(user, author, limit=None):
+    """Copy an author's recent posts into a user's timeline after a follow"""
+    if author.fanout_on_read:
+        return
+    _insert_entries(_recent_posts(author, limit), [user.id])
+
+
+def remove_from_timeline(user, author):
+    """Drop an author's posts from a user's timeline after an unfollow"""
+    TimelineEntry.objects.filter(user=user, author=author).delete()
+
+
+def _before(position, created_field, id_field):
+    """Keyset predicate for rows strictly older than (created_at, id)"""
+    created_at, pk = position
+    return Q(**{f'{created_field}__lt': created_at}) | Q(
+        **{created_field: created_at, f'{id_field}__lt': pk}
+    )
+
+
+def get_feed_page(user, position=None, limit=10):
+    """
+    Return up to ``limit + 1`` posts for the user's feed, newest first.
+    ``position`` is the (created_at, id) of the last post already seen.
+    The extra post only tells the caller whether another page exists.
+    """
+    fetch = limit + 1
+
+    pushed = TimelineEntry.objects.filter(user=user)
+    if position:
+        pushed = pushed.filter(_before(position, 'created_at', 'post_id'))
+    rows = list(
+        pushed.order_by('-created_at', '-post_id')
+        .values_list('created_at', 'post_id')[:fetch]
+    )
+
+    pulled_authors = list(
+        user.following.filter(id__in=celebrity_ids()).values_list('id', flat=True)
+    )
+    if pulled_authors:
+        pulled = Post.objects.filter(author_id__in=pulled_authors)
+        if position:
+            pulled = pulled.filter(_before(position, 'created_at', 'id'))
+        rows += list(
+            pulled.order_by('-created_at', '-id')
+            .values_list('created_at', 'id')[:fetch]
+        )
+
+    rows = sorted(set(rows), reverse=True)[:fetch]
+    posts = Post.objects.with_author().with_pending_likes().in_bulk([post_id for _, post_id in rows])
+    return [posts[post_id] for _, post_id in rows if post_id in posts]
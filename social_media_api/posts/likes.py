@@ -0,0 +1,219 @@
+"""
+Like/unlike writes without read-modify-write round trips.
+
+Each operation is one conditional INSERT or DELETE plus a bump of one of
+the post's like counter shards (see LikeCounterShard), never the Post row
+itself. On PostgreSQL the write, the shard bump and reading back the
+count run as a single statement using data-modifying CTEs, so a like
+storm on a viral post neither looks up the Like row first nor queues on
+one row lock. Every operation is idempotent: liking twice or unliking
+something that was never liked is a no-op that reports the current count.
+"""
+from django.db import connection, transaction
+from django.db.models import F
+from django.db.models.constants import OnConflict
+from django.utils import timezone
+
+from .counters import bump_like_shards, pick_shard
+from .models import LikeCounterShard, Post, Like
+
+
+def _tables():
+    qn = connection.ops.quote_name
+    like, post, shard = Like._meta, Post._meta, LikeCounterShard._meta
+    return {
+        'like': qn(like.db_table),
+        'like_user': qn(like.get_field('user').column),
+        'like_post': qn(like.get_field('post').column),
+        'like_created': qn(like.get_field('created_at').column),
+        'post': qn(post.db_table),
+        'post_id': qn(post.pk.column),
+        'post_author': qn(post.get_field('author').column),
+        'likes_count': qn(post.get_field('likes_count').column),
+        'shard': qn(shard.db_table),
+        'shard_post': qn(shard.get_field('post').column),
+        'shard_no': qn(shard.get_field('shard').column),
+        'shard_likes': qn(shard.get_field('likes').column),
+    }
+
+
+def _now():
+    return connection.ops.adapt_datetimefield_value(timezone.now())
+
+
+def _post_state(post_id):
+    """(likes_count including pending shards, author_id), or None"""
+    return (
+        Post.objects.filter(pk=post_id).with_pending_likes()
+        .annotate(total=F('likes_count') + F('pending_likes'))
+        .values_list('total', 'author_id')
+        .first()
+    )
+
+
+def _postgres_like_change(cursor, change_cte, params, post_id, sign):
+    """
+    Run ``change_cte`` (an INSERT or DELETE on likes returning post_id),
+    push the resulting +1/-1 into a shard and read back the new total,
+    all in one statement.
+    """
+    t = _tables()
+    cursor.execute(
+        f'WITH changed AS ({change_cte}),'
+        f' bump AS ('
+        f' INSERT INTO {t["shard"]} ({t["shard_post"]}, {t["shard_no"]}, {t["shard_likes"]})'
+        f' SELECT post_id, %s, {sign} FROM changed'
+        f' ON CONFLICT ({t["shard_post"]}, {t["shard_no"]})'
+        f' DO UPDATE SET {t["shard_likes"]} = {t["shard"]}.{t["shard_likes"]} + excluded.{t["shard_likes"]}'
+        f')'
+        f' SELECT (SELECT COUNT(*) FROM changed),'
+        f' GREATEST(p.{t["likes_count"]}'
+        f' + COALESCE((SELECT SUM(s.{t["shard_likes"]}) FROM {t["shard"]} s'
+        f' WHERE s.{t["shard_post"]} = p.{t["post_id"]}), 0)'
+        f' + {sign} * (SELECT COUNT(*) FROM changed), 0),'
+        f' p.{t["post_author"]}'
+        f' FROM {t["post"]} p WHERE p.{t["post_id"]} = %s',
+        [*params, pick_shard(), post_id],
+    )
+    return cursor.fetchone()
+
+
+def _add_like_postgres(cursor, user_id, post_id):
+    t = _tables()
+    insert = (
+        f'INSERT INTO {t["like"]} ({t["like_user"]}, {t["like_post"]}, {t["like_created"]})'
+        f' SELECT %s, {t["post_id"]}, %s FROM {t["post"]} WHERE {t["post_id"]} = %s'
+        f' ON CONFLICT DO NOTHING RETURNING {t["like_post"]} AS post_id'
+    )
+    return _postgres_like_change(cursor, insert, [user_id, _now(), post_id], post_id, 1)
+
+
+def _remove_like_postgres(cursor, user_id, post_id):
+    t = _tables()
+    delete = (
+        f'DELETE FROM {t["like"]} WHERE {t["like_user"]} = %s AND {t["like_post"]} = %s'
+        f' RETURNING {t["like_post"]} AS post_id'
+    )
+    return _postgres_like_change(cursor, delete, [user_id, post_id], post_id, -1)
+
+
+def _insert_like_portable(cursor, user_id, post_id):
+    """Conditional INSERT of one like; True if a row was written"""
+    t = _tables()
+    ops = connection.ops
+    cursor.execute(
+        f'{ops.insert_statement(on_conflict=OnConflict.IGNORE)} {t["like"]}'
+        f' ({t["like_user"]}, {t["like_post"]}, {t["like_created"]})'
+        f' SELECT %s, {t["post_id"]}, %s FROM {t["post"]} WHERE {t["post_id"]} = %s'
+        f' {ops.on_conflict_suffix_sql(None, OnConflict.IGNORE, None, None)}',
+        [user_id, _now(), post_id],
+    )
+    return cursor.rowcount > 0
+
+
+def _add_like_portable(cursor, user_id, post_id):
+    inserted = _insert_like_portable(cursor, user_id, post_id)
+    if inserted:
+        bump_like_shards([(post_id, 1)])
+    state = _post_state(post_id)
+    return (int(inserted), *state) if state else None
+
+
+def _remove_like_portable(cursor, user_id, post_id):
+    deleted, _ = Like.objects.filter(user_id=user_id, post_id=post_id).delete()
+    if deleted:
+        bump_like_shards([(post_id, -1)])
+    state = _post_state(post_id)
+    return (deleted, *state) if state else None
+
+
+def add_like(user_id, post_id):
+    """
+    Like a post if not already liked.
+    Returns (created, likes_count, author_id), or None if the post does not exist.
+    """
+    with transaction.atomic(), connection.cursor() as cursor:
+        if connection.vendor == 'postgresql':
+            row = _add_like_postgres(cursor, user_id, post_id)
+        else:
+            row = _add_like_portable(cursor, user_id, post_id)
+    if row is None:
+        return None
+    created, likes_count, author_id = row
+    return bool(created), likes_count, author_id
+
+
+def remove_like(user_id, post_id):
+    """
+    Remove a like if present.
+    Returns (removed, likes_count, author_id), or None if the post does not exist.
+    """
+    with transaction.atomic(), connection.cursor() as cursor:
+        if connection.vendor == 'postgresql':
+            row = _remove_like_postgres(cursor, user_id, post_id)
+        else:
+            row = _remove_like_portable(cursor, user_id, post_id)
+    if row is None:
+        return None
+    removed, likes_count, author_id = row
+    return bool(removed), likes_count, author_id
+
+
+def _add_likes_postgres(cursor, user_id, post_ids):
+    t = _tables()
+    cursor.execute(
+        f'INSERT INTO {t["like"]} ({t["like_user"]}, {t["like_post"]}, {t["like_created"]})'
+        f' SELECT %s, {t["post_id"]}, %s FROM {t["post"]} WHERE {t["post_id"]} = ANY(%s)'
+        f' ON CONFLICT DO NOTHING RETURNING {t["like_post"]}',
+        [user_id, _now(), list(post_ids)],
+    )
+    return {row[0] for row in cursor.fetchall()}
+
+
+def _remove_likes_postgres(cursor, user_id, post_ids):
+    t = _tables()
+    cursor.execute(
+        f'DELETE FROM {t["like"]} WHERE {t["like_user"]} = %s AND {t["like_post"]} = ANY(%s)'
+        f' RETURNING {t["like_post"]}',
+        [user_id, list(post_ids)],
+    )
+    return {row[0] for row in cursor.fetchall()}
+
+
+def add_likes(user_id, post_ids):
+    """
+    Like many posts at once. Returns the ids of posts that were newly liked.
+    Missing posts and posts already liked are skipped. Only rows the
+    INSERT actually wrote are counted, so a concurrent like of the same
+    post is never counted twice.
+    """
+    post_ids = set(post_ids)
+    with transaction.atomic(), connection.cursor() as cursor:
+        if connection.vendor == 'postgresql':
+            new_ids = _add_likes_postgres(cursor, user_id, post_ids)
+        else:
+            # no RETURNING: one conditional INSERT per post, checking its rowcount
+            new_ids = {
+                post_id for post_id in post_ids
+                if _insert_like_portable(cursor, user_id, post_id)
+            }
+        bump_like_shards([(post_id, 1) for post_id in new_ids])
+    return new_ids
+
+
+def remove_likes(user_id, post_ids):
+    """
+    Unlike many posts at once. Returns the ids of posts that were unliked,
+    as reported by the DELETE itself.
+    """
+    post_ids = set(post_ids)
+    with transaction.atomic(), connection.cursor() as cursor:
+        if connection.vendor == 'postgresql':
+            removed_ids = _remove_likes_postgres(cursor, user_id, post_ids)
+        else:
+            removed_ids = {
+                post_id for post_id in post_ids
+                if Like.objects.filter(user_id=user_id, post_id=post_id).delete()[0]
+            }
+        bump_like_shards([(post_id, -1) for post_id in removed_ids])
+    return removed_ids
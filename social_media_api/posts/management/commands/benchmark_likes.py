@@ -0,0 +1,99 @@
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import connection, OperationalError
+from django.test.utils import override_settings
+
+from posts.counters import flush_like_shards, like_totals
+from posts.likes import add_like
+from posts.models import Post, Like
+
+User = get_user_model()
+
+PREFIX = 'bench_likes_'
+
+
+class Command(BaseCommand):
+    help = 'Measure concurrent like throughput on one post for different shard counts'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--likes', type=int, default=2000, help='Distinct users liking the post')
+        parser.add_argument('--threads', type=int, default=16, help='Concurrent writers')
+        parser.add_argument(
+            '--shards',
+            default='1,4,16,64',
+            help='Comma separated LIKE_COUNTER_SHARDS values to compare'
+        )
+        parser.add_argument('--keep', action='store_true', help='Keep the benchmark users and post')
+
+    def setup_data(self, count):
+        User.objects.filter(username__startswith=PREFIX).delete()
+        author = User.objects.create(username=f'{PREFIX}author')
+        post = Post.objects.create(author=author, title='Benchmark post', content='benchmark')
+        User.objects.bulk_create(
+            [User(username=f'{PREFIX}{i}') for i in range(count)], batch_size=1000
+        )
+        user_ids = list(
+            User.objects.filter(username__startswith=PREFIX)
+            .exclude(pk=author.pk).values_list('pk', flat=True)
+        )
+        return post, user_ids
+
+    def run_writers(self, post_id, user_ids, threads):
+        chunks = [user_ids[i::threads] for i in range(threads)]
+
+        def worker(chunk):
+            latencies, errors = [], 0
+            try:
+                for user_id in chunk:
+                    start = time.perf_counter()
+                    try:
+                        add_like(user_id, post_id)
+                    except OperationalError:
+                        errors += 1
+                    latencies.append(time.perf_counter() - start)
+            finally:
+                connection.close()
+            return latencies, errors
+
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=threads) as pool:
+            results = list(pool.map(worker, chunks))
+        elapsed = time.perf_counter() - start
+
+        latencies = sorted(l for chunk_latencies, _ in results for l in chunk_latencies)
+        errors = sum(e for _, e in results)
+        return elapsed, latencies, errors
+
+    def handle(self, *args, **options):
+        shard_counts = [int(n) for n in options['shards'].split(',')]
+        post, user_ids = self.setup_data(options['likes'])
+        self.stdout.write(
+            f'{len(user_ids)} likes, {options["threads"]} threads, {connection.vendor}'
+        )
+        self.stdout.write(f'{"shards":>7} {"likes/s":>10} {"p50 ms":>8} {"p99 ms":>8} {"errors":>7} {"count":>7}')
+
+        try:
+            for shards in shard_counts:
+                Like.objects.filter(post=post).delete()
+                while flush_like_shards():
+                    pass
+                Post.objects.filter(pk=post.pk).update(likes_count=0)
+
+                with override_settings(LIKE_COUNTER_SHARDS=shards):
+                    elapsed, latencies, errors = self.run_writers(
+                        post.pk, user_ids, options['threads']
+                    )
+                total = like_totals([post.pk])[post.pk]
+                p50 = statistics.median(latencies) * 1000
+                p99 = latencies[int(len(latencies) * 0.99) - 1] * 1000
+                self.stdout.write(
+                    f'{shards:>7} {len(latencies) / elapsed:>10.0f} {p50:>8.2f} '
+                    f'{p99:>8.2f} {errors:>7} {total:>7}'
+                )
+        finally:
+            if not options['keep']:
+                User.objects.filter(username__startswith=PREFIX).delete()
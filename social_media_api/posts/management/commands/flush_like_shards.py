@@ -0,0 +1,52 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from posts.counters import flush_like_shards
+
+
+class Command(BaseCommand):
+    help = 'Fold pending like counter shards into Post.likes_count'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=1000,
+            help='Shard rows to fold per transaction'
+        )
+        parser.add_argument(
+            '--interval',
+            type=float,
+            default=5.0,
+            help='Seconds between passes when running continuously'
+        )
+        parser.add_argument(
+            '--once',
+            action='store_true',
+            help='Fold everything pending once and exit'
+        )
+
+    def flush_all(self, batch_size):
+        total = 0
+        while True:
+            folded = flush_like_shards(batch_size)
+            if not folded:
+                return total
+            total += folded
+
+    def handle(self, *args, **options):
+        if options['once']:
+            folded = self.flush_all(options['batch_size'])
+            self.stdout.write(self.style.SUCCESS(f'Folded {folded} counter shards'))
+            return
+
+        self.stdout.write('Folding like counter shards (Ctrl+C to stop)')
+        try:
+            while True:
+                close_old_connections()
+                self.flush_all(options['batch_size'])
+                time.sleep(options['interval'])
+        except KeyboardInterrupt:
+            self.stdout.write('Stopped')
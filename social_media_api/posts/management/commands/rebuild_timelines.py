@@ -0,0 +1,31 @@
+from django.core.management.base import BaseCommand
+from django.contrib.auth import get_user_model
+
+from posts.feed import backfill_timeline, celebrity_ids
+from posts.models import TimelineEntry
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = 'Rebuild precomputed home timelines from the follow graph'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--limit',
+            type=int,
+            default=100,
+            help='Most recent posts to copy per followed author'
+        )
+
+    def handle(self, *args, **options):
+        TimelineEntry.objects.all().delete()
+        skipped = celebrity_ids()
+        users = User.objects.prefetch_related('following')
+        count = 0
+        for user in users.iterator(chunk_size=500):
+            for author in user.following.all():
+                if author.id not in skipped:
+                    backfill_timeline(user, author, limit=options['limit'])
+            count += 1
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt timelines for {count} users'))
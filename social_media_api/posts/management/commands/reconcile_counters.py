@@ -0,0 +1,92 @@
+from django.core.management.base import BaseCommand
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models import F, Q
+from django.db.models.functions import Greatest
+
+from posts.models import Post, Comment, Like, count_subquery, pending_likes_subquery
+
+User = get_user_model()
+Follow = User.followers.through
+
+
+class Command(BaseCommand):
+    help = 'Recompute stored like/comment/follower counters and fix any drift'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=1000,
+            help='Rows to check per transaction'
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Report drift without writing'
+        )
+
+    def reconcile(self, queryset, counters, batch_size, dry_run):
+        """
+        Walk the table in primary key ranges, comparing each stored counter
+        with its live value and bulk-updating only the rows that differ.
+        """
+        fixed = 0
+        last_pk = 0
+        while True:
+            pks = list(
+                queryset.filter(pk__gt=last_pk).order_by('pk')
+                .values_list('pk', flat=True)[:batch_size]
+            )
+            if not pks:
+                break
+            last_pk = pks[-1]
+            drifted = Q()
+            for field in counters:
+                drifted |= ~Q(**{field: F(f'live_{field}')})
+            with transaction.atomic():
+                rows = list(
+                    queryset.filter(pk__in=pks)
+                    .annotate(**{f'live_{field}': live for field, live in counters.items()})
+                    .filter(drifted)
+                    .select_for_update()
+                )
+                for row in rows:
+                    for field in counters:
+                        setattr(row, field, getattr(row, f'live_{field}'))
+                if rows and not dry_run:
+                    queryset.model.objects.bulk_update(rows, list(counters))
+            fixed += len(rows)
+        return fixed
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        dry_run = options['dry_run']
+
+        posts = self.reconcile(
+            Post.objects.all(),
+            {
+                'comments_count': count_subquery(Comment, 'post'),
+                # Shards still hold pending changes, so the stored column
+                # should equal the live count minus what is pending. Shards
+                # that overcount (likes deleted without a matching -1) would
+                # make that negative; the column cannot go below zero.
+                'likes_count': Greatest(count_subquery(Like, 'post') - pending_likes_subquery(), 0),
+            },
+            batch_size,
+            dry_run,
+        )
+        users = self.reconcile(
+            User.objects.all(),
+            {
+                'followers_count': count_subquery(Follow, 'from_customuser'),
+                'following_count': count_subquery(Follow, 'to_customuser'),
+            },
+            batch_size,
+            dry_run,
+        )
+
+        verb = 'Found' if dry_run else 'Fixed'
+        self.stdout.write(self.style.SUCCESS(
+            f'{verb} drift on {posts} posts and {users} users'
+        ))
@@ -0,0 +1,47 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from posts.feed import restore_fanout
+
+
+class Command(BaseCommand):
+    help = (
+        'Push the posts of read-merged authors who dropped back under '
+        'FEED_FANOUT_MAX_FOLLOWERS into their followers\' timelines'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--limit',
+            type=int,
+            default=None,
+            help='Most recent posts to push per author (default FEED_BACKFILL_LIMIT)'
+        )
+        parser.add_argument(
+            '--interval',
+            type=float,
+            default=60.0,
+            help='Seconds between passes when running continuously'
+        )
+        parser.add_argument(
+            '--once',
+            action='store_true',
+            help='Run one pass and exit'
+        )
+
+    def handle(self, *args, **options):
+        if options['once']:
+            restored = restore_fanout(options['limit'])
+            self.stdout.write(self.style.SUCCESS(f'Restored fan-out for {restored} authors'))
+            return
+
+        self.stdout.write('Restoring fan-out for authors back under the threshold (Ctrl+C to stop)')
+        try:
+            while True:
+                close_old_connections()
+                restore_fanout(options['limit'])
+                time.sleep(options['interval'])
+        except KeyboardInterrupt:
+            self.stdout.write('Stopped')
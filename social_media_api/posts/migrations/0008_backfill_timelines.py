@@ -0,0 +1,57 @@
+# Generated by Django 5.2.5 on 2026-10-18 10:20
+
+from django.conf import settings
+from django.db import migrations
+
+BATCH_SIZE = 1000
+
+
+def backfill_timelines(apps, schema_editor):
+    """
+    Fill timelines from the follow graph, as rebuild_timelines does:
+    each follower gets the author's most recent posts. Read-merged authors
+    are skipped; their posts are merged into feeds on read.
+    """
+    CustomUser = apps.get_model('accounts', 'CustomUser')
+    Post = apps.get_model('posts', 'Post')
+    TimelineEntry = apps.get_model('posts', 'TimelineEntry')
+    Follow = CustomUser.followers.through
+    limit = getattr(settings, 'FEED_BACKFILL_LIMIT', 100)
+
+    authors = (
+        Follow.objects.filter(from_customuser__fanout_on_read=False)
+        .values_list('from_customuser_id', flat=True).distinct()
+    )
+    for author_id in authors.iterator():
+        posts = list(
+            Post.objects.filter(author_id=author_id)
+            .order_by('-created_at', '-id')
+            .values_list('id', 'created_at')[:limit]
+        )
+        if not posts:
+            continue
+        follower_ids = Follow.objects.filter(from_customuser_id=author_id).values_list(
+            'to_customuser_id', flat=True
+        )
+        entries = []
+        for follower_id in follower_ids.iterator():
+            entries += [
+                TimelineEntry(user_id=follower_id, post_id=post_id, author_id=author_id, created_at=created_at)
+                for post_id, created_at in posts
+            ]
+            if len(entries) >= BATCH_SIZE:
+                TimelineEntry.objects.bulk_create(entries, ignore_conflicts=True)
+                entries = []
+        TimelineEntry.objects.bulk_create(entries, ignore_conflicts=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0003_customuser_fanout_on_read'),
+        ('posts', '0007_post_search_index'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_timelines, migrations.RunPython.noop),
+    ]
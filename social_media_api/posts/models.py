@@ -1,6 +1,46 @@
 from django.db import models
+from django.db.models import Count, IntegerField, OuterRef, Subquery, Sum
+from django.db.models.functions import Coalesce
 from django.conf import settings
 
+
+def count_subquery(model, field):
+    """Correlated COUNT(*) for rows of ``model`` whose ``field`` is the outer row"""
+    counts = (
+        model.objects.filter(**{field: OuterRef('pk')})
+        .order_by()
+        .values(field)
+        .annotate(total=Count('pk'))
+        .values('total')
+    )
+    return Coalesce(Subquery(counts, output_field=IntegerField()), 0)
+
+
+def pending_likes_subquery():
+    """Sum of the outer post's like counter shards"""
+    pending = (
+        LikeCounterShard.objects.filter(post=OuterRef('pk'))
+        .order_by()
+        .values('post')
+        .annotate(total=Sum('likes'))
+        .values('total')
+    )
+    return Coalesce(Subquery(pending, output_field=IntegerField()), 0)
+
+
+class PostQuerySet(models.QuerySet):
+    def with_author(self):
+        """
+        Join the author in the same query. Comment/like counts are stored
+        on the row, so serializing a page needs no per-row lookups.
+        """
+        return self.select_related('author')
+    
+    def with_pending_likes(self):
+        """Annotate like changes still sitting in counter shards"""
+        return self.annotate(pending_likes=pending_likes_subquery())
+
+
 class Post(models.Model):
     """
     Model for blog posts.
@@ -15,9 +55,17 @@ class Post(models.Model):
     content = models.TextField()
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
+    comments_count = models.PositiveIntegerField(default=0)
+    likes_count = models.PositiveIntegerField(default=0)
+    
+    objects = PostQuerySet.as_manager()
     
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['-created_at', '-id'], name='post_recent_idx'),
+            models.Index(fields=['author', '-created_at', '-id'], name='post_author_recent_idx'),
+        ]
     
     def __str__(self):
         return self.title
@@ -44,6 +92,9 @@ class Comment(models.Model):
     
     class Meta:
         ordering = ['created_at']
+        indexes = [
+            models.Index(fields=['created_at', 'id'], name='comment_created_idx'),
+        ]
     
     def __str__(self):
         return f'Comment by {self.author.username} on {self.post.title}'
@@ -69,4 +120,61 @@ class Like(models.Model):
         ordering = ['-created_at']
     
     def __str__(self):
-        return f'{self.user.username} likes {self.post.title}'
\ No newline at end of file
+        return f'{self.user.username} likes {self.post.title}'
+
+class TimelineEntry(models.Model):
+    """
+    Precomputed home timeline row (fan-out-on-write).
+    One row per follower per post, copied from the post when it is created
+    so the feed can be read from a single index without joining follows.
+    """
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='timeline_entries'
+    )
+    post = models.ForeignKey(
+        Post,
+        on_delete=models.CASCADE,
+        related_name='timeline_entries'
+    )
+    author = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='+'
+    )
+    created_at = models.DateTimeField()
+    
+    class Meta:
+        unique_together = ['user', 'post']
+        ordering = ['-created_at', '-post']
+        indexes = [
+            models.Index(fields=['user', '-created_at', '-post'], name='timeline_user_recent_idx'),
+            models.Index(fields=['user', 'author'], name='timeline_user_author_idx'),
+        ]
+    
+    def __str__(self):
+        return f'{self.post_id} in timeline of {self.user_id}'
+
+
+class LikeCounterShard(models.Model):
+    """
+    Pending like count changes for a post, spread over several rows.
+    Likes bump a random shard instead of the Post row, so concurrent likes
+    on one viral post do not queue on a single row lock. The
+    flush_like_shards command periodically folds shards into
+    Post.likes_count.
+    """
+    post = models.ForeignKey(
+        Post,
+        on_delete=models.CASCADE,
+        related_name='like_shards'
+    )
+    shard = models.PositiveSmallIntegerField()
+    likes = models.IntegerField(default=0)
+    
+    class Meta:
+        unique_together = ['post', 'shard']
+    
+    def __str__(self):
+        return f'Post {self.post_id} shard {self.shard}: {self.likes:+d}'
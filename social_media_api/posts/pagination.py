@@ -0,0 +1,138 @@
+import base64
+
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+from rest_framework.pagination import BasePagination, PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+
+def encode_cursor(created_at, pk):
+    """Turn a (created_at, id) position into an opaque URL-safe token"""
+    raw = f'{created_at.isoformat()}|{pk}'.encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+
+def decode_cursor(token):
+    """
+    Reverse of encode_cursor.
+    Returns a (created_at, id) tuple, or None if the token is malformed.
+    """
+    if not token:
+        return None
+    try:
+        padded = token + '=' * (-len(token) % 4)
+        created_at, pk = base64.urlsafe_b64decode(padded).decode().split('|')
+        created_at = parse_datetime(created_at)
+        pk = int(pk)
+    except (ValueError, UnicodeDecodeError):
+        return None
+    if created_at is None:
+        return None
+    return created_at, pk
+
+
+class KeysetPagination(BasePagination):
+    """
+    Cursor pagination keyed on (created_at, id).
+    Each page is a range scan from the last row seen, so page 1000 costs
+    the same as page 1. Cursors are opaque; the total count is skipped
+    unless the client asks for it with ?count=true.
+    """
+    page_size = 10
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+    cursor_query_param = 'cursor'
+    count_query_param = 'count'
+    ordering = '-created_at'
+    
+    def get_page_size(self, request):
+        try:
+            size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        if size <= 0:
+            return self.page_size
+        return min(size, self.max_page_size)
+    
+    def wants_count(self, request):
+        value = request.query_params.get(self.count_query_param, '')
+        return value.lower() in ('1', 'true', 'yes')
+    
+    def get_ordering(self, view):
+        """Views can override the direction with a cursor_ordering attribute"""
+        return getattr(view, 'cursor_ordering', self.ordering)
+    
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.page_size_value = self.get_page_size(request)
+        self.count = queryset.count() if self.wants_count(request) else None
+        
+        ordering = self.get_ordering(view)
+        descending = ordering.startswith('-')
+        field = ordering.lstrip('-')
+        lookup = 'lt' if descending else 'gt'
+        
+        position = decode_cursor(request.query_params.get(self.cursor_query_param))
+        if position:
+            created_at, pk = position
+            queryset = queryset.filter(
+                Q(**{f'{field}__{lookup}': created_at})
+                | Q(**{field: created_at, f'id__{lookup}': pk})
+            )
+        queryset = queryset.order_by(ordering, '-id' if descending else 'id')
+        
+        rows = list(queryset[:self.page_size_value + 1])
+        self.has_next = len(rows) > self.page_size_value
+        self.page = rows[:self.page_size_value]
+        self.field = field
+        return self.page
+    
+    def get_next_link(self):
+        if not self.has_next:
+            return None
+        last = self.page[-1]
+        return self.build_cursor_link(getattr(last, self.field), last.pk)
+    
+    def build_cursor_link(self, created_at, pk):
+        return replace_query_param(
+            self.request.build_absolute_uri(),
+            self.cursor_query_param,
+            encode_cursor(created_at, pk)
+        )
+    
+    def get_paginated_response(self, data):
+        payload = {'next': self.get_next_link(), 'results': data}
+        if self.count is not None:
+            payload = {'count': self.count, **payload}
+        return Response(payload)
+
+
+class StandardResultsPagination(PageNumberPagination):
+    """
+    Pagination settings: 10 items per page.
+    Passing ?cursor= (empty for the first page) switches to keyset mode,
+    which avoids OFFSET and COUNT(*) on deep pages.
+    """
+    page_size = 10
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+    
+    def get_keyset_paginator(self):
+        paginator = KeysetPagination()
+        paginator.page_size = self.page_size
+        paginator.page_size_query_param = self.page_size_query_param
+        paginator.max_page_size = self.max_page_size
+        return paginator
+    
+    def paginate_queryset(self, queryset, request, view=None):
+        self.keyset = None
+        if KeysetPagination.cursor_query_param in request.query_params:
+            self.keyset = self.get_keyset_paginator()
+            return self.keyset.paginate_queryset(queryset, request, view)
+        return super().paginate_queryset(queryset, request, view)
+    
+    def get_paginated_response(self, data):
+        if self.keyset is not None:
+            return self.keyset.get_paginated_response(data)
+        return super().get_paginated_response(data)
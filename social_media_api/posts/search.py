@@ -0,0 +1,260 @@
+"""
+Full-text search over post titles and content.
+
+``?search=`` on the post list is served by one of these backends instead
+of DRF's SearchFilter, whose ``ILIKE '%term%'`` scans every post:
+
+- PostgresSearchBackend matches a weighted ``tsvector`` expression that is
+  covered by the GIN index post_search_idx, ranks with ``ts_rank`` and
+  highlights with ``ts_headline``.
+- SQLiteSearchBackend keeps a copy of each post in the FTS5 table
+  posts_post_fts (synced by the signals in posts/signals.py), ranks with
+  ``bm25`` and highlights with ``highlight``/``snippet``.
+- SimpleSearchBackend is the old substring match, for other databases.
+
+POST_SEARCH_BACKEND picks one by dotted path; ``'auto'`` chooses by the
+database vendor. Titles weigh more than content in the ranking, and
+``?search_mode=prefix`` matches word prefixes (search-as-you-type).
+Highlights are only computed for the page being returned. They are built
+from user-written text, so the database marks matches with private
+sentinel characters and ``render_highlight`` HTML-escapes the text before
+turning the sentinels into ``<mark>`` tags.
+"""
+import re
+from functools import lru_cache
+
+from django.conf import settings
+from django.db import connection
+from django.db.models import F, FloatField, Q, Value
+from django.db.models.expressions import RawSQL
+from django.utils.html import escape
+from django.utils.module_loading import import_string
+from rest_framework.filters import BaseFilterBackend
+
+from .models import Post
+
+SEARCH_CONFIG = 'english'
+FTS_TABLE = 'posts_post_fts'
+# Private-use code points: never markup, and escape() leaves them alone.
+# A post containing them can at worst produce stray <mark> tags.
+HIGHLIGHT_START = '\ue000'
+HIGHLIGHT_STOP = '\ue001'
+SNIPPET_WORDS = 32
+
+TERM_RE = re.compile(r'\w+', re.UNICODE)
+
+
+def render_highlight(text):
+    """HTML-escape a sentinel-marked fragment, then mark the matches"""
+    if text is None:
+        return None
+    return (
+        escape(text)
+        .replace(HIGHLIGHT_START, '<mark>')
+        .replace(HIGHLIGHT_STOP, '</mark>')
+    )
+
+
+def parse_terms(text):
+    """Words in a user query; operators and punctuation are dropped"""
+    return TERM_RE.findall(text or '')[:20]
+
+
+class BaseSearchBackend:
+    """
+    Interface for post search backends.
+    ``search`` filters and ranks a queryset (annotating ``search_rank``,
+    higher is better); ``highlights`` returns {post_id: {'title', 'content'}}
+    of escaped HTML fragments for the given posts. ``index_post``/``remove_post`` keep any separate
+    index in sync and ``rebuild`` recreates it from the Post table.
+    """
+    def search(self, queryset, terms, prefix=False):
+        raise NotImplementedError
+
+    def highlights(self, post_ids, terms, prefix=False):
+        return {}
+
+    def index_post(self, post):
+        pass
+
+    def remove_post(self, post_id):
+        pass
+
+    def rebuild(self):
+        return 0
+
+
+class SimpleSearchBackend(BaseSearchBackend):
+    """Substring match on every term, newest first, no highlighting"""
+    def search(self, queryset, terms, prefix=False):
+        for term in terms:
+            queryset = queryset.filter(Q(title__icontains=term) | Q(content__icontains=term))
+        return (
+            queryset.annotate(search_rank=Value(0.0, output_field=FloatField()))
+            .order_by('-created_at', '-id')
+        )
+
+
+def post_search_vector():
+    """
+    The tsvector expression indexed by post_search_idx.
+    Queries must use exactly this expression for the index to apply.
+    """
+    from django.contrib.postgres.search import SearchVector
+
+    return (
+        SearchVector('title', weight='A', config=SEARCH_CONFIG)
+        + SearchVector('content', weight='B', config=SEARCH_CONFIG)
+    )
+
+
+class PostgresSearchBackend(BaseSearchBackend):
+    def query(self, terms, prefix=False):
+        from django.contrib.postgres.search import SearchQuery
+
+        if prefix:
+            raw = ' & '.join(f"'{term}':*" for term in terms)
+            return SearchQuery(raw, search_type='raw', config=SEARCH_CONFIG)
+        return SearchQuery(' '.join(terms), search_type='plain', config=SEARCH_CONFIG)
+
+    def search(self, queryset, terms, prefix=False):
+        from django.contrib.postgres.search import SearchRank
+
+        query = self.query(terms, prefix)
+        return (
+            queryset.annotate(search_vector=post_search_vector())
+            .filter(search_vector=query)
+            .annotate(search_rank=SearchRank(F('search_vector'), query))
+            .order_by('-search_rank', '-created_at', '-id')
+        )
+
+    def highlights(self, post_ids, terms, prefix=False):
+        from django.contrib.postgres.search import SearchHeadline
+
+        query = self.query(terms, prefix)
+        options = {
+            'config': SEARCH_CONFIG,
+            'start_sel': HIGHLIGHT_START,
+            'stop_sel': HIGHLIGHT_STOP,
+        }
+        rows = Post.objects.filter(pk__in=post_ids).annotate(
+            title_highlight=SearchHeadline('title', query, highlight_all=True, **options),
+            content_highlight=SearchHeadline(
+                'content', query, max_words=SNIPPET_WORDS, min_words=SNIPPET_WORDS // 2, **options
+            ),
+        ).values_list('pk', 'title_highlight', 'content_highlight')
+        return {
+            pk: {'title': render_highlight(title), 'content': render_highlight(content)}
+            for pk, title, content in rows
+        }
+
+
+class SQLiteSearchBackend(BaseSearchBackend):
+    """
+    FTS5 table keyed by post id. It holds its own copy of the text, so
+    writes go through index_post/remove_post rather than triggers.
+    """
+    def match(self, terms, prefix=False):
+        # Quote every term so FTS5 never parses user input as query syntax
+        suffix = '*' if prefix else ''
+        return ' '.join(f'"{term}"{suffix}' for term in terms)
+
+    def search(self, queryset, terms, prefix=False):
+        match = self.match(terms, prefix)
+        post = connection.ops.quote_name(Post._meta.db_table)
+        post_id = connection.ops.quote_name(Post._meta.pk.column)
+        matching = RawSQL(f'SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s', [match])
+        # bm25() is lower-is-better; title hits count ten times content hits
+        rank = RawSQL(
+            f'SELECT -bm25({FTS_TABLE}, 10.0, 1.0) FROM {FTS_TABLE}'
+            f' WHERE {FTS_TABLE} MATCH %s AND rowid = {post}.{post_id}',
+            [match],
+        )
+        return (
+            queryset.filter(pk__in=matching)
+            .annotate(search_rank=rank)
+            .order_by('-search_rank', '-created_at', '-id')
+        )
+
+    def highlights(self, post_ids, terms, prefix=False):
+        if not post_ids:
+            return {}
+        placeholders = ', '.join(['%s'] * len(post_ids))
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'SELECT rowid,'
+                f' highlight({FTS_TABLE}, 0, %s, %s),'
+                f' snippet({FTS_TABLE}, 1, %s, %s, %s, %s)'
+                f' FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s AND rowid IN ({placeholders})',
+                [
+                    HIGHLIGHT_START, HIGHLIGHT_STOP,
+                    HIGHLIGHT_START, HIGHLIGHT_STOP, '…', SNIPPET_WORDS,
+                    self.match(terms, prefix), *post_ids,
+                ],
+            )
+            return {
+                pk: {'title': render_highlight(title), 'content': render_highlight(content)}
+                for pk, title, content in cursor
+            }
+
+    def index_post(self, post):
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'INSERT OR REPLACE INTO {FTS_TABLE} (rowid, title, content) VALUES (%s, %s, %s)',
+                [post.pk, post.title, post.content],
+            )
+
+    def remove_post(self, post_id):
+        with connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {FTS_TABLE} WHERE rowid = %s', [post_id])
+
+    def rebuild(self):
+        post = Post._meta.db_table
+        with connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {FTS_TABLE}')
+            cursor.execute(
+                f'INSERT INTO {FTS_TABLE} (rowid, title, content) SELECT id, title, content FROM {post}'
+            )
+            cursor.execute(f"INSERT INTO {FTS_TABLE} ({FTS_TABLE}) VALUES ('optimize')")
+        return Post.objects.count()
+
+
+VENDOR_BACKENDS = {
+    'postgresql': 'posts.search.PostgresSearchBackend',
+    'sqlite': 'posts.search.SQLiteSearchBackend',
+}
+
+
+@lru_cache(maxsize=None)
+def _load_backend(path):
+    return import_string(path)()
+
+
+def get_search_backend():
+    path = getattr(settings, 'POST_SEARCH_BACKEND', 'auto')
+    if path == 'auto':
+        path = VENDOR_BACKENDS.get(connection.vendor, 'posts.search.SimpleSearchBackend')
+    return _load_backend(path)
+
+
+class PostSearchFilter(BaseFilterBackend):
+    """
+    ``?search=`` through the configured search backend.
+    ``?search_mode=prefix`` matches word prefixes instead of whole words.
+    """
+    search_param = 'search'
+    mode_param = 'search_mode'
+
+    def get_search(self, request):
+        """(terms, prefix) for the request, or None when not searching"""
+        terms = parse_terms(request.query_params.get(self.search_param))
+        if not terms:
+            return None
+        return terms, request.query_params.get(self.mode_param) == 'prefix'
+
+    def filter_queryset(self, request, queryset, view):
+        search = self.get_search(request)
+        if search is None:
+            return queryset
+        terms, prefix = search
+        return get_search_backend().search(queryset, terms, prefix)
@@ -1,4 +1,5 @@
 from rest_framework import serializers
+from .counters import like_totals
 from .models import Post, Comment
 from django.contrib.auth import get_user_model
 
@@ -21,17 +22,27 @@ class CommentSerializer(serializers.ModelSerializer):
 class PostSerializer(serializers.ModelSerializer):
     """
     Serializer for posts.
-    Shows post details with author info and comment count.
+    Shows post details with author info, comment and like counts.
     """
     author_username = serializers.ReadOnlyField(source='author.username')
-    comments_count = serializers.SerializerMethodField()
+    likes_count = serializers.SerializerMethodField()
     
     class Meta:
         model = Post
         fields = ['id', 'author', 'author_username', 'title', 'content', 
-                  'created_at', 'updated_at', 'comments_count']
-        read_only_fields = ['author']
+                  'created_at', 'updated_at', 'comments_count', 'likes_count']
+        read_only_fields = ['author', 'comments_count']
+    
+    def get_likes_count(self, obj):
+        """Stored count plus changes still pending in counter shards"""
+        if hasattr(obj, 'pending_likes'):
+            return obj.likes_count + obj.pending_likes
+        return like_totals([obj.pk]).get(obj.pk, obj.likes_count)
     
-    def get_comments_count(self, obj):
-        """Count number of comments on this post"""
-        return obj.comments.count()
\ No newline at end of file
+    def to_representation(self, instance):
+        """Search results also carry their rank and highlighted fragments"""
+        data = super().to_representation(instance)
+        if hasattr(instance, 'search_rank'):
+            data['search_rank'] = instance.search_rank
+            data['highlight'] = getattr(instance, 'search_highlight', None)
+        return data
\ No newline at end of file
@@ -1,3 +1,439 @@
-from django.test import TestCase
+from io import StringIO
+from django.test import TestCase, override_settings
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from rest_framework.test import APIClient
+from rest_framework import status
+from .counters import flush_like_shards, like_totals
+from .models import Post, Comment, Like, LikeCounterShard, TimelineEntry
 
-# Create your tests here.
+User = get_user_model()
+
+
+@override_settings(SECURE_SSL_REDIRECT=False)
+class FeedTestCase(TestCase):
+    """
+    Tests for the precomputed home timeline behind /api/feed/.
+    """
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.reader = User.objects.create_user(username='reader', password='testpass123')
+        self.author = User.objects.create_user(username='author', password='testpass123')
+        self.other = User.objects.create_user(username='other', password='testpass123')
+        self.client.force_authenticate(user=self.reader)
+        self.client.post(f'/api/accounts/follow/{self.author.id}/')
+
+    def create_post(self, user, title):
+        user.refresh_from_db()
+        self.client.force_authenticate(user=user)
+        response = self.client.post('/api/posts/', {'title': title, 'content': 'body'})
+        self.client.force_authenticate(user=self.reader)
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        return response.data['id']
+
+    def test_create_post_fans_out_to_followers(self):
+        post_id = self.create_post(self.author, 'Hello')
+        self.assertTrue(TimelineEntry.objects.filter(user=self.reader, post_id=post_id).exists())
+        self.assertFalse(TimelineEntry.objects.filter(user=self.other).exists())
+
+    def test_feed_pages_with_cursor(self):
+        ids = [self.create_post(self.author, f'Post {i}') for i in range(5)]
+        self.create_post(self.other, 'Not followed')
+
+        response = self.client.get('/api/feed/', {'page_size': 3})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([p['id'] for p in response.data['results']], ids[::-1][:3])
+        self.assertIsNotNone(response.data['next'])
+
+        response = self.client.get(response.data['next'])
+        self.assertEqual([p['id'] for p in response.data['results']], ids[::-1][3:])
+        self.assertIsNone(response.data['next'])
+
+    @override_settings(FEED_FANOUT_MAX_FOLLOWERS=0)
+    def test_celebrity_posts_merged_on_read(self):
+        post_id = self.create_post(self.author, 'Famous')
+        self.assertFalse(TimelineEntry.objects.exists())
+
+        response = self.client.get('/api/feed/')
+        self.assertEqual([p['id'] for p in response.data['results']], [post_id])
+
+    def test_posts_survive_dropping_below_fanout_threshold(self):
+        with self.settings(FEED_FANOUT_MAX_FOLLOWERS=0):
+            famous = self.create_post(self.author, 'While famous')
+        self.assertFalse(TimelineEntry.objects.exists())
+
+        # back under the threshold, after the cached celebrity set expired
+        cache.clear()
+        response = self.client.get('/api/feed/')
+        self.assertEqual([p['id'] for p in response.data['results']], [famous])
+
+        # posting stays cheap: nothing is pushed on the request path, and
+        # the author is still merged in on read
+        later = self.create_post(self.author, 'Back to normal')
+        self.assertFalse(TimelineEntry.objects.exists())
+        response = self.client.get('/api/feed/')
+        self.assertEqual([p['id'] for p in response.data['results']], [later, famous])
+
+        out = StringIO()
+        call_command('restore_fanout', '--once', stdout=out)
+        self.assertIn('Restored fan-out for 1 authors', out.getvalue())
+        self.assertEqual(
+            set(TimelineEntry.objects.filter(user=self.reader).values_list('post_id', flat=True)),
+            {famous, later},
+        )
+        self.author.refresh_from_db()
+        self.assertFalse(self.author.fanout_on_read)
+        cache.clear()
+        response = self.client.get('/api/feed/')
+        self.assertEqual([p['id'] for p in response.data['results']], [later, famous])
+
+    def test_follow_and_unfollow_update_timeline(self):
+        post_id = self.create_post(self.other, 'Later')
+
+        self.client.post(f'/api/accounts/follow/{self.other.id}/')
+        self.assertTrue(TimelineEntry.objects.filter(user=self.reader, post_id=post_id).exists())
+
+        self.client.post(f'/api/accounts/unfollow/{self.other.id}/')
+        self.assertFalse(TimelineEntry.objects.filter(user=self.reader, author=self.other).exists())
+
+
+@override_settings(SECURE_SSL_REDIRECT=False)
+class CursorPaginationTestCase(TestCase):
+    """
+    Tests for the ?cursor= keyset mode of StandardResultsPagination.
+    """
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = User.objects.create_user(username='writer', password='testpass123')
+        self.posts = [
+            Post.objects.create(author=self.user, title=f'Post {i}', content='body')
+            for i in range(5)
+        ]
+
+    def test_page_number_mode_unchanged(self):
+        response = self.client.get('/api/posts/', {'page_size': 2, 'page': 2})
+        self.assertEqual(response.data['count'], 5)
+        self.assertEqual(len(response.data['results']), 2)
+
+    def test_cursor_mode_walks_all_posts_without_count(self):
+        seen = []
+        url = '/api/posts/?cursor=&page_size=2'
+        while url:
+            response = self.client.get(url)
+            self.assertNotIn('count', response.data)
+            seen += [p['id'] for p in response.data['results']]
+            url = response.data['next']
+        self.assertEqual(seen, [p.id for p in reversed(self.posts)])
+
+    def test_cursor_mode_count_is_optional(self):
+        response = self.client.get('/api/posts/', {'cursor': '', 'count': 'true'})
+        self.assertEqual(response.data['count'], 5)
+
+    def test_bad_cursor_starts_from_first_page(self):
+        response = self.client.get('/api/posts/', {'cursor': 'not-a-cursor'})
+        self.assertEqual(len(response.data['results']), 5)
+
+    def test_cursor_is_rejected_with_search(self):
+        response = self.client.get('/api/posts/', {'cursor': '', 'search': 'post'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('cursor', response.data)
+
+
+@override_settings(SECURE_SSL_REDIRECT=False)
+class PostQueryCountTestCase(TestCase):
+    """
+    Serializing a page of posts must not issue per-row queries.
+    """
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.reader = User.objects.create_user(username='reader', password='testpass123')
+        for i in range(20):
+            author = User.objects.create_user(username=f'author{i}')
+            self.reader.following.add(author)
+            post = Post.objects.create(author=author, title=f'Post {i}', content='searchable')
+            TimelineEntry.objects.create(
+                user=self.reader, post=post, author=author, created_at=post.created_at
+            )
+            Comment.objects.create(post=post, author=self.reader, content='Nice')
+            Like.objects.create(post=post, user=self.reader)
+        call_command('reconcile_counters', stdout=StringIO())
+        self.client.force_authenticate(user=self.reader)
+
+    def test_post_list_query_count(self):
+        # COUNT(*) for the page number paginator + the page with authors
+        with self.assertNumQueries(2):
+            response = self.client.get('/api/posts/', {'page_size': 20})
+        self.assertEqual(response.data['results'][0]['comments_count'], 1)
+        self.assertEqual(response.data['results'][0]['likes_count'], 1)
+
+    def test_search_query_count(self):
+        # COUNT(*) + the ranked page + highlights for that page
+        with self.assertNumQueries(3):
+            response = self.client.get('/api/posts/', {'search': 'searchable', 'page_size': 20})
+        self.assertEqual(len(response.data['results']), 20)
+
+    def test_feed_query_count(self):
+        cache.clear()
+        # timeline page + celebrity ids + posts with authors
+        with self.assertNumQueries(3):
+            response = self.client.get('/api/feed/', {'page_size': 20})
+        self.assertEqual(len(response.data['results']), 20)
+        self.assertEqual(response.data['results'][0]['comments_count'], 1)
+
+
+@override_settings(SECURE_SSL_REDIRECT=False)
+class CounterTestCase(TestCase):
+    """
+    Stored comments_count/likes_count follow likes and comments.
+    """
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = User.objects.create_user(username='liker', password='testpass123')
+        self.post = Post.objects.create(author=self.user, title='Counted', content='body')
+        self.client.force_authenticate(user=self.user)
+
+    def test_like_and_unlike_adjust_likes_count(self):
+        self.client.post(f'/api/posts/{self.post.id}/like/')
+        self.client.post(f'/api/posts/{self.post.id}/like/')
+        flush_like_shards()
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.likes_count, 1)
+
+        self.client.post(f'/api/posts/{self.post.id}/unlike/')
+        flush_like_shards()
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.likes_count, 0)
+
+    def test_comment_create_and_delete_adjust_comments_count(self):
+        response = self.client.post('/api/comments/', {'post': self.post.id, 'content': 'Hi'})
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.comments_count, 1)
+
+        self.client.delete(f'/api/comments/{response.data["id"]}/')
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.comments_count, 0)
+
+    def test_reconcile_counters_fixes_drift(self):
+        Like.objects.create(post=self.post, user=self.user)
+        Post.objects.filter(pk=self.post.pk).update(comments_count=7)
+
+        out = StringIO()
+        call_command('reconcile_counters', stdout=out)
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.likes_count, 1)
+        self.assertEqual(self.post.comments_count, 0)
+        self.assertIn('1 posts', out.getvalue())
+
+
+@override_settings(SECURE_SSL_REDIRECT=False)
+class IdempotentLikeTestCase(TestCase):
+    """
+    Tests for PUT/DELETE/toggle and batch like endpoints.
+    """
+
+    def setUp(self):
+        self.client = APIClient()
+        self.author = User.objects.create_user(username='author')
+        self.user = User.objects.create_user(username='liker')
+        self.post = Post.objects.create(author=self.author, title='Viral', content='body')
+        self.url = f'/api/posts/{self.post.id}/like/'
+        self.client.force_authenticate(user=self.user)
+
+    def test_put_and_delete_are_idempotent(self):
+        for _ in range(2):
+            response = self.client.put(self.url)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            self.assertEqual(response.data, {'liked': True, 'likes_count': 1})
+        for _ in range(2):
+            response = self.client.delete(self.url)
+            self.assertEqual(response.data, {'liked': False, 'likes_count': 0})
+        self.assertFalse(Like.objects.exists())
+
+    def test_post_keeps_original_contract(self):
+        self.assertEqual(self.client.post(self.url).status_code, status.HTTP_201_CREATED)
+        self.assertEqual(self.client.post(self.url).status_code, status.HTTP_400_BAD_REQUEST)
+        unlike = f'/api/posts/{self.post.id}/unlike/'
+        self.assertEqual(self.client.post(unlike).status_code, status.HTTP_200_OK)
+        self.assertEqual(self.client.post(unlike).status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_missing_post_returns_404(self):
+        self.assertEqual(self.client.put('/api/posts/999/like/').status_code, 404)
+        self.assertEqual(self.client.delete('/api/posts/999/like/').status_code, 404)
+
+    def test_toggle(self):
+        toggle = f'/api/posts/{self.post.id}/like/toggle/'
+        self.assertEqual(self.client.post(toggle).data, {'liked': True, 'likes_count': 1})
+        self.assertEqual(self.client.post(toggle).data, {'liked': False, 'likes_count': 0})
+
+    def test_batch_like_and_unlike(self):
+        other = Post.objects.create(author=self.author, title='Other', content='body')
+        self.client.put(self.url)
+
+        response = self.client.post(
+            '/api/likes/', {'post_ids': [self.post.id, other.id, 999]}, format='json'
+        )
+        self.assertEqual(response.data, {'liked': [other.id]})
+        self.assertEqual(like_totals([other.id]), {other.id: 1})
+
+        response = self.client.delete(
+            '/api/likes/', {'post_ids': [self.post.id, other.id]}, format='json'
+        )
+        self.assertEqual(response.data, {'unliked': sorted([self.post.id, other.id])})
+        self.assertEqual(like_totals([self.post.id, other.id]), {self.post.id: 0, other.id: 0})
+
+    def test_like_never_looks_up_the_like_row(self):
+        with CaptureQueriesContext(connection) as queries:
+            self.client.put(self.url)
+            self.client.delete(self.url)
+        lookups = [
+            q['sql'] for q in queries
+            if q['sql'].startswith('SELECT') and 'FROM "posts_like"' in q['sql']
+        ]
+        self.assertEqual(lookups, [])
+
+    def test_batch_writes_never_look_up_like_rows(self):
+        # counts follow what the writes changed, not an earlier SELECT
+        other = Post.objects.create(author=self.author, title='Other', content='body')
+        with CaptureQueriesContext(connection) as queries:
+            self.client.post('/api/likes/', {'post_ids': [self.post.id, other.id]}, format='json')
+            self.client.post('/api/likes/', {'post_ids': [self.post.id]}, format='json')
+            self.client.delete('/api/likes/', {'post_ids': [self.post.id, other.id]}, format='json')
+            self.client.delete('/api/likes/', {'post_ids': [other.id]}, format='json')
+        lookups = [
+            q['sql'] for q in queries
+            if q['sql'].startswith('SELECT') and 'FROM "posts_like"' in q['sql']
+        ]
+        self.assertEqual(lookups, [])
+        self.assertEqual(like_totals([self.post.id, other.id]), {self.post.id: 0, other.id: 0})
+
+
+
+@override_settings(SECURE_SSL_REDIRECT=False, LIKE_COUNTER_SHARDS=4)
+class LikeCounterShardTestCase(TestCase):
+    """
+    Likes land in counter shards and are folded into Post.likes_count later.
+    """
+
+    def setUp(self):
+        self.client = APIClient()
+        self.author = User.objects.create_user(username='author')
+        self.post = Post.objects.create(author=self.author, title='Viral', content='body')
+        self.fans = [User.objects.create_user(username=f'fan{i}') for i in range(20)]
+
+    def like_all(self):
+        for fan in self.fans:
+            self.client.force_authenticate(user=fan)
+            self.client.put(f'/api/posts/{self.post.id}/like/')
+
+    def test_likes_spread_over_shards(self):
+        self.like_all()
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.likes_count, 0)
+        shards = LikeCounterShard.objects.filter(post=self.post)
+        self.assertLessEqual(shards.count(), 4)
+        self.assertEqual(sum(shards.values_list('likes', flat=True)), 20)
+
+    def test_reads_combine_shards(self):
+        self.like_all()
+        response = self.client.get(f'/api/posts/{self.post.id}/')
+        self.assertEqual(response.data['likes_count'], 20)
+
+    def test_flush_folds_and_clears_shards(self):
+        self.like_all()
+        out = StringIO()
+        call_command('flush_like_shards', '--once', stdout=out)
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.likes_count, 20)
+        self.assertFalse(LikeCounterShard.objects.exists())
+        self.assertEqual(like_totals([self.post.id]), {self.post.id: 20})
+
+    def test_reconcile_accounts_for_pending_shards(self):
+        self.like_all()
+        call_command('reconcile_counters', stdout=StringIO())
+        self.assertEqual(like_totals([self.post.id]), {self.post.id: 20})
+
+    def test_reconcile_never_writes_a_negative_count(self):
+        # shards claim more likes than there are Like rows
+        LikeCounterShard.objects.create(post=self.post, shard=0, likes=3)
+        call_command('reconcile_counters', stdout=StringIO())
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.likes_count, 0)
+
+
+@override_settings(SECURE_SSL_REDIRECT=False)
+class PostSearchTestCase(TestCase):
+    """
+    Tests for ranked full-text search behind ?search= on /api/posts/.
+    """
+
+    def setUp(self):
+        self.client = APIClient()
+        self.author = User.objects.create_user(username='author', password='testpass123')
+        self.in_title = Post.objects.create(
+            author=self.author, title='Django performance tips', content='Indexes matter.'
+        )
+        self.in_content = Post.objects.create(
+            author=self.author, title='Weekend notes', content='Read a post about django today.'
+        )
+        self.unrelated = Post.objects.create(
+            author=self.author, title='Cooking', content='Pasta recipes.'
+        )
+
+    def search(self, query, **params):
+        response = self.client.get('/api/posts/', {'search': query, **params})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return response.data['results']
+
+    def test_title_matches_rank_first(self):
+        results = self.search('django')
+        self.assertEqual([r['id'] for r in results], [self.in_title.id, self.in_content.id])
+        self.assertGreater(results[0]['search_rank'], results[1]['search_rank'])
+
+    def test_prefix_mode(self):
+        self.assertEqual(self.search('perf'), [])
+        results = self.search('perf', search_mode='prefix')
+        self.assertEqual([r['id'] for r in results], [self.in_title.id])
+
+    def test_highlights_matches(self):
+        result = self.search('indexes')[0]
+        self.assertIn('<mark>Indexes</mark>', result['highlight']['content'])
+
+    def test_highlights_escape_post_markup(self):
+        post = Post.objects.create(
+            author=self.author, title='<b>Exploit</b> guide',
+            content='Read <script>alert("exploit")</script> & <img src=x onerror=alert(1)>',
+        )
+        result = self.search('exploit')[0]
+        self.assertEqual(result['id'], post.id)
+        title, content = result['highlight']['title'], result['highlight']['content']
+        self.assertEqual(title, '&lt;b&gt;<mark>Exploit</mark>&lt;/b&gt; guide')
+        self.assertNotIn('<script>', content)
+        self.assertNotIn('<img', content)
+        self.assertIn('&lt;script&gt;', content)
+        self.assertIn('<mark>exploit</mark>', content)
+
+    def test_index_follows_edits_and_deletes(self):
+        self.unrelated.content = 'Pasta with django sauce'
+        self.unrelated.save()
+        self.in_title.delete()
+        ids = {r['id'] for r in self.search('django')}
+        self.assertEqual(ids, {self.in_content.id, self.unrelated.id})
+
+    def test_query_syntax_is_not_interpreted(self):
+        self.assertEqual(self.search('"django" OR NEAR(*'), self.search('django OR NEAR'))
+        self.assertEqual(len(self.search('!!!')), 3)
+
+    def test_rebuild_command(self):
+        out = StringIO()
+        call_command('rebuild_search_index', stdout=out)
+        self.assertIn('indexed 3 posts', out.getvalue())
+        self.assertEqual(len(self.search('pasta')), 1)
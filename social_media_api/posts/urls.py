@@ -1,6 +1,9 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
-from .views import PostViewSet, CommentViewSet, user_feed, like_post, unlike_post
+from .views import (
+    PostViewSet, CommentViewSet, user_feed, like_post, unlike_post, toggle_like,
+    batch_likes
+)
 
 router = DefaultRouter()
 router.register(r'posts', PostViewSet, basename='post')
@@ -11,4 +14,6 @@ urlpatterns = [
     path('feed/', user_feed, name='user-feed'),
     path('posts/<int:pk>/like/', like_post, name='like-post'),
     path('posts/<int:pk>/unlike/', unlike_post, name='unlike-post'),
+    path('posts/<int:pk>/like/toggle/', toggle_like, name='toggle-like'),
+    path('likes/', batch_likes, name='batch-likes'),
 ]
\ No newline at end of file
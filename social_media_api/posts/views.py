@@ -1,28 +1,27 @@
-from rest_framework import viewsets, permissions, filters
-from rest_framework.pagination import PageNumberPagination
-from .models import Post, Comment, Like
+from rest_framework import viewsets, permissions
+from .models import Post, Comment
 from .serializers import PostSerializer, CommentSerializer
 from rest_framework.decorators import api_view, permission_classes
+from rest_framework.exceptions import ValidationError
 from rest_framework.response import Response
 from rest_framework import generics, permissions, status
+from django.db import transaction
+from .counters import adjust_counter
+from .likes import add_like, add_likes, remove_like, remove_likes
+from .feed import fan_out_post, get_feed_page
+from .pagination import KeysetPagination, StandardResultsPagination, decode_cursor
+from .search import PostSearchFilter, get_search_backend
+
+MAX_BATCH_LIKES = 100
 
 def create_notification(recipient, actor, verb, target=None):
     """
     Helper function to create notifications.
+    Queues them in the outbox; the deliver_notifications worker writes them.
     """
-    from notifications.models import Notification
-    
-    notification = Notification.objects.create(
-        recipient=recipient,
-        actor=actor,
-        verb=verb
-    )
-    
-    if target:
-        notification.target = target
-        notification.save()
+    from notifications.outbox import enqueue_notification
     
-    return notification
+    enqueue_notification(recipient, actor, verb, target)
 
 class IsAuthorOrReadOnly(permissions.BasePermission):
     """
@@ -36,15 +35,6 @@ class IsAuthorOrReadOnly(permissions.BasePermission):
         return obj.author == request.user
 
 
-class StandardResultsPagination(PageNumberPagination):
-    """
-    Pagination settings: 10 items per page.
-    """
-    page_size = 10
-    page_size_query_param = 'page_size'
-    max_page_size = 100
-
-
 class PostViewSet(viewsets.ModelViewSet):
     """
     ViewSet for CRUD operations on posts.
@@ -53,17 +43,37 @@ class PostViewSet(viewsets.ModelViewSet):
     - Retrieve single post
     - Update post (author only)
     - Delete post (author only)
+    - Search with ?search= (ranked, ?search_mode=prefix for prefixes)
     """
-    queryset = Post.objects.all()
+    queryset = Post.objects.with_author().with_pending_likes()
     serializer_class = PostSerializer
     permission_classes = [permissions.IsAuthenticatedOrReadOnly, IsAuthorOrReadOnly]
     pagination_class = StandardResultsPagination
-    filter_backends = [filters.SearchFilter]
-    search_fields = ['title', 'content']
+    filter_backends = [PostSearchFilter]
+    
+    def paginate_queryset(self, queryset):
+        """
+        Attach search highlights to the posts on this page only.
+        Search results are ordered by rank, which a (created_at, id) cursor
+        cannot resume from, so ?cursor= with ?search= is rejected.
+        """
+        search = PostSearchFilter().get_search(self.request)
+        if search is not None and KeysetPagination.cursor_query_param in self.request.query_params:
+            raise ValidationError(
+                {'cursor': 'Search results are ranked; page them with ?page= instead.'}
+            )
+        page = super().paginate_queryset(queryset)
+        if page is not None and search is not None:
+            terms, prefix = search
+            highlights = get_search_backend().highlights([post.pk for post in page], terms, prefix)
+            for post in page:
+                post.search_highlight = highlights.get(post.pk)
+        return page
     
     def perform_create(self, serializer):
-        """Set the post author to the current user"""
-        serializer.save(author=self.request.user)
+        """Set the post author to the current user and push it to followers' feeds"""
+        post = serializer.save(author=self.request.user)
+        fan_out_post(post)
 
 
 class CommentViewSet(viewsets.ModelViewSet):
@@ -75,70 +85,110 @@ class CommentViewSet(viewsets.ModelViewSet):
     - Update comment (author only)
     - Delete comment (author only)
     """
-    queryset = Comment.objects.all()
+    queryset = Comment.objects.select_related('author')
     serializer_class = CommentSerializer
     permission_classes = [permissions.IsAuthenticatedOrReadOnly, IsAuthorOrReadOnly]
     pagination_class = StandardResultsPagination
+    cursor_ordering = 'created_at'
     
     def perform_create(self, serializer):
         """Set the comment author to the current user"""
-        serializer.save(author=self.request.user)
+        with transaction.atomic():
+            comment = serializer.save(author=self.request.user)
+            adjust_counter(Post, comment.post_id, 'comments_count', 1)
+    
+    def perform_update(self, serializer):
+        """Move the comment count along if the comment changes post"""
+        old_post_id = serializer.instance.post_id
+        with transaction.atomic():
+            comment = serializer.save()
+            if comment.post_id != old_post_id:
+                adjust_counter(Post, old_post_id, 'comments_count', -1)
+                adjust_counter(Post, comment.post_id, 'comments_count', 1)
+    
+    def perform_destroy(self, instance):
+        with transaction.atomic():
+            instance.delete()
+            adjust_counter(Post, instance.post_id, 'comments_count', -1)
 
 @api_view(['GET'])
 @permission_classes([permissions.IsAuthenticated])
 def user_feed(request):
     """
     Get personalized feed showing posts from users you follow.
+    Reads the precomputed timeline and pages with ?cursor= instead of ?page=,
+    so every page costs the same no matter how far the client has scrolled.
     """
-    # Get all users that current user follows
-    following_users = request.user.following.all()
+    paginator = KeysetPagination()
+    paginator.request = request
+    limit = paginator.get_page_size(request)
+    position = decode_cursor(request.query_params.get(paginator.cursor_query_param))
     
-    # Get posts from those users, newest first
-    posts = Post.objects.filter(author__in=following_users).order_by('-created_at')
+    posts = get_feed_page(request.user, position, limit)
     
-    # Apply pagination
-    paginator = StandardResultsPagination()
-    paginated_posts = paginator.paginate_queryset(posts, request)
+    next_url = None
+    if len(posts) > limit:
+        posts = posts[:limit]
+        next_url = paginator.build_cursor_link(posts[-1].created_at, posts[-1].id)
     
     # Convert to JSON
-    serializer = PostSerializer(paginated_posts, many=True)
+    serializer = PostSerializer(posts, many=True)
     
-    return paginator.get_paginated_response(serializer.data)
+    return Response({
+        'next': next_url,
+        'results': serializer.data
+    })
 
-@api_view(['POST'])
+def _notify_like(request, post_id, author_id):
+    """Notify the author about a new like, unless they liked their own post"""
+    if author_id != request.user.pk:
+        create_notification(
+            recipient=author_id,
+            actor=request.user,
+            verb='liked your post',
+            target=Post(pk=post_id)
+        )
+
+
+def _like_state(liked, likes_count, status_code=status.HTTP_200_OK, **extra):
+    return Response({'liked': liked, 'likes_count': likes_count, **extra}, status=status_code)
+
+
+@api_view(['POST', 'PUT', 'DELETE'])
 @permission_classes([permissions.IsAuthenticated])
 def like_post(request, pk):
     """
     Like a post and notify the author.
+    PUT likes and DELETE unlikes idempotently; both return the new count.
+    POST keeps the original behaviour of refusing a second like.
     """
-    try:
-        post = generics.get_object_or_404(Post, pk=pk)
-    except:
+    if request.method == 'DELETE':
+        result = remove_like(request.user.pk, pk)
+    else:
+        result = add_like(request.user.pk, pk)
+    if result is None:
         return Response(
             {'error': 'Post not found'},
             status=status.HTTP_404_NOT_FOUND
         )
+    changed, likes_count, author_id = result
+    
+    if request.method == 'DELETE':
+        return _like_state(False, likes_count)
+    
+    if changed:
+        _notify_like(request, pk, author_id)
     
-    # Try to create like (will fail if already exists)
-    like, created = Like.objects.get_or_create(user=request.user, post=post)
+    if request.method == 'PUT':
+        return _like_state(True, likes_count)
     
-    if not created:
+    if not changed:
         return Response(
-            {'message': 'You already liked this post'},
+            {'message': 'You already liked this post', 'likes_count': likes_count},
             status=status.HTTP_400_BAD_REQUEST
         )
-    
-    # Create notification if not liking own post
-    if post.author != request.user:
-        create_notification(
-            recipient=post.author,
-            actor=request.user,
-            verb='liked your post',
-            target=post
-        )
-    
     return Response(
-        {'message': 'Post liked successfully'},
+        {'message': 'Post liked successfully', 'likes_count': likes_count},
         status=status.HTTP_201_CREATED
     )
 
@@ -149,23 +199,77 @@ def unlike_post(request, pk):
     """
     Unlike a post.
     """
-    try:
-        post = generics.get_object_or_404(Post, pk=pk)
-        like = Like.objects.get(user=request.user, post=post)
-        like.delete()
-        
+    result = remove_like(request.user.pk, pk)
+    if result is None:
         return Response(
-            {'message': 'Post unliked successfully'},
-            status=status.HTTP_200_OK
+            {'error': 'Post not found'},
+            status=status.HTTP_404_NOT_FOUND
+        )
+    removed, likes_count, _ = result
+    
+    if not removed:
+        return Response(
+            {'error': 'You have not liked this post', 'likes_count': likes_count},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    return Response(
+        {'message': 'Post unliked successfully', 'likes_count': likes_count},
+        status=status.HTTP_200_OK
+    )
+
+
+@api_view(['POST'])
+@permission_classes([permissions.IsAuthenticated])
+def toggle_like(request, pk):
+    """
+    Flip the like state of a post and return the new state and count.
+    """
+    result = remove_like(request.user.pk, pk)
+    if result is None:
+        return Response(
+            {'error': 'Post not found'},
+            status=status.HTTP_404_NOT_FOUND
         )
+    removed, likes_count, _ = result
+    if removed:
+        return _like_state(False, likes_count)
     
-    except Post.DoesNotExist:
+    result = add_like(request.user.pk, pk)
+    if result is None:
         return Response(
             {'error': 'Post not found'},
             status=status.HTTP_404_NOT_FOUND
         )
-    except Like.DoesNotExist:
+    created, likes_count, author_id = result
+    if created:
+        _notify_like(request, pk, author_id)
+    return _like_state(True, likes_count)
+
+
+@api_view(['POST', 'DELETE'])
+@permission_classes([permissions.IsAuthenticated])
+def batch_likes(request):
+    """
+    Like (POST) or unlike (DELETE) many posts at once.
+    Body: {"post_ids": [1, 2, 3]}. Returns the ids that changed.
+    """
+    post_ids = request.data.get('post_ids')
+    if not isinstance(post_ids, list) or not all(isinstance(i, int) for i in post_ids):
+        return Response(
+            {'error': 'post_ids must be a list of integers'},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    if len(post_ids) > MAX_BATCH_LIKES:
         return Response(
-            {'error': 'You have not liked this post'},
+            {'error': f'At most {MAX_BATCH_LIKES} posts per request'},
             status=status.HTTP_400_BAD_REQUEST
-        )
\ No newline at end of file
+        )
+    
+    if request.method == 'DELETE':
+        return Response({'unliked': sorted(remove_likes(request.user.pk, post_ids))})
+    
+    liked = add_likes(request.user.pk, post_ids)
+    authors = Post.objects.filter(pk__in=liked).values_list('pk', 'author_id')
+    for post_id, author_id in authors:
+        _notify_like(request, post_id, author_id)
+    return Response({'liked': sorted(liked)})
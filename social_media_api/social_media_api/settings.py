@@ -130,6 +130,40 @@ REST_FRAMEWORK = {
     ],
 }
 
+# Home feed: authors with more followers than this are merged into feeds
+# at read time instead of being pushed into every follower's timeline.
+FEED_FANOUT_MAX_FOLLOWERS = config('FEED_FANOUT_MAX_FOLLOWERS', default=5000, cast=int)
+FEED_BACKFILL_LIMIT = 100
+
+# Notifications are queued and written by `manage.py deliver_notifications`.
+# Events on the same recipient/verb/target within this many seconds are
+# grouped into one notification ("alice and 241 others liked your post").
+NOTIFICATION_GROUP_WINDOW = 86400
+
+# Server-sent events stream at /api/notifications/stream/ (needs ASGI).
+# The pub/sub backend wakes streams up when the worker process delivers
+# notifications; DatabaseBackend polls a table so it works across
+# processes. The heartbeat also re-checks the database as a fallback.
+NOTIFICATION_PUBSUB_BACKEND = 'notifications.pubsub.DatabaseBackend'
+NOTIFICATION_PUBSUB_POLL_INTERVAL = 1
+NOTIFICATION_PUBSUB_RETENTION = 60
+NOTIFICATION_STREAM_HEARTBEAT = 15
+NOTIFICATION_STREAM_LIFETIME = 300
+# EventSource cannot send headers, so clients get a short-lived token for
+# ?token= from /api/notifications/stream/token/ instead of exposing their
+# API token in URLs
+NOTIFICATION_STREAM_TOKEN_MAX_AGE = 60
+
+# Likes are counted in this many LikeCounterShard rows per post so that
+# concurrent likes on a hot post don't queue on one row lock. Shards are
+# folded into Post.likes_count by `manage.py flush_like_shards`.
+LIKE_COUNTER_SHARDS = config('LIKE_COUNTER_SHARDS', default=16, cast=int)
+
+# Full-text search behind ?search= on /api/posts/ (see posts/search.py).
+# 'auto' uses Postgres tsvector/GIN or SQLite FTS5 depending on the
+# database; any other value is the dotted path of a backend class.
+POST_SEARCH_BACKEND = config('POST_SEARCH_BACKEND', default='auto')
+
 STATIC_URL = '/static/'
 STATIC_ROOT = BASE_DIR / 'staticfiles'
 